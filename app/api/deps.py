@@ -3,6 +3,8 @@ from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.infrastructure.database import get_db
 from app.infrastructure.repositories.doctor_repository import DoctorRepository
+from app.infrastructure.repositories.job_repository import JobRepository
+from app.infrastructure.repositories.roster_repository import RosterRepository
 
 # Type Hint para injeção do banco de dados
 DBDep = Annotated[AsyncSession, Depends(get_db)]
@@ -12,4 +14,13 @@ async def get_doctor_repo(db: DBDep) -> DoctorRepository:
     Injeta o Repositório de Médicos já com a sessão do banco ativa.
     Isso abstrai a persistência dos controllers.
     """
-    return DoctorRepository(db)
\ No newline at end of file
+    return DoctorRepository(db)
+
+async def get_job_repo(db: DBDep) -> JobRepository:
+    """Injeta o Repositório da fila de jobs de otimização."""
+    return JobRepository(db)
+
+
+async def get_roster_repo(db: DBDep) -> RosterRepository:
+    """Injeta o Repositório de escalas geradas (versionadas)."""
+    return RosterRepository(db)
@@ -1,6 +1,8 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.domain.models import Doctor
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.exc import IntegrityError
+from app.domain.models import Doctor, DoctorImportReport, SpecialtyEnum
+from app.application.services.doctor_import import DoctorBulkImporter, iter_text_lines
 from app.infrastructure.repositories.doctor_repository import DoctorRepository
 from app.api.deps import get_doctor_repo
 
@@ -15,30 +17,73 @@ async def create_doctor(
     Cadastra um novo médico e suas restrições/preferências.
     O Payload deve seguir estritamente o modelo de domínio.
     """
-    # Verificação simples de duplicidade (em prod seria melhor tratar exceção do banco)
-    existing_doctors = await repo.get_all()
-    if any(d.crm == doctor_in.crm for d in existing_doctors):
-        raise HTTPException(
-            status_code=400, 
-            detail=f"Médico com CRM {doctor_in.crm} já existe."
-        )
+    duplicate_detail = f"Médico com CRM {doctor_in.crm} já existe."
+
+    # Consulta pelo índice único de CRM (caso comum, mensagem amigável)
+    if await repo.get_by_crm(doctor_in.crm) is not None:
+        raise HTTPException(status_code=400, detail=duplicate_detail)
 
     try:
         # A conversão Domain -> ORM acontece dentro do repo
         await repo.create_from_domain(doctor_in)
         return doctor_in
+    except IntegrityError:
+        # Duas requisições com o mesmo CRM ao mesmo tempo: o índice único barra a segunda
+        raise HTTPException(status_code=400, detail=duplicate_detail)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/import", response_model=DoctorImportReport)
+async def import_doctors(
+    request: Request,
+    format: Optional[Literal["csv", "jsonl"]] = Query(None, description="Padrão: deduzido do Content-Type"),
+    batch_size: int = Query(1000, ge=1, le=10000),
+    repo: DoctorRepository = Depends(get_doctor_repo)
+):
+    """
+    Importação em lote (onboarding de hospital). O corpo é o próprio arquivo,
+    CSV com cabeçalho ou JSONL (um Doctor por linha), lido em fluxo.
+
+    Linhas inválidas ou com CRM já cadastrado não abortam a importação:
+    aparecem no relatório com o número da linha.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "jsonl"
+
+    importer = DoctorBulkImporter(repo, batch_size=batch_size)
+    try:
+        return await importer.run(iter_text_lines(request.stream()), format)
+    except ValueError as e:
+        # Cabeçalho do CSV inválido
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/", response_model=List[Doctor])
 async def list_doctors(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Id do último médico da página anterior (paginação por chave)"),
+    specialty: Optional[SpecialtyEnum] = None,
+    min_seniority: Optional[int] = Query(None, ge=1, le=5),
+    max_seniority: Optional[int] = Query(None, ge=1, le=5),
     repo: DoctorRepository = Depends(get_doctor_repo)
 ):
     """
     Lista todos os médicos ativos no sistema.
     Usado pelo Frontend para mostrar quem está disponível para a escala.
+
+    Filtros e paginação rodam no banco. Para percorrer tudo, use o cabeçalho
+    `X-Next-Cursor` da resposta como `after` da próxima chamada.
     """
-    doctors = await repo.get_all_active_doctors()
-    return doctors[skip : skip + limit]
\ No newline at end of file
+    doctors = await repo.list_page(
+        limit=limit,
+        after_id=after,
+        skip=skip,
+        specialty=specialty.value if specialty else None,
+        min_seniority=min_seniority,
+        max_seniority=max_seniority,
+    )
+    if len(doctors) == limit:
+        response.headers["X-Next-Cursor"] = doctors[-1].id
+    return doctors
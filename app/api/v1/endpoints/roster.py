@@ -1,12 +1,28 @@
-from typing import List
-from datetime import date
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+import asyncio
+import json
+import uuid
+from typing import Dict, List, Literal, Optional, Union
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from app.domain.models import ShiftSlot, RosterSolution, OptimizationRequest
-from app.application.services.optimizer_service import RosterOptimizerService
+from app.domain.models import (
+    ShiftSlot, RosterSolution, OptimizationRequest, OptimizationResult, JobStatusEnum, RollingHorizonSettings,
+    CompactRoster, InfeasibilityReport, RosterChange, ScenarioResult, ScenarioVariant
+)
+from app.application.services.feasibility import check_feasibility
+from app.application.services.local_repair import apply_change
+from app.application.services.optimizer_service import SolveControl
+from app.application.services.problem_instance import ProblemInstance
+from app.application.services.solver_executor import run_repair, run_solve, run_solve_streaming, run_sweep
+from app.application.services.solve_scheduler import SolverOverloadedError, get_solve_scheduler
+from app.application.services.result_cache import get_result_cache, request_fingerprint
+from app.core.config import settings
 from app.infrastructure.repositories.doctor_repository import DoctorRepository
-from app.api.deps import get_doctor_repo
+from app.infrastructure.repositories.job_repository import JobRepository
+from app.infrastructure.repositories.roster_repository import RosterRepository
+from app.api.deps import get_doctor_repo, get_job_repo, get_roster_repo
 
 router = APIRouter()
 
@@ -19,53 +35,507 @@ class RosterGenerationRequest(BaseModel):
     weight_cost: float = 1.0
     weight_preference: float = 2.0
 
-@router.post("/optimize", response_model=List[RosterSolution])
-async def generate_roster(
+    # Warm-start opcional: a escala anterior (inline) ou o id de uma escala gravada / job concluído
+    previous_roster: Optional[List[RosterSolution]] = None
+    previous_roster_id: Optional[str] = None
+
+    # Horizontes longos (trimestre/ano): resolve em janelas sobrepostas
+    rolling_horizon: Optional[RollingHorizonSettings] = None
+
+class ScenarioSweepRequest(BaseModel):
+    """Um conjunto de slots (médicos do banco) resolvido sob várias combinações de pesos / what-if"""
+    period_start: date
+    period_end: date
+    slots_to_fill: List[ShiftSlot]
+    # Pesos-base: a variante que omitir um peso herda o valor daqui
+    weight_cost: float = 1.0
+    weight_preference: float = 2.0
+    weight_fairness: float = 0.0
+    variants: List[ScenarioVariant] = Field(..., min_length=1)
+
+class RosterRepairRequest(RosterChange):
+    """Mudança a aplicar numa escala gravada + pesos do objetivo (os da geração não são gravados)"""
+    weight_cost: float = 1.0
+    weight_preference: float = 2.0
+
+class OptimizationJobStatus(BaseModel):
+    """Estado de um job assíncrono de otimização"""
+    job_id: str
+    status: JobStatusEnum
+    attempts: int = 0
+    error: Optional[str] = None
+    solver_status: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class StoredRosterSummary(BaseModel):
+    """Cabeçalho de uma escala gravada"""
+    roster_id: str
+    version: int
+    period_start: date
+    period_end: date
+    status: str
+    objective_value: Optional[float] = None
+    assignment_count: int = 0
+    source_job_id: Optional[str] = None
+    created_at: datetime
+
+INFEASIBLE_DETAIL = "Inviável (Infeasible). Não foi possível encontrar uma solução que respeite todas as regras rígidas. Tente adicionar mais médicos ou remover restrições."
+
+async def _resolve_previous_roster(
     request_data: RosterGenerationRequest,
-    doctor_repo: DoctorRepository = Depends(get_doctor_repo)
-):
-    """
-    Gera a escala otimizada baseada nos médicos cadastrados no banco
-    e nos Slots enviados na requisição.
-    """
-    
-    # 1. Buscar médicos disponíveis no banco de dados
-    # (Em um sistema real, filtraríamos apenas médicos ativos/válidos)
-    active_doctors = await doctor_repo.get_all_active_doctors()
+    job_repo: JobRepository,
+    roster_repo: RosterRepository
+) -> Optional[List[RosterSolution]]:
+    """Escala anterior para warm-start: inline, uma escala gravada ou um job concluído."""
+    if request_data.previous_roster is not None:
+        return request_data.previous_roster
+    if request_data.previous_roster_id is None:
+        return None
+
+    if await roster_repo.get(request_data.previous_roster_id) is not None:
+        return await roster_repo.get_assignments(request_data.previous_roster_id)
 
-    if not active_doctors:
+    job = await job_repo.get(request_data.previous_roster_id)
+    if job is None or job.status != JobStatusEnum.DONE.value:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Escala anterior {request_data.previous_roster_id} não encontrada ou não concluída."
+        )
+    return [RosterSolution(**item) for item in (job.result or [])]
+
+async def _build_optimization_request(
+    request_data: RosterGenerationRequest,
+    doctor_repo: DoctorRepository,
+    job_repo: JobRepository,
+    roster_repo: RosterRepository
+) -> OptimizationRequest:
+    """Junta os médicos do banco com os slots/pesos enviados pelo cliente."""
+    # Só entram médicos que podem cobrir ao menos um slot (filtro no banco, pelas
+    # tabelas normalizadas); os objetos vêm do snapshot em memória
+    active_doctors = await doctor_repo.get_eligible_doctors(request_data.slots_to_fill)
+
+    if not active_doctors and not await doctor_repo.get_active_doctors_snapshot():
         raise HTTPException(
             status_code=400, 
             detail="Não há médicos cadastrados para gerar a escala."
         )
 
-    # 2. Montar o Objeto de Domínio para o Motor de Otimização
-    optimization_request = OptimizationRequest(
+    return OptimizationRequest(
         period_start=request_data.period_start,
         period_end=request_data.period_end,
         doctors=active_doctors, # Injetamos os médicos do banco aqui
         slots_to_fill=request_data.slots_to_fill,
         weight_cost=request_data.weight_cost,
-        weight_preference=request_data.weight_preference
+        weight_preference=request_data.weight_preference,
+        previous_roster=await _resolve_previous_roster(request_data, job_repo, roster_repo),
+        rolling_horizon=request_data.rolling_horizon
     )
 
-    # 3. Executar o Serviço de Otimização
-    optimizer_service = RosterOptimizerService()
+def _infeasible_detail(infeasibility: Optional[InfeasibilityReport]):
+    """Mensagem padrão de inviabilidade + os motivos estruturados, quando o motor conseguiu explicar."""
+    if infeasibility is None or not infeasibility.issues:
+        return INFEASIBLE_DETAIL
+    return {"message": INFEASIBLE_DETAIL, "infeasibility": infeasibility.model_dump(mode='json')}
+
+def _job_status(job) -> OptimizationJobStatus:
+    return OptimizationJobStatus(
+        job_id=job.id,
+        status=job.status,
+        attempts=job.attempts,
+        error=job.error,
+        solver_status=job.solver_status,
+        created_at=job.created_at,
+        finished_at=job.finished_at
+    )
+
+def _roster_summary(roster) -> StoredRosterSummary:
+    return StoredRosterSummary(
+        roster_id=roster.id,
+        version=roster.version,
+        period_start=roster.period_start,
+        period_end=roster.period_end,
+        status=roster.status,
+        objective_value=roster.objective_value,
+        assignment_count=roster.assignment_count,
+        source_job_id=roster.source_job_id,
+        created_at=roster.created_at
+    )
+
+@router.post("/optimize", response_model=Union[List[RosterSolution], CompactRoster])
+async def generate_roster(
+    request_data: RosterGenerationRequest,
+    response: Response,
+    format: Literal["full", "compact"] = "full",
+    doctor_repo: DoctorRepository = Depends(get_doctor_repo),
+    job_repo: JobRepository = Depends(get_job_repo),
+    roster_repo: RosterRepository = Depends(get_roster_repo)
+):
+    """
+    Gera a escala otimizada baseada nos médicos cadastrados no banco
+    e nos Slots enviados na requisição.
+    Com warm-start, os headers X-Hint-* informam quanto da escala anterior foi mantido.
+    A escala é gravada como nova versão do período (headers X-Roster-Id / X-Roster-Version),
+    a menos que repita a última versão do mesmo request.
+    Com `format=compact` a resposta é colunar (CompactRoster): ids uma única vez e
+    índices por alocação, sem um objeto por plantão.
+    """
     
+    # 1-2. Buscar médicos no banco e montar o Objeto de Domínio para o Motor de Otimização
+    optimization_request = await _build_optimization_request(request_data, doctor_repo, job_repo, roster_repo)
+
+    # 3. Executar o Serviço de Otimização
     try:
-        # O cálculo é CPU-bound. Em alta escala, usaríamos Celery/BackgroundTasks.
-        # Para este MVP, rodamos direto (o solver é rápido para instâncias médias).
-        solutions = optimizer_service.solve(optimization_request)
+        # O cálculo é CPU-bound: roda num pool limitado (thread/processo) para
+        # não travar o event loop (/health, /doctors continuam respondendo).
+        # Pedidos idênticos (reload, retry, vários usuários) reaproveitam o cache
+        # ou aguardam o solve que já está em andamento.
+        if settings.RESULT_CACHE_ENABLED:
+            result = await get_result_cache().get_or_compute(
+                optimization_request, lambda: run_solve(optimization_request)
+            )
+        else:
+            result = await run_solve(optimization_request)
+    except SolverOverloadedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Motor de otimização sobrecarregado: {str(e)} Tente novamente em instantes.",
+            headers={"Retry-After": "5"}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro no motor de otimização: {str(e)}")
 
+    solutions = result.solutions
     if not solutions:
         raise HTTPException(
             status_code=422, # Unprocessable Entity
-            detail="Inviável (Infeasible). Não foi possível encontrar uma solução que respeite todas as regras rígidas. Tente adicionar mais médicos ou remover restrições."
+            detail=_infeasible_detail(result.infeasibility)
+        )
+
+    if result.hint is not None:
+        response.headers["X-Hint-Kept"] = str(result.hint.kept_assignments)
+        response.headers["X-Hint-Discarded"] = str(result.hint.discarded_assignments)
+        response.headers["X-Hint-Survival-Rate"] = str(result.hint.survival_rate)
+
+    # 4. Salvar a solução no banco (cabeçalho + alocações em lote).
+    # Mesmo request com a mesma escala da última versão (ex.: acerto no cache) não vira versão nova
+    roster = await roster_repo.save_solution(
+        optimization_request, result, request_fingerprint=request_fingerprint(optimization_request)
+    )
+    response.headers["X-Roster-Id"] = roster.id
+    response.headers["X-Roster-Version"] = str(roster.version)
+
+    if format == "compact":
+        return CompactRoster.from_solutions(solutions)
+    return solutions
+
+@router.post("/optimize/check", response_model=InfeasibilityReport)
+async def check_roster_feasibility(
+    request_data: RosterGenerationRequest,
+    doctor_repo: DoctorRepository = Depends(get_doctor_repo),
+    job_repo: JobRepository = Depends(get_job_repo),
+    roster_repo: RosterRepository = Depends(get_roster_repo)
+):
+    """
+    Só a pré-checagem polinomial (sem CP-SAT): cobertura por slot, slots simultâneos,
+    limite mensal e fluxo máximo. Lista vazia de issues não garante viabilidade.
+    """
+    optimization_request = await _build_optimization_request(request_data, doctor_repo, job_repo, roster_repo)
+    return await asyncio.to_thread(
+        lambda: check_feasibility(ProblemInstance.from_request(optimization_request))
+    )
+
+@router.post("/optimize/sweep", response_model=List[ScenarioResult])
+async def sweep_roster_scenarios(
+    sweep_data: ScenarioSweepRequest,
+    pareto_only: bool = False,
+    include_solutions: bool = False,
+    doctor_repo: DoctorRepository = Depends(get_doctor_repo)
+):
+    """
+    Resolve o mesmo conjunto de slots sob N variantes de pesos (e/ou what-if) de uma vez.
+    O modelo é compilado uma vez; as variantes rodam em paralelo em processos.
+    Cada resultado traz o objetivo decomposto (custo, preferências atendidas, desvio de
+    equidade) e se está na fronteira de Pareto (`pareto_only=true` devolve só essas).
+    As escalas só vêm na resposta com `include_solutions=true`; nada é gravado.
+    """
+    if len(sweep_data.variants) > settings.SOLVER_SWEEP_MAX_VARIANTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"No máximo {settings.SOLVER_SWEEP_MAX_VARIANTS} variantes por varredura."
         )
 
-    # 4. (Opcional) Salvar a solução no banco de dados aqui
-    # await roster_repo.save_solution(solutions)
+    # Médicos que cobrem os slots da base ou os adicionados por algum what-if
+    added_slots = [s for v in sweep_data.variants if v.change is not None for s in v.change.added_slots]
+    doctors = await doctor_repo.get_eligible_doctors(sweep_data.slots_to_fill + added_slots)
+    if not doctors and not await doctor_repo.get_active_doctors_snapshot():
+        raise HTTPException(status_code=400, detail="Não há médicos cadastrados para gerar a escala.")
+
+    optimization_request = OptimizationRequest(
+        period_start=sweep_data.period_start,
+        period_end=sweep_data.period_end,
+        doctors=doctors,
+        slots_to_fill=sweep_data.slots_to_fill,
+        weight_cost=sweep_data.weight_cost,
+        weight_preference=sweep_data.weight_preference,
+        weight_fairness=sweep_data.weight_fairness
+    )
+    # What-if inválido (slot inexistente, demanda negativa) é erro do cliente, não do motor
+    try:
+        for variant in sweep_data.variants:
+            if variant.change is not None:
+                apply_change(optimization_request, variant.change)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        results = await run_sweep(optimization_request, sweep_data.variants, include_solutions=include_solutions)
+    except SolverOverloadedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Motor de otimização sobrecarregado: {str(e)} Tente novamente em instantes.",
+            headers={"Retry-After": "5"}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro no motor de otimização: {str(e)}")
+
+    if pareto_only:
+        results = [r for r in results if r.pareto_optimal]
+    return results
+
+# --- Streaming de incumbentes (Server-Sent Events) ---
+
+# Solves em streaming ativos neste processo: stream_id -> controle de parada
+_active_streams: Dict[str, SolveControl] = {}
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/optimize/stream")
+async def stream_roster(
+    request_data: RosterGenerationRequest,
+    http_request: Request,
+    diff: bool = True,
+    doctor_repo: DoctorRepository = Depends(get_doctor_repo),
+    job_repo: JobRepository = Depends(get_job_repo),
+    roster_repo: RosterRepository = Depends(get_roster_repo)
+):
+    """
+    Igual ao /optimize, mas responde em text/event-stream:
+    - `started`: {stream_id} (use DELETE /optimize/stream/{stream_id} para parar)
+    - `solution`: cada incumbente melhorado (objetivo, bound, tempo e diff ou escala completa)
+    - `done`: resultado final (mesmo formato de OptimizationResult) ou `error`
+    Fechar a conexão também interrompe o solve.
+    O streaming sempre usa um modelo único (sem decomposição nem horizonte rolante):
+    `rolling_horizon` é recusado com 400 (use /optimize ou /optimize/async).
+    """
+    if request_data.rolling_horizon is not None:
+        raise HTTPException(
+            status_code=400,
+            detail="Horizonte rolante não é suportado no streaming; use /optimize ou /optimize/async."
+        )
+    optimization_request = await _build_optimization_request(request_data, doctor_repo, job_repo, roster_repo)
+
+    async def event_stream():
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        control = SolveControl()
+        stream_id = str(uuid.uuid4())
+        _active_streams[stream_id] = control
+
+        def on_solution(progress):
+            # Chamado na thread do solver: entrega ao event loop com segurança
+            loop.call_soon_threadsafe(queue.put_nowait, progress)
+
+        solve_task = asyncio.create_task(
+            run_solve_streaming(optimization_request, on_solution, control, diff=diff)
+        )
+        try:
+            yield _sse("started", {"stream_id": stream_id})
+            while not (solve_task.done() and queue.empty()):
+                try:
+                    progress = await asyncio.wait_for(queue.get(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    if await http_request.is_disconnected():
+                        control.stop()
+                    continue
+                yield _sse("solution", progress.model_dump(mode='json'))
+
+            try:
+                result = solve_task.result()
+            except SolverOverloadedError as e:
+                yield _sse("error", {"status_code": 503, "detail": str(e)})
+            except Exception as e:
+                yield _sse("error", {"status_code": 500, "detail": f"Erro no motor de otimização: {str(e)}"})
+            else:
+                yield _sse("done", result.model_dump(mode='json'))
+        finally:
+            control.stop()
+            _active_streams.pop(stream_id, None)
+            if not solve_task.done():
+                solve_task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.delete("/optimize/stream/{stream_id}", status_code=status.HTTP_202_ACCEPTED)
+async def stop_roster_stream(stream_id: str):
+    """Encerra a busca de um stream ativo; o evento `done` traz o melhor incumbente até aqui."""
+    control = _active_streams.get(stream_id)
+    if control is None:
+        raise HTTPException(status_code=404, detail="Stream não encontrado ou já finalizado.")
+    control.stop()
+    return {"stream_id": stream_id, "stopping": True}
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats():
+    """Profundidade da fila, tempos de espera e núcleos em uso pelo solver."""
+    return get_solve_scheduler().stats()
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Ocupação e taxa de acerto do cache de resultados."""
+    return get_result_cache().stats()
+
+# --- Otimização Assíncrona (Jobs persistidos + workers em scripts/roster_worker.py) ---
+
+@router.post("/optimize/async", response_model=OptimizationJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def enqueue_roster_job(
+    request_data: RosterGenerationRequest,
+    doctor_repo: DoctorRepository = Depends(get_doctor_repo),
+    job_repo: JobRepository = Depends(get_job_repo),
+    roster_repo: RosterRepository = Depends(get_roster_repo)
+):
+    """
+    Registra um job de otimização e retorna imediatamente o job_id.
+    O solve é feito por um worker (scripts/roster_worker.py) que lê a fila do banco.
+    """
+    optimization_request = await _build_optimization_request(request_data, doctor_repo, job_repo, roster_repo)
+    job = await job_repo.enqueue(optimization_request)
+    return _job_status(job)
+
+@router.get("/jobs/{job_id}", response_model=OptimizationJobStatus)
+async def get_roster_job(
+    job_id: str,
+    job_repo: JobRepository = Depends(get_job_repo)
+):
+    """Consulta o estado de um job de otimização."""
+    job = await job_repo.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return _job_status(job)
+
+@router.get("/jobs/{job_id}/result", response_model=List[RosterSolution])
+async def get_roster_job_result(
+    job_id: str,
+    job_repo: JobRepository = Depends(get_job_repo)
+):
+    """Retorna a escala de um job concluído (mesma semântica do /optimize síncrono)."""
+    job = await job_repo.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    if job.status == JobStatusEnum.FAILED.value:
+        raise HTTPException(status_code=500, detail=f"Erro no motor de otimização: {job.error}")
+    if job.status != JobStatusEnum.DONE.value:
+        raise HTTPException(status_code=409, detail=f"Job ainda não concluído (status: {job.status}).")
+    if not job.result:
+        infeasibility = InfeasibilityReport(**job.infeasibility) if job.infeasibility else None
+        raise HTTPException(status_code=422, detail=_infeasible_detail(infeasibility))
+    return [RosterSolution(**item) for item in job.result]
+
+
+# --- Escalas gravadas (consulta sem resolver de novo) ---
+
+@router.get("/rosters", response_model=List[StoredRosterSummary])
+async def list_stored_rosters(
+    period_start: Optional[date] = None,
+    period_end: Optional[date] = None,
+    limit: int = 20,
+    roster_repo: RosterRepository = Depends(get_roster_repo)
+):
+    """Versões gravadas (mais recentes primeiro), opcionalmente de um período."""
+    rosters = await roster_repo.list_versions(period_start, period_end, limit=limit)
+    return [_roster_summary(r) for r in rosters]
+
+@router.get("/rosters/{roster_id}", response_model=StoredRosterSummary)
+async def get_stored_roster(
+    roster_id: str,
+    roster_repo: RosterRepository = Depends(get_roster_repo)
+):
+    """Cabeçalho de uma escala gravada."""
+    roster = await roster_repo.get(roster_id)
+    if roster is None:
+        raise HTTPException(status_code=404, detail="Escala não encontrada.")
+    return _roster_summary(roster)
+
+@router.get("/rosters/{roster_id}/assignments", response_model=List[RosterSolution])
+async def get_stored_roster_assignments(
+    roster_id: str,
+    doctor_id: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    roster_repo: RosterRepository = Depends(get_roster_repo)
+):
+    """Alocações de uma escala gravada, opcionalmente de um médico e/ou intervalo de datas."""
+    if await roster_repo.get(roster_id) is None:
+        raise HTTPException(status_code=404, detail="Escala não encontrada.")
+    return await roster_repo.get_assignments(roster_id, doctor_id=doctor_id, start=start, end=end)
+
+@router.post("/rosters/{roster_id}/repair", response_model=OptimizationResult)
+async def repair_stored_roster(
+    roster_id: str,
+    repair_data: RosterRepairRequest,
+    response: Response,
+    doctor_repo: DoctorRepository = Depends(get_doctor_repo),
+    roster_repo: RosterRepository = Depends(get_roster_repo)
+):
+    """
+    Reparo local: aplica a mudança (indisponibilidade, slot novo/removido, demanda)
+    e resolve só a vizinhança afetada, mantendo o resto da escala travado.
+    O relatório `repair` traz o tamanho do modelo e a rotatividade (added/removed).
+    A escala reparada é gravada como nova versão do período (headers X-Roster-Id / X-Roster-Version).
+    """
+    roster = await roster_repo.get(roster_id)
+    if roster is None:
+        raise HTTPException(status_code=404, detail="Escala não encontrada.")
+    current = await roster_repo.get_assignments(roster_id)
+    slots = await roster_repo.get_slots(roster_id)
+    # Médicos do snapshot que cobrem os slots atuais ou os novos
+    doctors = await doctor_repo.get_eligible_doctors(slots + repair_data.added_slots)
+
+    try:
+        optimization_request = apply_change(
+            OptimizationRequest(
+                period_start=roster.period_start,
+                period_end=roster.period_end,
+                doctors=doctors,
+                slots_to_fill=slots,
+                weight_cost=repair_data.weight_cost,
+                weight_preference=repair_data.weight_preference
+            ),
+            repair_data
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        result = await run_repair(optimization_request, current, repair_data.neighborhood_days)
+    except SolverOverloadedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Motor de otimização sobrecarregado: {str(e)} Tente novamente em instantes.",
+            headers={"Retry-After": "5"}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro no motor de otimização: {str(e)}")
+
+    if not result.solutions:
+        raise HTTPException(status_code=422, detail=_infeasible_detail(result.infeasibility))
 
-    return solutions
\ No newline at end of file
+    stored = await roster_repo.save_solution(optimization_request, result)
+    response.headers["X-Roster-Id"] = stored.id
+    response.headers["X-Roster-Version"] = str(stored.version)
+    return result
@@ -0,0 +1,170 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.domain.models import OptimizationRequest, OptimizationResult
+from app.application.services.feasibility import check_feasibility
+from app.application.services.optimizer_service import (
+    InstanceSolution, RosterOptimizerService, _hint_report, merge_engines
+)
+from app.application.services.presolve import merge_reports
+from app.application.services.problem_instance import ProblemInstance
+
+# Pool de processos para os componentes (criado sob demanda)
+_component_pool: Optional[ProcessPoolExecutor] = None
+
+
+def component_indices(instance: ProblemInstance) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Componentes conexos do grafo bipartido de elegibilidade (médico -- slot),
+    como pares (índices de médicos, índices de slots) em ordem crescente.
+
+    Todas as restrições que ligam slots diferentes passam por um médico (H4
+    choque de horário, H5 limite mensal), e um médico elegível para dois slots
+    os coloca no mesmo componente; então os subproblemas não compartilham
+    nenhuma restrição.
+
+    - Slots sem nenhum médico elegível viram um componente próprio (inviável).
+    - Médicos sem nenhum slot elegível ficam de fora (não afetam o resultado).
+    """
+    n_doctors, n_slots = instance.n_doctors, instance.n_slots
+    pair_doctor, pair_slot = instance.pair_doctor, instance.pair_slot
+
+    # Propagação do menor rótulo pelas arestas até estabilizar:
+    # médicos começam com rótulo 0..D-1 e slots com D..D+S-1
+    doctor_label = np.arange(n_doctors, dtype=np.int64)
+    slot_label = np.arange(n_doctors, n_doctors + n_slots, dtype=np.int64)
+    while len(pair_doctor):
+        new_slot = slot_label.copy()
+        np.minimum.at(new_slot, pair_slot, doctor_label[pair_doctor])
+        new_doctor = doctor_label.copy()
+        np.minimum.at(new_doctor, pair_doctor, new_slot[pair_slot])
+        if np.array_equal(new_slot, slot_label) and np.array_equal(new_doctor, doctor_label):
+            break
+        slot_label, doctor_label = new_slot, new_doctor
+
+    # Um componente por rótulo de slot, na ordem do primeiro slot de cada um
+    labels, first = np.unique(slot_label, return_index=True)
+    components = []
+    for label in labels[np.argsort(first)].tolist():
+        components.append((np.nonzero(doctor_label == label)[0], np.nonzero(slot_label == label)[0]))
+    return components
+
+
+def split_instance(instance: ProblemInstance) -> List[Tuple[ProblemInstance, np.ndarray]]:
+    """
+    Subinstâncias independentes + o mapa de pares de cada uma para a instância original.
+    Com equidade ligada, todas recebem a média do problema completo em
+    `fairness_target`, para cada componente otimizar o mesmo desvio do modelo
+    único. O objetivo final é recalculado na instância completa (médicos sem
+    slot elegível ficam fora dos componentes, mas o desvio deles também conta).
+    """
+    if instance.weight_fairness > 0:
+        instance = instance.replace(fairness_target=instance.default_fairness_target())
+    return [instance.subset(doctor_idx, slot_idx) for doctor_idx, slot_idx in component_indices(instance)]
+
+
+def _solve_component(sub_instance: ProblemInstance, num_workers: int) -> InstanceSolution:
+    """Ponto de entrada no pool de processos (top-level para ser picklable; a instância só carrega arrays)."""
+    return RosterOptimizerService().solve_instance(sub_instance, num_workers=num_workers)
+
+
+def component_pool_size() -> int:
+    return settings.SOLVER_DECOMPOSITION_PROCESSES or os.cpu_count() or 1
+
+
+def get_component_pool() -> ProcessPoolExecutor:
+    """Pool de processos dos componentes (também usado pela varredura de pesos)."""
+    global _component_pool
+    if _component_pool is None:
+        _component_pool = ProcessPoolExecutor(max_workers=component_pool_size())
+    return _component_pool
+
+
+def shutdown_component_pool() -> None:
+    global _component_pool
+    if _component_pool is not None:
+        _component_pool.shutdown(wait=False, cancel_futures=True)
+        _component_pool = None
+
+
+class DecomposedOptimizerService:
+    """
+    Estágio anterior ao RosterOptimizerService: resolve cada componente conexo
+    do grafo de elegibilidade como um modelo CP-SAT próprio, em paralelo, e junta
+    as escalas em uma única lista de RosterSolution.
+    """
+
+    def __init__(self, parallel: Optional[bool] = None):
+        # parallel=False resolve os componentes em sequência no processo atual
+        self.parallel = parallel if parallel is not None else component_pool_size() > 1
+
+    def solve_detailed(self, request: OptimizationRequest, num_workers: Optional[int] = None) -> OptimizationResult:
+        instance = ProblemInstance.from_request(request)
+        return self.solve_instance(instance, num_workers=num_workers).to_result(instance)
+
+    def solve_instance(self, instance: ProblemInstance, num_workers: Optional[int] = None) -> InstanceSolution:
+        # Alocação travada em par inelegível não pertence a nenhum componente:
+        # o modelo único é quem reporta a inviabilidade corretamente
+        if instance.fixed_missing:
+            return RosterOptimizerService().solve_instance(instance, num_workers=num_workers)
+        parts = split_instance(instance)
+        if len(parts) <= 1:
+            return RosterOptimizerService().solve_instance(instance, num_workers=num_workers)
+
+        # Pré-checagem no problema inteiro (slot sem médico elegível, capacidade etc.):
+        # inviável sem precisar resolver nenhum componente
+        precheck = check_feasibility(instance)
+        if precheck.issues:
+            return InstanceSolution(status="INFEASIBLE", infeasibility=precheck)
+
+        sub_instances = [sub for sub, _ in parts]
+        total_workers = num_workers or 8
+        if self.parallel:
+            pool = get_component_pool()
+            concurrent = min(len(sub_instances), component_pool_size())
+            per_component = max(1, total_workers // concurrent)
+            results = list(pool.map(_solve_component, sub_instances, [per_component] * len(sub_instances)))
+        else:
+            service = RosterOptimizerService()
+            results = [service.solve_instance(sub, num_workers=total_workers) for sub in sub_instances]
+
+        return self._merge(instance, [pair_map for _, pair_map in parts], results)
+
+    @staticmethod
+    def _merge(
+        instance: ProblemInstance,
+        pair_maps: List[np.ndarray],
+        results: List[InstanceSolution]
+    ) -> InstanceSolution:
+        """Junta os resultados; um componente inviável torna o problema todo inviável."""
+        statuses = {r.status for r in results}
+        wall_time = max(r.wall_time_seconds for r in results)
+
+        if not statuses <= {"OPTIMAL", "FEASIBLE"}:
+            failed = next((s for s in ("INFEASIBLE", "MODEL_INVALID") if s in statuses), "UNKNOWN")
+            # Explicação do primeiro componente inviável (os ids já são os do problema completo)
+            infeasibility = next((r.infeasibility for r in results if r.infeasibility is not None), None)
+            return InstanceSolution(
+                status=failed,
+                wall_time_seconds=wall_time,
+                hint=_hint_report(instance, np.zeros(0, dtype=np.int64)),
+                infeasibility=infeasibility
+            )
+
+        # Pares da instância original já estão ordenados por médico e depois por slot:
+        # ordenar os índices reproduz a ordem da versão monolítica
+        pairs = np.sort(np.concatenate([pair_map[r.pairs] for pair_map, r in zip(pair_maps, results)]))
+
+        return InstanceSolution(
+            status="OPTIMAL" if statuses == {"OPTIMAL"} else "FEASIBLE",
+            pairs=pairs,
+            objective_value=instance.objective_value(pairs),
+            wall_time_seconds=wall_time,
+            hint=_hint_report(instance, pairs),
+            engine=merge_engines(r.engine for r in results),
+            presolve=merge_reports(r.presolve for r in results)
+        )
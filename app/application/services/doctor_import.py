@@ -0,0 +1,187 @@
+import codecs
+import csv
+import json
+import time
+import uuid
+from typing import AsyncIterable, AsyncIterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+
+from app.domain.models import Doctor, DoctorImportReport, ImportRowError
+from app.infrastructure.repositories.doctor_repository import DoctorRepository
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# Colunas do CSV (cabeçalho obrigatório). Listas usam "|" como separador:
+# specialties = "clinica_geral|pediatria", unavailable_dates = "2024-01-05|2024-01-06"
+CSV_ATTRIBUTE_FIELDS = ("seniority_level", "is_preceptor", "cost_per_hour")
+CSV_AVAILABILITY_FIELDS = ("max_shifts_per_month", "unavailable_dates", "preferred_dates", "blocked_weekdays")
+CSV_LIST_FIELDS = {"specialties", "unavailable_dates", "preferred_dates", "blocked_weekdays"}
+CSV_LIST_SEPARATOR = "|"
+
+
+async def iter_text_lines(chunks: AsyncIterable[bytes], encoding: str = "utf-8-sig") -> AsyncIterator[str]:
+    """Converte um fluxo de bytes (corpo HTTP, arquivo) em linhas, sem carregar tudo na memória."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer.strip():
+        yield buffer.rstrip("\r")
+
+
+def _csv_row_to_payload(row: dict) -> dict:
+    """Linha plana do CSV -> estrutura aninhada do Doctor (campos vazios usam o default do modelo)."""
+    values = {}
+    for key, raw in row.items():
+        if key is None or raw is None:
+            continue
+        raw = raw.strip()
+        if raw == "":
+            continue
+        values[key.strip()] = [v.strip() for v in raw.split(CSV_LIST_SEPARATOR) if v.strip()] if key.strip() in CSV_LIST_FIELDS else raw
+
+    return {
+        "id": values.get("id") or str(uuid.uuid4()),
+        "name": values.get("name"),
+        "crm": values.get("crm"),
+        "specialties": values.get("specialties", []),
+        "attributes": {k: values[k] for k in CSV_ATTRIBUTE_FIELDS if k in values},
+        "availability": {k: values[k] for k in CSV_AVAILABILITY_FIELDS if k in values},
+    }
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc']) or 'linha'}: {e['msg']}" for e in error.errors()
+    )
+
+
+async def parse_doctor_rows(
+    lines: AsyncIterable[str], fmt: str
+) -> AsyncIterator[Tuple[int, Optional[Doctor], Optional[str], Optional[str]]]:
+    """
+    Valida linha a linha com o modelo Doctor.
+    Produz (número_da_linha, doctor, crm, erro); doctor é None quando a linha é inválida.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt}. Use um de {IMPORT_FORMATS}.")
+
+    header: Optional[List[str]] = None
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+
+        if fmt == "csv" and header is None:
+            # Cabeçalho inválido invalida o arquivo inteiro
+            header = [f.strip() for f in next(csv.reader([line]))]
+            missing = {"name", "crm", "specialties", "cost_per_hour"} - set(header)
+            if missing:
+                raise ValueError(f"Cabeçalho do CSV sem as colunas: {', '.join(sorted(missing))}")
+            continue
+
+        crm = None
+        try:
+            if fmt == "jsonl":
+                payload = json.loads(line)
+                if not isinstance(payload, dict):
+                    raise ValueError("cada linha deve ser um objeto JSON")
+                payload.setdefault("id", str(uuid.uuid4()))
+            else:
+                payload = _csv_row_to_payload(dict(zip(header, next(csv.reader([line])))))
+            crm = payload.get("crm")
+            yield line_no, Doctor(**payload), crm, None
+        except ValidationError as e:
+            yield line_no, None, crm, _format_validation_error(e)
+        except json.JSONDecodeError as e:
+            yield line_no, None, None, f"JSON inválido: {e.msg}"
+        except ValueError as e:
+            yield line_no, None, crm, str(e)
+
+
+class DoctorBulkImporter:
+    """
+    Importação em lote de médicos (onboarding de hospitais).
+
+    As linhas são validadas em fluxo e gravadas em lotes de `batch_size`: cada lote
+    faz uma consulta de CRMs/ids já existentes (índices únicos) e um único commit via
+    create_many. Duplicados e linhas inválidas são reportados por linha, sem abortar
+    o resto do arquivo.
+    """
+
+    def __init__(self, repo: DoctorRepository, batch_size: int = 1000, max_reported_errors: int = 100):
+        self.repo = repo
+        self.batch_size = max(1, batch_size)
+        self.max_reported_errors = max_reported_errors
+
+    async def run(self, lines: AsyncIterable[str], fmt: str) -> DoctorImportReport:
+        started = time.perf_counter()
+        report = DoctorImportReport()
+        seen_ids: Set[str] = set()
+        seen_crms: Set[str] = set()
+        batch: List[Tuple[int, Doctor]] = []
+
+        async for line_no, doctor, crm, error in parse_doctor_rows(lines, fmt):
+            report.total_rows += 1
+            if doctor is None:
+                report.invalid += 1
+                self._report_error(report, line_no, crm, error)
+                continue
+            # Repetido dentro do próprio arquivo: a primeira ocorrência vence
+            if doctor.crm in seen_crms or doctor.id in seen_ids:
+                report.duplicates += 1
+                self._report_error(report, line_no, doctor.crm, "CRM ou id repetido no arquivo")
+                continue
+            seen_crms.add(doctor.crm)
+            seen_ids.add(doctor.id)
+
+            batch.append((line_no, doctor))
+            if len(batch) >= self.batch_size:
+                await self._flush(batch, report)
+                batch = []
+
+        if batch:
+            await self._flush(batch, report)
+
+        report.elapsed_seconds = round(time.perf_counter() - started, 3)
+        print(f"📥 Importação: {report.imported}/{report.total_rows} médicos em {report.batches} lotes "
+              f"({report.duplicates} duplicados, {report.invalid} inválidos) | {report.elapsed_seconds:.2f}s")
+        return report
+
+    async def _flush(self, batch: List[Tuple[int, Doctor]], report: DoctorImportReport) -> None:
+        report.batches += 1
+        existing_ids, existing_crms = await self.repo.get_existing_keys(
+            [d.id for _, d in batch], [d.crm for _, d in batch]
+        )
+
+        new_rows = []
+        for line_no, doctor in batch:
+            if doctor.crm in existing_crms or doctor.id in existing_ids:
+                report.duplicates += 1
+                self._report_error(report, line_no, doctor.crm, "CRM ou id já cadastrado")
+            else:
+                new_rows.append((line_no, doctor))
+
+        try:
+            report.imported += await self.repo.create_many_from_domain([d for _, d in new_rows])
+        except IntegrityError:
+            # Outra escrita concorrente inseriu algum desses CRMs entre a checagem e o commit:
+            # refaz o lote linha a linha para salvar o resto
+            for line_no, doctor in new_rows:
+                try:
+                    await self.repo.create_from_domain(doctor)
+                    report.imported += 1
+                except IntegrityError:
+                    report.duplicates += 1
+                    self._report_error(report, line_no, doctor.crm, "CRM ou id já cadastrado")
+
+    def _report_error(self, report: DoctorImportReport, line_no: int, crm: Optional[str], error: str) -> None:
+        if len(report.errors) < self.max_reported_errors:
+            report.errors.append(ImportRowError(line=line_no, crm=crm, error=error))
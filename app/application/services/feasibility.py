@@ -0,0 +1,168 @@
+import time
+from typing import List, Optional
+
+import numpy as np
+from ortools.graph.python import max_flow
+
+from app.domain.models import InfeasibilityIssue, InfeasibilityReport
+from app.application.services.problem_instance import ProblemInstance, overlap_cliques, specialty_names
+
+
+def slot_issue(
+    instance: ProblemInstance,
+    kind: str,
+    message: str,
+    slots: np.ndarray,
+    required: Optional[int] = None,
+    available: Optional[int] = None,
+    doctors: Optional[np.ndarray] = None
+) -> InfeasibilityIssue:
+    """Descreve um conjunto de slots (ids, datas e especialidades envolvidas)."""
+    slots = np.asarray(slots, dtype=np.int64)
+    mask = int(np.bitwise_or.reduce(instance.slot_mask[slots])) if len(slots) else 0
+    return InfeasibilityIssue(
+        kind=kind,
+        message=message,
+        slot_ids=[instance.slot_ids[j] for j in slots.tolist()],
+        dates=sorted({instance.slot_date(j) for j in slots.tolist()}),
+        specialties=specialty_names(mask),
+        doctor_ids=[instance.doctor_ids[i] for i in doctors.tolist()] if doctors is not None else [],
+        required=required,
+        available=available
+    )
+
+
+def check_feasibility(instance: ProblemInstance) -> InfeasibilityReport:
+    """
+    Pré-checagem polinomial, antes do CP-SAT. Cada regra é uma condição necessária
+    (relaxação do modelo), então qualquer issue prova a inviabilidade:
+
+    1. Cobertura por slot: médicos elegíveis < required_count (H1 + H2 + H3).
+    2. Demanda simultânea: em cada clique de slots sobrepostos (mesmo horário, H4),
+       soma de required_count > médicos distintos elegíveis para ela. É a versão
+       correta de "demanda do dia vs médicos do dia", já que um médico pode
+       cobrir manhã e tarde no mesmo dia.
+    3. Capacidade mensal: demanda do mês > soma de min(limite restante, slots
+       elegíveis no mês) dos médicos (H5).
+    4. Fluxo máximo: médico/mês -> slot -> destino, com as capacidades de H1/H5.
+       Se o fluxo não cobre a demanda total, o corte mínimo aponta o conjunto
+       de slots (Hall) que os médicos não conseguem cobrir. Só roda quando as
+       regras 1-3 passam, porque as inclui.
+
+    Relatório vazio não garante viabilidade (H4 entra só pelas cliques).
+    """
+    started = time.perf_counter()
+    issues: List[InfeasibilityIssue] = []
+
+    if instance.fixed_missing:
+        issues.append(InfeasibilityIssue(
+            kind="fixed_assignment",
+            message=f"{instance.fixed_missing} alocação(ões) travada(s) com médico inelegível ou slot fora do período."
+        ))
+
+    eligible_count = np.bincount(instance.pair_slot, minlength=instance.n_slots)
+    # 1. Cobertura por slot
+    for j in np.nonzero(eligible_count < instance.slot_required)[0].tolist():
+        required, available = int(instance.slot_required[j]), int(eligible_count[j])
+        issues.append(slot_issue(
+            instance, "slot_coverage",
+            f"Slot {instance.slot_ids[j]} precisa de {required} médico(s) e só {available} é(são) elegível(is).",
+            np.array([j]), required, available
+        ))
+
+    # 2. Demanda simultânea (cliques de H4)
+    if instance.n_slots:
+        by_slot_order, by_slot_bounds = instance.slot_pairs()
+        for clique in overlap_cliques(instance.slot_start, instance.slot_end):
+            required = int(instance.slot_required[clique].sum())
+            doctors = np.unique(np.concatenate([
+                instance.pair_doctor[by_slot_order[by_slot_bounds[j]:by_slot_bounds[j + 1]]] for j in clique.tolist()
+            ]))
+            if required > len(doctors):
+                issues.append(slot_issue(
+                    instance, "overlap_demand",
+                    f"{len(clique)} slots simultâneos pedem {required} médicos, mas só {len(doctors)} "
+                    f"médico(s) distinto(s) pode(m) cobri-los.",
+                    np.sort(clique), required, len(doctors), doctors
+                ))
+
+    # 3. Capacidade mensal (H5)
+    remaining = np.clip(instance.max_shifts[:, None] - instance.consumed, 0, None)
+    n_months = len(instance.months)
+    eligible_per_month = np.zeros((instance.n_doctors, n_months), dtype=np.int64)
+    np.add.at(eligible_per_month, (instance.pair_doctor, instance.slot_month[instance.pair_slot]), 1)
+    capacity = np.minimum(remaining, eligible_per_month).sum(axis=0)
+    demand = np.bincount(instance.slot_month, weights=instance.slot_required, minlength=n_months).astype(np.int64)
+    for month in np.nonzero(demand > capacity)[0].tolist():
+        issues.append(slot_issue(
+            instance, "monthly_capacity",
+            f"Mês {instance.months[month]}: demanda de {int(demand[month])} plantões, mas o limite mensal "
+            f"dos médicos elegíveis soma {int(capacity[month])}.",
+            np.nonzero(instance.slot_month == month)[0], int(demand[month]), int(capacity[month])
+        ))
+
+    # 4. Fluxo máximo (cobertura de Hall)
+    if not issues:
+        flow_issue = _flow_coverage(instance, remaining)
+        if flow_issue is not None:
+            issues.append(flow_issue)
+
+    report = InfeasibilityReport(
+        source="precheck", issues=issues, elapsed_ms=round((time.perf_counter() - started) * 1000, 3)
+    )
+    if issues:
+        print(f"🚫 Pré-checagem: {len(issues)} motivo(s) de inviabilidade em {report.elapsed_ms:.1f}ms")
+    return report
+
+
+def _flow_coverage(instance: ProblemInstance, remaining: np.ndarray) -> Optional[InfeasibilityIssue]:
+    """Rede origem -> médico/mês (limite H5) -> slot (par elegível) -> destino (required_count)."""
+    total_required = int(instance.slot_required.sum())
+    if total_required == 0:
+        return None
+
+    n_months = len(instance.months)
+    pair_group = instance.pair_doctor.astype(np.int64) * n_months + instance.slot_month[instance.pair_slot]
+    groups, pair_group_idx = np.unique(pair_group, return_inverse=True)
+    # Nós: 0 = origem, 1..G = médico/mês, G+1..G+S = slots, G+S+1 = destino
+    n_groups = len(groups)
+    source, sink = 0, n_groups + instance.n_slots + 1
+    slot_node = n_groups + 1 + np.arange(instance.n_slots, dtype=np.int64)
+
+    tails = np.concatenate([
+        np.zeros(n_groups, dtype=np.int64),
+        1 + pair_group_idx.astype(np.int64),
+        slot_node,
+    ])
+    heads = np.concatenate([
+        1 + np.arange(n_groups, dtype=np.int64),
+        slot_node[instance.pair_slot],
+        np.full(instance.n_slots, sink, dtype=np.int64),
+    ])
+    capacities = np.concatenate([
+        remaining[groups // n_months, groups % n_months],
+        np.ones(instance.n_pairs, dtype=np.int64),
+        instance.slot_required,
+    ])
+
+    network = max_flow.SimpleMaxFlow()
+    network.add_arcs_with_capacity(tails, heads, capacities)
+    if network.solve(source, sink) != network.OPTIMAL:
+        return None
+    covered = int(network.optimal_flow())
+    if covered >= total_required:
+        return None
+
+    # Slots do lado do destino no corte mínimo: demanda maior que a oferta dos seus vizinhos
+    source_side = np.zeros(sink + 1, dtype=bool)
+    source_side[np.asarray(network.get_source_side_min_cut(), dtype=np.int64)] = True
+    hall_slots = np.nonzero(~source_side[slot_node] & (instance.slot_required > 0))[0]
+    required = int(instance.slot_required[hall_slots].sum())
+    available = required - (total_required - covered)
+    doctors = np.unique(instance.pair_doctor[np.isin(instance.pair_slot, hall_slots)])
+    return slot_issue(
+        instance, "flow_coverage",
+        f"{len(hall_slots)} slots pedem {required} plantões, mas os médicos elegíveis para eles só "
+        f"conseguem cobrir {available} (limite mensal e elegibilidade).",
+        hall_slots, required, available, doctors
+    )
@@ -0,0 +1,106 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from ortools.graph.python import min_cost_flow
+
+from app.application.services.problem_instance import ProblemInstance, overlap_cliques
+
+
+def has_overlap_conflicts(instance: ProblemInstance, pairs: Optional[np.ndarray] = None) -> bool:
+    """
+    True se algum médico tem dois pares (entre `pairs`, ou entre todos os elegíveis)
+    em slots que colidem no tempo, ou seja, se H4 restringe alguma coisa.
+    """
+    if pairs is None:
+        pairs = np.arange(instance.n_pairs)
+    doctors, slots = instance.pair_doctor[pairs], instance.pair_slot[pairs]
+    in_clique = np.zeros(instance.n_slots, dtype=bool)
+    for clique in overlap_cliques(instance.slot_start, instance.slot_end):
+        in_clique[:] = False
+        in_clique[clique] = True
+        members = doctors[in_clique[slots]]
+        if len(members) != len(np.unique(members)):
+            return True
+    return False
+
+
+def solve_min_cost_flow(instance: ProblemInstance) -> Optional[Tuple[np.ndarray, float]]:
+    """
+    Resolve a relaxação de transporte da escala com SimpleMinCostFlow:
+
+        origem -> médico/mês (limite H5 restante) -> slot (par elegível, custo = -coeficiente)
+               -> destino (required_count, H1)
+
+    Sem equidade, H1/H2/H3/H5 e o objetivo linear formam exatamente esse problema
+    de transporte, que tem ótimo inteiro em tempo polinomial. H4 fica de fora; se
+    o fluxo ótimo não colocar ninguém em dois slots simultâneos (sempre verdade
+    quando não há colisões possíveis), ele é ótimo também para o modelo completo.
+
+    Devolve (pares escolhidos, valor do objetivo) ou None quando o atalho não vale
+    (equidade ligada, fluxo inviável ou solução violando H4): o CP-SAT decide.
+    """
+    if instance.weight_fairness > 0:
+        return None
+
+    n_months = len(instance.months)
+    n_slots = instance.n_slots
+    coeffs = instance.pair_coeffs()
+
+    # Alocações travadas saem da rede já pagas: descontam da demanda do slot e do limite do médico
+    fixed = np.zeros(instance.n_pairs, dtype=bool)
+    fixed[instance.fixed_pairs] = True
+    remaining = instance.max_shifts[:, None] - instance.consumed
+    np.subtract.at(
+        remaining,
+        (instance.pair_doctor[fixed], instance.slot_month[instance.pair_slot[fixed]]),
+        1
+    )
+    demand = instance.slot_required - np.bincount(instance.pair_slot[fixed], minlength=n_slots)
+    if instance.fixed_missing or (demand < 0).any():
+        return None
+
+    free = np.nonzero(~fixed)[0]
+    pair_group = (
+        instance.pair_doctor[free].astype(np.int64) * n_months + instance.slot_month[instance.pair_slot[free]]
+    )
+    groups, pair_group_idx = np.unique(pair_group, return_inverse=True)
+    n_groups = len(groups)
+    # Nós: 0 = origem, 1..G = médico/mês, G+1..G+S = slots, G+S+1 = destino
+    source, sink = 0, n_groups + n_slots + 1
+    slot_node = n_groups + 1 + np.arange(n_slots, dtype=np.int64)
+
+    tails = np.concatenate([
+        np.zeros(n_groups, dtype=np.int64),
+        1 + pair_group_idx.astype(np.int64),
+        slot_node,
+    ])
+    heads = np.concatenate([
+        1 + np.arange(n_groups, dtype=np.int64),
+        slot_node[instance.pair_slot[free]],
+        np.full(n_slots, sink, dtype=np.int64),
+    ])
+    capacities = np.concatenate([
+        np.clip(remaining[groups // n_months, groups % n_months], 0, None),
+        np.ones(len(free), dtype=np.int64),
+        demand,
+    ])
+    costs = np.concatenate([
+        np.zeros(n_groups, dtype=np.int64),
+        -coeffs[free],
+        np.zeros(n_slots, dtype=np.int64),
+    ])
+
+    total = int(demand.sum())
+    network = min_cost_flow.SimpleMinCostFlow()
+    network.add_arcs_with_capacity_and_unit_cost(tails, heads, capacities, costs)
+    network.set_nodes_supplies(np.array([source, sink]), np.array([total, -total]))
+    if network.solve() != network.OPTIMAL:
+        return None
+
+    pair_arcs = n_groups + np.arange(len(free), dtype=np.int64)
+    flows = network.flows(pair_arcs)
+    chosen = np.sort(np.concatenate([free[flows > 0], np.nonzero(fixed)[0]]))
+    if has_overlap_conflicts(instance, chosen):
+        return None
+    return chosen, float(coeffs[chosen].sum())
+
@@ -0,0 +1,88 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from app.application.services.problem_instance import ProblemInstance
+
+
+def greedy_roster(instance: ProblemInstance) -> Tuple[np.ndarray, bool]:
+    """
+    Heurística construtiva: preenche primeiro os slots mais difíceis (menor folga
+    entre médicos elegíveis e vagas, depois menos elegíveis) e, em cada slot,
+    escolhe os médicos de melhor coeficiente no objetivo que ainda cabem.
+
+    H2/H3 vêm da elegibilidade dos pares; H4 (choque de horário) e H5 (limite
+    mensal, descontando plantões consumidos) são checadas a cada escolha. As
+    alocações travadas entram antes de tudo. Com equidade ligada, quem já atingiu
+    a média ideal perde prioridade.
+
+    Devolve (pares escolhidos em ordem crescente, completa?). Uma escala
+    incompleta (alguma vaga sem médico, ou trava impossível) ainda serve de hint
+    para o CP-SAT, mas não como resposta.
+    """
+    n_months = len(instance.months)
+    pair_doctor = instance.pair_doctor.tolist()
+    pair_slot = instance.pair_slot.tolist()
+    slot_start = instance.slot_start.tolist()
+    slot_end = instance.slot_end.tolist()
+    slot_month = instance.slot_month.tolist()
+
+    remaining = (instance.max_shifts[:, None] - instance.consumed).ravel().tolist()
+    count = np.zeros(instance.n_doctors, dtype=np.int64)
+    busy: List[List[Tuple[int, int]]] = [[] for _ in range(instance.n_doctors)]
+    demand = instance.slot_required.copy()
+    chosen: List[int] = []
+    complete = not instance.fixed_missing
+
+    def fits(i: int, j: int) -> bool:
+        start, end = slot_start[j], slot_end[j]
+        if remaining[i * n_months + slot_month[j]] <= 0:
+            return False
+        return all(not (s < end and start < e) for s, e in busy[i])
+
+    def take(k: int) -> None:
+        i, j = pair_doctor[k], pair_slot[k]
+        remaining[i * n_months + slot_month[j]] -= 1
+        busy[i].append((slot_start[j], slot_end[j]))
+        count[i] += 1
+        demand[j] -= 1
+        chosen.append(k)
+
+    # Alocações travadas primeiro; se alguma já quebra H4/H5, a escala não vale como resposta
+    fixed = set(instance.fixed_pairs.tolist())
+    for k in sorted(fixed):
+        if not fits(pair_doctor[k], pair_slot[k]):
+            complete = False
+        take(k)
+
+    # Slots mais difíceis primeiro: menor folga, menos elegíveis, mais cedo
+    eligible = np.bincount(instance.pair_slot, minlength=instance.n_slots)
+    order = np.lexsort((instance.slot_start, eligible, eligible - demand))
+
+    coeffs = instance.pair_coeffs()
+    by_slot = np.split(
+        np.argsort(instance.pair_slot, kind="stable"),
+        np.cumsum(eligible)[:-1]
+    ) if instance.n_slots else []
+    fairness = 1000 * int(instance.weight_fairness)
+    target = instance.default_fairness_target() if fairness else 0
+
+    for j in order.tolist():
+        if demand[j] <= 0:
+            continue
+        candidates = by_slot[j]
+        score = coeffs[candidates]
+        if fairness:
+            # Ganho marginal em |plantões - média|: +1 acima da média, -1 abaixo
+            score = score - fairness * np.where(count[instance.pair_doctor[candidates]] >= target, 1, -1)
+        for k in candidates[np.argsort(-score, kind="stable")].tolist():
+            if k not in fixed and fits(pair_doctor[k], j):
+                take(k)
+                if demand[j] == 0:
+                    break
+        if demand[j] > 0:
+            complete = False
+
+    # Travas além de required_count também quebram H1 (igualdade)
+    complete = complete and not (demand < 0).any()
+    return np.unique(np.array(chosen, dtype=np.int64)), complete
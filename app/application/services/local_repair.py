@@ -0,0 +1,232 @@
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from app.domain.models import (
+    OptimizationRequest,
+    OptimizationResult,
+    RepairReport,
+    RosterChange,
+    RosterSolution
+)
+from app.application.services.optimizer_service import InstanceSolution, RosterOptimizerService
+from app.application.services.problem_instance import ProblemInstance
+
+# Plantões terminam no máximo às 07h do dia seguinte: só alocações a até 1 dia
+# de distância de um slot reaberto podem colidir com ele (H4)
+BOUNDARY_DAYS = 1
+
+
+def apply_change(request: OptimizationRequest, change: RosterChange) -> OptimizationRequest:
+    """
+    Aplica a mudança ao problema da escala gravada: novas indisponibilidades dos
+    médicos, slots removidos/adicionados e novas demandas.
+    Levanta ValueError para slots desconhecidos, ids repetidos ou demanda negativa.
+    """
+    slot_ids = {s.id for s in request.slots_to_fill}
+    unknown = (set(change.removed_slot_ids) | set(change.demand_changes)) - slot_ids
+    if unknown:
+        raise ValueError(f"Slots não encontrados na escala: {', '.join(sorted(unknown))}")
+    duplicated = slot_ids & {s.id for s in change.added_slots}
+    if duplicated:
+        raise ValueError(f"Slots já existentes na escala: {', '.join(sorted(duplicated))}")
+    negative = [slot_id for slot_id, count in change.demand_changes.items() if count < 0]
+    if negative:
+        raise ValueError(f"Demanda negativa para: {', '.join(sorted(negative))}")
+
+    removed = set(change.removed_slot_ids)
+    slots = [
+        s.model_copy(update={"required_count": change.demand_changes[s.id]}) if s.id in change.demand_changes else s
+        for s in request.slots_to_fill if s.id not in removed
+    ]
+    slots += change.added_slots
+
+    unavailable = {}
+    for item in change.unavailable:
+        unavailable.setdefault(item.doctor_id, []).extend(item.dates)
+    doctors = [
+        d.model_copy(update={"availability": d.availability.model_copy(update={
+            "unavailable_dates": list(dict.fromkeys(d.availability.unavailable_dates + unavailable[d.id]))
+        })}) if d.id in unavailable else d
+        for d in request.doctors
+    ]
+
+    dates = [s.date for s in slots]
+    return request.model_copy(update={
+        "doctors": doctors,
+        "slots_to_fill": slots,
+        "period_start": min(dates + [request.period_start]),
+        "period_end": max(dates + [request.period_end]),
+    })
+
+
+class LocalRepairService:
+    """
+    Reparo local de uma escala já publicada.
+
+    A diferença entre a escala gravada e o problema alterado define as datas
+    afetadas: slots cuja cobertura válida não bate mais com required_count
+    (médico ficou indisponível, slot novo, demanda mudou) e datas de alocações
+    que deixaram de existir (slot removido). Só os slots a até
+    `neighborhood_days` dessas datas voltam para o solver; todas as outras
+    alocações ficam travadas e entram apenas como plantões consumidos (H5) e
+    como pares proibidos por choque de horário com a vizinhança (H4).
+
+    Dentro da vizinhança, cada alocação atual ganha um bônus maior que qualquer
+    ganho de custo/preferência de uma troca, então o solver primeiro minimiza a
+    rotatividade (churn) e só depois o custo. A equidade não é reotimizada: o
+    reparo não mexe na distribuição do resto do mês.
+
+    Se a vizinhança for inviável, ela é dobrada até cobrir o período inteiro.
+    """
+
+    def __init__(self, inner=None):
+        # `inner` resolve o subproblema da vizinhança (fluxo, heurística ou CP-SAT)
+        self.inner = inner or RosterOptimizerService()
+
+    def repair(
+        self,
+        request: OptimizationRequest,
+        current: List[RosterSolution],
+        neighborhood_days: int = 1,
+        num_workers: Optional[int] = None
+    ) -> OptimizationResult:
+        """`request` é o problema já alterado (apply_change) e `current`, a escala gravada."""
+        started = time.perf_counter()
+        instance = ProblemInstance.from_request(request)
+        outcome, report = self.repair_instance(instance, current, neighborhood_days, num_workers=num_workers)
+
+        result = outcome.to_result(instance)
+        current_keys = {(a.doctor_id, a.slot_id) for a in current}
+        final_keys = {(a.doctor_id, a.slot_id) for a in result.solutions}
+        if outcome.feasible:
+            report.added = [a for a in result.solutions if (a.doctor_id, a.slot_id) not in current_keys]
+            report.removed = [a for a in current if (a.doctor_id, a.slot_id) not in final_keys]
+            report.kept_assignments = len(result.solutions) - len(report.added)
+            report.churn = len(report.added) + len(report.removed)
+        report.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        result.repair = report
+        print(f"🩹 Reparo local: {report.freed_slots} slot(s) reabertos (±{report.neighborhood_days}d) | "
+              f"{report.freed_variables}/{report.total_variables} variáveis | churn {report.churn} | "
+              f"{report.elapsed_ms:.1f}ms")
+        return result
+
+    def repair_instance(
+        self,
+        instance: ProblemInstance,
+        current: List[RosterSolution],
+        neighborhood_days: int = 1,
+        num_workers: Optional[int] = None
+    ):
+        """Núcleo do reparo sobre a instância compilada. Devolve (InstanceSolution, RepairReport)."""
+        valid = instance.pairs_of(current)
+        slot_day = instance.slot_day
+        n_days = int(slot_day.max()) + 1 if instance.n_slots else 0
+
+        # Datas afetadas: cobertura válida diferente da demanda ...
+        coverage = np.bincount(instance.pair_slot[valid], minlength=instance.n_slots)
+        seed_days = set(slot_day[coverage != instance.slot_required].tolist())
+        # ... e alocações da escala gravada que não existem mais no problema alterado
+        valid_keys = {(instance.doctor_ids[i], instance.slot_ids[j])
+                      for i, j in zip(instance.pair_doctor[valid].tolist(), instance.pair_slot[valid].tolist())}
+        seed_days.update(
+            (a.date - instance.base_date).days for a in current if (a.doctor_id, a.slot_id) not in valid_keys
+        )
+        seed_days = np.array(sorted(seed_days), dtype=np.int64)
+
+        days = max(0, neighborhood_days)
+        while True:
+            outcome, report = self._solve_neighborhood(instance, valid, seed_days, days, num_workers)
+            covers_all = len(seed_days) == 0 or (
+                seed_days.min() - days <= 0 and seed_days.max() + days >= n_days - 1
+            )
+            if outcome.feasible or covers_all:
+                return outcome, report
+            print(f"⚠️  Reparo local: vizinhança de ±{days}d inviável, ampliando")
+            days = max(1, days * 2)
+
+    def _solve_neighborhood(
+        self,
+        instance: ProblemInstance,
+        valid: np.ndarray,
+        seed_days: np.ndarray,
+        days: int,
+        num_workers: Optional[int]
+    ):
+        slot_day = instance.slot_day
+        n_days = int(slot_day.max()) + 1 if instance.n_slots else 0
+        pair_doctor, pair_slot = instance.pair_doctor, instance.pair_slot
+
+        # Dias reabertos: [semente - days, semente + days]
+        open_day = np.zeros(n_days + 1, dtype=np.int64)
+        np.add.at(open_day, np.clip(seed_days - days, 0, n_days), 1)
+        np.add.at(open_day, np.clip(seed_days + days + 1, 0, n_days), -1)
+        open_day = np.cumsum(open_day)[:n_days] > 0
+        freed_slot = open_day[slot_day] if n_days else np.zeros(0, dtype=bool)
+        freed_slots = np.flatnonzero(freed_slot)
+
+        # Alocações mantidas: consomem H5 fora do modelo ...
+        kept = valid[~freed_slot[pair_slot[valid]]]
+        consumed = instance.consumed.copy()
+        np.add.at(consumed, (pair_doctor[kept], instance.slot_month[pair_slot[kept]]), 1)
+
+        # ... e proíbem os pares reabertos que colidem com elas (H4)
+        allowed = np.ones(instance.n_pairs, dtype=bool)
+        candidates = np.flatnonzero(freed_slot[pair_slot])  # Ordem médico -> slot
+        candidate_doctor = pair_doctor[candidates]
+        near = open_day.copy()
+        for shift in range(1, BOUNDARY_DAYS + 1):
+            near[shift:] |= open_day[:-shift]
+            near[:-shift] |= open_day[shift:]
+        for k in kept[near[slot_day[pair_slot[kept]]]].tolist():
+            i, j = pair_doctor[k], pair_slot[k]
+            lo, hi = np.searchsorted(candidate_doctor, [i, i + 1])
+            mine = candidates[lo:hi]
+            others = pair_slot[mine]
+            clash = (instance.slot_start[others] < instance.slot_end[j]) & (instance.slot_start[j] < instance.slot_end[others])
+            allowed[mine[clash]] = False
+
+        # Bônus de estabilidade: manter uma alocação vale mais que qualquer troca de custo/preferência
+        current = np.zeros(instance.n_pairs, dtype=bool)
+        current[valid] = True
+        bonus = 2 * int(np.abs(instance.pair_coeffs()).max(initial=0)) + 1
+        sub, pair_map = instance.subset(np.arange(instance.n_doctors), freed_slots, pair_mask=allowed)
+        hint = np.flatnonzero(current[pair_map])
+        sub = sub.replace(
+            consumed=consumed,
+            pair_bonus=np.where(current[pair_map], bonus, 0).astype(np.int64),
+            weight_fairness=0.0,
+            hint_pairs=hint,
+            hint_total=len(hint),
+        )
+
+        if len(freed_slots):
+            outcome = self.inner.solve_instance(sub, num_workers=num_workers)
+        else:
+            outcome = InstanceSolution(status="OPTIMAL", engine="none")
+
+        report = RepairReport(
+            neighborhood_days=days,
+            freed_slots=len(freed_slots),
+            freed_variables=sub.n_pairs,
+            total_variables=instance.n_pairs,
+            kept_assignments=len(kept),
+            churn=0
+        )
+        if not outcome.feasible:
+            return InstanceSolution(
+                status=outcome.status, wall_time_seconds=outcome.wall_time_seconds,
+                infeasibility=outcome.infeasibility, engine=outcome.engine
+            ), report
+
+        pairs = np.sort(np.concatenate([kept, pair_map[outcome.pairs]]))
+        return InstanceSolution(
+            # Só a vizinhança foi otimizada: sem prova de otimalidade para a escala inteira
+            status="FEASIBLE",
+            pairs=pairs,
+            objective_value=instance.objective_value(pairs),
+            wall_time_seconds=outcome.wall_time_seconds,
+            engine=outcome.engine,
+            presolve=outcome.presolve
+        ), report
@@ -1,170 +1,766 @@
-from typing import List, Dict, Tuple
+from typing import Callable, List, Tuple, Optional
 from ortools.sat.python import cp_model
+from app.core.config import settings
 from app.domain.models import (
     OptimizationRequest, 
+    OptimizationResult,
+    HintReport,
+    InfeasibilityIssue,
+    InfeasibilityReport,
+    PresolveReport,
+    RosterProgress,
     RosterSolution, 
     Doctor, 
     ShiftSlot
 )
-import math
+from app.application.services.problem_instance import ProblemInstance, overlap_cliques
+from app.application.services.feasibility import check_feasibility, slot_issue
+from app.application.services.flow_solver import solve_min_cost_flow
+from app.application.services.greedy_heuristic import greedy_roster
+from app.application.services.presolve import Reduction, count_bounds, presolve
+from app.application.services.symmetry import aggregation_pays_off, interchangeable_classes, solve_aggregated
+import threading
+import time
+import numpy as np
+
+class SolveControl:
+    """
+    Permite interromper, a partir de outra thread, um solve em andamento.
+    O solver devolve o melhor incumbente encontrado até o momento da parada.
+    """
 
-class RosterOptimizerService:
     def __init__(self):
-        self.model = cp_model.CpModel()
-        self.solver = cp_model.CpSolver()
+        self._lock = threading.Lock()
+        self._solver: Optional[cp_model.CpSolver] = None
+        self.stopped = False
 
-    def solve(self, request: OptimizationRequest) -> List[RosterSolution]:
-        self.model = cp_model.CpModel()
-        
-        # Mapeamentos
-        shifts: Dict[Tuple[str, str], cp_model.IntVar] = {}
-        doctors_shifts_count: Dict[str, cp_model.IntVar] = {} # Quantos plantões cada médico pegou
-        
-        # 1. Variáveis de Decisão
-        for doctor in request.doctors:
-            for slot in request.slots_to_fill:
-                shifts[(doctor.id, slot.id)] = self.model.NewBoolVar(f'shift_d{doctor.id}_s{slot.id}')
+    def stop(self) -> None:
+        with self._lock:
+            self.stopped = True
+            if self._solver is not None:
+                self._solver.StopSearch()
 
-        # 2. Hard Constraints (Mantivemos as mesmas)
-        
-        # H1: Preenchimento obrigatório do slot
-        for slot in request.slots_to_fill:
-            self.model.Add(
-                sum(shifts[(doctor.id, slot.id)] for doctor in request.doctors) == slot.required_count
-            )
+    def _attach(self, solver: cp_model.CpSolver) -> None:
+        with self._lock:
+            self._solver = solver
 
-        # H2: Indisponibilidade de Agenda
-        for doctor in request.doctors:
-            for date_unavailable in doctor.availability.unavailable_dates:
-                for slot in request.slots_to_fill:
-                    if slot.date == date_unavailable:
-                        self.model.Add(shifts[(doctor.id, slot.id)] == 0)
-
-        # H3: Especialidade
-        for doctor in request.doctors:
-            doctor_specialties_set = set(doctor.specialties)
-            for slot in request.slots_to_fill:
-                slot_specialties_set = set(slot.required_specialties)
-                if not doctor_specialties_set.intersection(slot_specialties_set):
-                     self.model.Add(shifts[(doctor.id, slot.id)] == 0)
-
-        # --- H4: Choque de Horário (Refatorado para Intervalos) ---
-        # Um médico não pode estar em dois slots que colidem no tempo.
-        # Ex: Não pode pegar 'MANHA' (7-13) e 'DIURNO' (7-19) ao mesmo tempo.
-        # Mas PODE pegar 'MANHA' (7-13) e 'TARDE' (13-19).
-        
-        # 1. Agrupar slots por DATA apenas
-        slots_by_date = {}
-        for slot in request.slots_to_fill:
-            if slot.date not in slots_by_date:
-                slots_by_date[slot.date] = []
-            slots_by_date[slot.date].append(slot)
-
-        for doctor in request.doctors:
-            for current_date, day_slots in slots_by_date.items():
-                # Comparar todos os slots do dia uns contra os outros (pairwise)
-                # O loop aninhado é ok porque o número de slots num dia é pequeno (<50)
-                for i in range(len(day_slots)):
-                    for j in range(i + 1, len(day_slots)):
-                        slot_a = day_slots[i]
-                        slot_b = day_slots[j]
-
-                        # Obter intervalos
-                        start_a, end_a = slot_a.time_interval
-                        start_b, end_b = slot_b.time_interval
-
-                        # Verifica sobreposição de intervalos
-                        # Lógica: (StartA < EndB) and (StartB < EndA)
-                        # Nota: Se StartB == EndA (ex: 13h), não conta como colisão (troca de turno)
-                        is_overlapping = (start_a < end_b) and (start_b < end_a)
-
-                        if is_overlapping:
-                            # Restrição: A soma das variáveis binárias deve ser <= 1
-                            # Ou seja, o médico escolhe A, ou B, ou NENHUM. Nunca os dois.
-                            self.model.Add(
-                                shifts[(doctor.id, slot_a.id)] + 
-                                shifts[(doctor.id, slot_b.id)] <= 1
-                            )
-
-        # H5: Limite Máximo Individual
-        for doctor in request.doctors:
-            # Cria variável que conta quantos plantões o médico pegou
-            count_var = self.model.NewIntVar(0, 31, f'count_{doctor.id}')
-            self.model.Add(
-                count_var == sum(shifts[(doctor.id, slot.id)] for slot in request.slots_to_fill)
-            )
-            # Aplica limite do médico
-            self.model.Add(count_var <= doctor.availability.max_shifts_per_month)
-            
-            # Armazena para uso na equidade
-            doctors_shifts_count[doctor.id] = count_var
+class _ProgressCallback(cp_model.CpSolverSolutionCallback):
+    """Repassa cada incumbente melhorado para `on_solution` (diff ou escala completa)."""
 
-        # ==============================================================================
-        # 3. SOFT CONSTRAINTS & OBJETIVOS (A mágica acontece aqui)
-        # ==============================================================================
-        objective_terms = []
-
-        # S1: Custo (Minimizar)
-        # S2: Preferência (Maximizar)
-        for doctor in request.doctors:
-            for slot in request.slots_to_fill:
-                var = shifts[(doctor.id, slot.id)]
-                
-                # Preferência
-                if slot.date in doctor.availability.preferred_dates:
-                    objective_terms.append(var * 50 * int(request.weight_preference))
-                
-                # Custo
-                cost = int(doctor.attributes.cost_per_hour * slot.hours_duration)
-                objective_terms.append(var * -cost * int(request.weight_cost))
-
-        # S3: Equidade (NOVO!)
-        # Queremos penalizar médicos que fogem muito da média ideal.
-        # Média Ideal = Total Slots / Total Médicos
-        if request.weight_fairness > 0:
-            total_slots_needed = sum(s.required_count for s in request.slots_to_fill)
-            # Arredondamos para baixo para ter um target inteiro
-            avg_target = math.floor(total_slots_needed / len(request.doctors))
-            
-            for doctor in request.doctors:
-                # Vamos penalizar o desvio absoluto da média
-                # delta = abs(shifts_count - avg_target)
-                
-                delta = self.model.NewIntVar(0, 31, f'delta_{doctor.id}')
-                count = doctors_shifts_count[doctor.id]
-                
-                # CP-SAT truque para valor absoluto:
-                # delta >= count - avg
-                # delta >= avg - count
-                self.model.Add(delta >= count - avg_target)
-                self.model.Add(delta >= avg_target - count)
-                
-                # Penalidade quadrática ou linear. Vamos usar linear forte aqui.
-                # Quanto maior o peso de equidade, mais ele penaliza o desvio.
-                # Multiplicamos por -1000 para ser significativo contra o custo em reais
-                penalty = delta * -1000 * int(request.weight_fairness)
-                objective_terms.append(penalty)
-
-        # Maximizar Score Total
-        self.model.Maximize(sum(objective_terms))
+    def __init__(
+        self,
+        instance: ProblemInstance,
+        var_base: int,
+        on_solution: Callable[[RosterProgress], None],
+        diff: bool = True,
+        control: Optional[SolveControl] = None
+    ):
+        super().__init__()
+        self._instance = instance
+        self._var_base = var_base
+        self._on_solution = on_solution
+        self._diff = diff
+        self._control = control
+        self._previous = np.zeros(0, dtype=np.int64)
+        self._sequence = 0
+
+    def on_solution_callback(self) -> None:
+        # Leitura em lote do incumbente (um único acesso ao vetor de solução do proto)
+        current = _chosen_pairs(self.response_proto.solution, self._var_base, self._instance.n_pairs)
+
+        self._sequence += 1
+        progress = RosterProgress(
+            sequence=self._sequence,
+            objective_value=self.ObjectiveValue(),
+            best_bound=self.BestObjectiveBound(),
+            wall_time_seconds=self.WallTime()
+        )
+        # Só as alocações que vão para o evento viram RosterSolution
+        if self._diff and self._sequence > 1:
+            progress.added = self._instance.to_solutions(np.setdiff1d(current, self._previous, assume_unique=True))
+            progress.removed = self._instance.to_solutions(np.setdiff1d(self._previous, current, assume_unique=True))
+        else:
+            progress.assignments = self._instance.to_solutions(current)
+        self._previous = current
+
+        self._on_solution(progress)
+        if self._control is not None and self._control.stopped:
+            self.StopSearch()
+
+class InstanceSolution:
+    """Resultado de solve_instance(): pares escolhidos (índices da instância) + metadados do solve."""
+
+    __slots__ = (
+        "status", "pairs", "objective_value", "wall_time_seconds", "hint", "infeasibility", "engine", "presolve"
+    )
+
+    def __init__(
+        self,
+        status: str,
+        pairs: Optional[np.ndarray] = None,
+        objective_value: Optional[float] = None,
+        wall_time_seconds: float = 0.0,
+        hint: Optional[HintReport] = None,
+        infeasibility: Optional[InfeasibilityReport] = None,
+        engine: str = "cp_sat",
+        presolve: Optional[PresolveReport] = None
+    ):
+        self.status = status
+        self.pairs = pairs if pairs is not None else np.zeros(0, dtype=np.int64)
+        self.objective_value = objective_value
+        self.wall_time_seconds = wall_time_seconds
+        self.hint = hint
+        self.infeasibility = infeasibility
+        self.engine = engine
+        self.presolve = presolve
+
+    @property
+    def feasible(self) -> bool:
+        return self.status in ("OPTIMAL", "FEASIBLE")
+
+    def to_result(self, instance: ProblemInstance) -> OptimizationResult:
+        return OptimizationResult(
+            solutions=instance.to_solutions(self.pairs),
+            status=self.status,
+            objective_value=self.objective_value,
+            wall_time_seconds=self.wall_time_seconds,
+            hint=self.hint,
+            infeasibility=self.infeasibility,
+            engine=self.engine,
+            presolve=self.presolve
+        )
+
+def merge_engines(engines) -> str:
+    """Motores usados pelos subproblemas/janelas, ex.: "cp_sat+min_cost_flow"."""
+    return "+".join(sorted(set(engines)))
+
+class RosterOptimizerService:
+    """
+    Serviço sem estado: cada chamada de solve() cria seu próprio modelo e solver,
+    então a mesma instância pode ser usada em paralelo por várias threads.
+    """
+
+    def __init__(
+        self,
+        use_flow: Optional[bool] = None,
+        use_greedy: Optional[bool] = None,
+        use_presolve: Optional[bool] = None,
+        use_aggregation: Optional[bool] = None
+    ):
+        # use_flow=False força o CP-SAT mesmo quando o atalho de fluxo de custo mínimo vale
+        self.use_flow = settings.SOLVER_FLOW_FAST_PATH if use_flow is None else use_flow
+        # use_greedy=False desliga a heurística gulosa (hint e resposta de reserva)
+        self.use_greedy = settings.SOLVER_GREEDY_HEURISTIC if use_greedy is None else use_greedy
+        # use_presolve=False entrega a instância inteira ao modelo, sem a redução prévia
+        self.use_presolve = settings.SOLVER_PRESOLVE if use_presolve is None else use_presolve
+        # use_aggregation=False resolve sempre com uma variável por médico, mesmo com perfis repetidos
+        self.use_aggregation = (
+            settings.SOLVER_AGGREGATE_INTERCHANGEABLE if use_aggregation is None else use_aggregation
+        )
+
+    def solve(self, request: OptimizationRequest, num_workers: Optional[int] = None) -> List[RosterSolution]:
+        """
+        Resolve a escala. `num_workers` vem do SolveScheduler quando há controle
+        de admissão; sem ele usamos o padrão histórico de 8 threads.
+        """
+        return self.solve_detailed(request, num_workers=num_workers).solutions
+
+    def solve_detailed(
+        self,
+        request: OptimizationRequest,
+        num_workers: Optional[int] = None,
+        on_solution: Optional[Callable[[RosterProgress], None]] = None,
+        diff: bool = True,
+        control: Optional[SolveControl] = None
+    ) -> OptimizationResult:
+        """
+        Como solve(), mas devolve também status, objetivo e o relatório do warm-start.
+        `on_solution` é chamado (na thread do solver) a cada incumbente melhorado;
+        `control.stop()` encerra a busca e mantém o melhor incumbente.
+        """
+        instance = ProblemInstance.from_request(request)
+        outcome = self.solve_instance(
+            instance, num_workers=num_workers, on_solution=on_solution, diff=diff, control=control
+        )
+        return outcome.to_result(instance)
+
+    def solve_instance(
+        self,
+        instance: ProblemInstance,
+        num_workers: Optional[int] = None,
+        on_solution: Optional[Callable[[RosterProgress], None]] = None,
+        diff: bool = True,
+        control: Optional[SolveControl] = None,
+        base: Optional["_BuiltModel"] = None
+    ) -> "InstanceSolution":
+        """
+        Núcleo do solve: monta e resolve o modelo a partir da instância compilada.
+        Devolve os índices dos pares escolhidos; os RosterSolution só são criados
+        em InstanceSolution.to_result(), na borda da API.
+        `base` (build_constraints) traz as restrições já montadas e pré-checadas
+        para esta mesma estrutura: só o objetivo é acrescentado a uma cópia.
+        """
+        # 0. Pré-checagem polinomial: inviabilidades evidentes (cobertura por slot,
+        # slots simultâneos, limite mensal, fluxo máximo) respondem em milissegundos,
+        # sem esperar o limite de tempo do CP-SAT
+        if base is None:
+            precheck = check_feasibility(instance)
+            if precheck.issues:
+                return InstanceSolution(status="INFEASIBLE", infeasibility=precheck)
+
+        # Redução (presolve): alocações obrigatórias propagadas por H1/H4/H5 até o
+        # ponto fixo. O conjunto de escalas viáveis não muda; o modelo só encolhe.
+        reduction = base.reduction if base is not None else (presolve(instance) if self.use_presolve else None)
+        if reduction is None:
+            return self._solve_reduced(instance, num_workers, on_solution, diff, control, base)
+
+        work = reduction.instance.replace(
+            weight_cost=instance.weight_cost,
+            weight_preference=instance.weight_preference,
+            weight_fairness=instance.weight_fairness,
+            fairness_target=instance.fairness_target
+        )
+        outcome = self._solve_reduced(work, num_workers, on_solution, diff, control, base, reduction.forced)
+        # De volta à numeração da instância original (pair_map é crescente)
+        outcome.pairs = reduction.pair_map[outcome.pairs]
+        outcome.hint = _hint_report(instance, outcome.pairs)
+        outcome.presolve = reduction.report
+        return outcome
+
+    def _solve_reduced(
+        self,
+        instance: ProblemInstance,
+        num_workers: Optional[int],
+        on_solution: Optional[Callable[[RosterProgress], None]],
+        diff: bool,
+        control: Optional[SolveControl],
+        base: Optional["_BuiltModel"],
+        forced: Optional[np.ndarray] = None
+    ) -> "InstanceSolution":
+        """Fluxo, heurística e CP-SAT sobre a instância já reduzida (`forced`: pares fixados em 1)."""
+        # 1. Atalho exato: sem equidade e sem colisões de horário na solução, o
+        # problema é de transporte e o SimpleMinCostFlow prova o ótimo em milissegundos
+        if self.use_flow and not (control is not None and control.stopped):
+            started = time.perf_counter()
+            flow = solve_min_cost_flow(instance)
+            if flow is not None:
+                chosen, objective = flow
+                outcome = InstanceSolution(
+                    status="OPTIMAL",
+                    pairs=chosen,
+                    objective_value=objective,
+                    wall_time_seconds=time.perf_counter() - started,
+                    hint=_hint_report(instance, chosen),
+                    engine="min_cost_flow"
+                )
+                print(f"✅ Status: OPTIMAL (fluxo de custo mínimo) | Obj: {objective} | {outcome.wall_time_seconds * 1000:.1f}ms")
+                if on_solution is not None:
+                    on_solution(RosterProgress(
+                        sequence=1, objective_value=objective, best_bound=objective,
+                        wall_time_seconds=outcome.wall_time_seconds, assignments=instance.to_solutions(chosen)
+                    ))
+                return outcome
+
+        # 2. Heurística gulosa (slots mais difíceis primeiro, respeitando H2-H5):
+        # vira hint do CP-SAT e, se completa, resposta de reserva caso a busca não
+        # encontre nada melhor dentro do limite de tempo
+        greedy, greedy_complete, greedy_objective, greedy_seconds = None, False, None, 0.0
+        if self.use_greedy and not (control is not None and control.stopped):
+            started = time.perf_counter()
+            greedy, greedy_complete = greedy_roster(instance)
+            greedy_seconds = time.perf_counter() - started
+            if greedy_complete:
+                greedy_objective = instance.objective_value(greedy)
+            print(f"⚡ Heurística gulosa: {len(greedy)}/{int(instance.slot_required.sum())} vagas "
+                  f"({'completa' if greedy_complete else 'incompleta'}) em {greedy_seconds * 1000:.1f}ms")
+
+        # 3. Médicos intercambiáveis (mesmos pares, custos, preferências e limites): em vez de
+        # uma booleana por médico, o CP-SAT decide quantos de cada classe pegam cada slot,
+        # sem explorar permutações equivalentes, e a escala é desagregada depois.
+        # O streaming de incumbentes e a varredura (base) ficam no modelo completo.
+        if (self.use_aggregation and base is None and on_solution is None and not instance.fixed_missing
+                and not (control is not None and control.stopped)):
+            classes = interchangeable_classes(instance)
+            if aggregation_pays_off(instance, classes):
+                aggregated = solve_aggregated(
+                    instance, classes, forced=forced,
+                    hint_pairs=instance.hint_pairs if instance.hint_total else greedy,
+                    num_workers=num_workers,
+                    time_limit=5.0,  # Mesmo limite do modelo completo
+                    on_solver=control._attach if control is not None else None
+                )
+                if aggregated is not None:
+                    return self._aggregated_outcome(
+                        instance, aggregated, greedy, greedy_complete, greedy_objective, greedy_seconds, num_workers
+                    )
+
+        built = _build_model(instance, base=base, forced=forced)
+        model, proto = built.model, built.model.Proto()
+        solver = cp_model.CpSolver()
+        n_pairs, var_base = instance.n_pairs, built.var_base
+        pair_vars = np.arange(var_base, var_base + n_pairs, dtype=np.int64)
+
+        # Warm-start: a escala anterior vira hint (1 para quem estava alocado, 0 para o resto);
+        # sem escala anterior, a da heurística gulosa ocupa o lugar
+        hint_pairs = instance.hint_pairs if instance.hint_total else greedy
+        if hint_pairs is not None and len(hint_pairs):
+            hint_values = np.zeros(n_pairs, dtype=np.int64)
+            hint_values[hint_pairs] = 1
+            proto.solution_hint.vars.extend(pair_vars.tolist())
+            proto.solution_hint.values.extend(hint_values.tolist())
 
         # ==============================================================================
         # 4. Resolução
         # ==============================================================================
-        self.solver.parameters.num_search_workers = 8 
+        solver.parameters.num_search_workers = num_workers or 8
         # Aumentamos um pouco o tempo limite para ele tentar equilibrar
-        self.solver.parameters.max_time_in_seconds = 5.0 
-        
-        status = self.solver.Solve(self.model)
-        final_roster = []
-
-        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-            print(f"✅ Status: {self.solver.StatusName(status)} | Obj: {self.solver.ObjectiveValue()}")
-            for doctor in request.doctors:
-                for slot in request.slots_to_fill:
-                    if self.solver.Value(shifts[(doctor.id, slot.id)]) == 1:
-                        final_roster.append(RosterSolution(
-                            slot_id=slot.id, doctor_id=doctor.id, date=slot.date
-                        ))
+        solver.parameters.max_time_in_seconds = 5.0 
         
-        return final_roster
\ No newline at end of file
+        callback = None
+        if on_solution is not None:
+            callback = _ProgressCallback(instance, var_base, on_solution, diff=diff, control=control)
+        if control is not None:
+            control._attach(solver)
+            if control.stopped:
+                # Cancelado antes de começar: nem entra na busca
+                solver.parameters.max_time_in_seconds = 0.0
+
+        status = solver.Solve(model, callback)
+        chosen = np.zeros(0, dtype=np.int64)
+
+        feasible = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        # O objetivo é inteiro por construção; o double do CP-SAT pode vir com ruído (-9880.000000000002)
+        objective = float(round(solver.ObjectiveValue())) if feasible else None
+        if feasible:
+            print(f"✅ Status: {solver.StatusName(status)} | Obj: {objective}")
+            # Extração em lote: o vetor de solução inteiro de uma vez, em vez de um
+            # solver.Value() por par; o resultado fica como array de índices de pares
+            chosen = _chosen_pairs(solver.response_proto.solution, var_base, n_pairs)
+
+        # CP-SAT sem solução (ou pior que a heurística) no tempo limite: a escala gulosa
+        # respeita todas as regras rígidas, então sai como FEASIBLE marcada como "heuristic".
+        # Um ótimo provado nunca é trocado, e no empate fica a escala do solver.
+        if greedy_complete and status != cp_model.OPTIMAL and (not feasible or greedy_objective > objective):
+            print(f"⚡ CP-SAT sem solução melhor em {solver.WallTime():.1f}s: devolvendo a heurística | Obj: {greedy_objective}")
+            return InstanceSolution(
+                status="FEASIBLE",
+                pairs=greedy,
+                objective_value=greedy_objective,
+                wall_time_seconds=greedy_seconds + solver.WallTime(),
+                hint=_hint_report(instance, greedy),
+                engine="heuristic"
+            )
+
+        # Passou na pré-checagem mas é inviável: o núcleo de suposições diz quais restrições brigam
+        infeasibility = None
+        if status == cp_model.INFEASIBLE and settings.SOLVER_INFEASIBILITY_CORE_SECONDS > 0:
+            infeasibility = self.explain_infeasibility(
+                instance, settings.SOLVER_INFEASIBILITY_CORE_SECONDS, num_workers=num_workers
+            )
+
+        return InstanceSolution(
+            status=solver.StatusName(status),
+            pairs=chosen,
+            objective_value=objective,
+            wall_time_seconds=solver.WallTime(),
+            hint=_hint_report(instance, chosen),
+            infeasibility=infeasibility
+        )
+
+    def _aggregated_outcome(
+        self,
+        instance: ProblemInstance,
+        aggregated,
+        greedy: Optional[np.ndarray],
+        greedy_complete: bool,
+        greedy_objective: Optional[float],
+        greedy_seconds: float,
+        num_workers: Optional[int]
+    ) -> "InstanceSolution":
+        """Mesmo desfecho do modelo completo (reserva gulosa, núcleo inviável) para o modelo agregado."""
+        status, chosen, objective, seconds = aggregated
+        if greedy_complete and status != "OPTIMAL" and (objective is None or greedy_objective > objective):
+            print(f"⚡ Modelo agregado sem solução melhor: devolvendo a heurística | Obj: {greedy_objective}")
+            return InstanceSolution(
+                status="FEASIBLE",
+                pairs=greedy,
+                objective_value=greedy_objective,
+                wall_time_seconds=greedy_seconds + seconds,
+                hint=_hint_report(instance, greedy),
+                engine="heuristic"
+            )
+        if objective is not None:
+            print(f"✅ Status: {status} (modelo agregado) | Obj: {objective}")
+
+        # O agregado é uma relaxação: inviável nele é inviável no original
+        infeasibility = None
+        if status == "INFEASIBLE" and settings.SOLVER_INFEASIBILITY_CORE_SECONDS > 0:
+            infeasibility = self.explain_infeasibility(
+                instance, settings.SOLVER_INFEASIBILITY_CORE_SECONDS, num_workers=num_workers
+            )
+        return InstanceSolution(
+            status=status,
+            pairs=chosen,
+            objective_value=objective,
+            wall_time_seconds=seconds,
+            hint=_hint_report(instance, chosen),
+            infeasibility=infeasibility,
+            engine="cp_sat_aggregated"
+        )
+
+    def explain_infeasibility(
+        self,
+        instance: ProblemInstance,
+        time_limit: float,
+        num_workers: Optional[int] = None
+    ) -> Optional[InfeasibilityReport]:
+        """
+        Núcleo inviável via suposições do CP-SAT.
+
+        Cada restrição H1 (slot), H5 (médico/mês) e trava ganha um literal de
+        ativação assumido verdadeiro; o solver devolve um subconjunto suficiente
+        para a inviabilidade, que depois é reduzido por deleção (tira uma
+        suposição, resolve de novo, mantém a retirada se continuar inviável)
+        enquanto houver tempo. H4 fica sempre ativa: é estrutural.
+        Devolve None se não der para provar a inviabilidade dentro de `time_limit`.
+        """
+        started = time.perf_counter()
+        deadline = started + time_limit
+        built = _build_model(instance, objective=False)
+        model, proto = built.model, built.model.Proto()
+
+        # Suposição -> (tipo, dados) para montar o relatório
+        groups = [("slot", j, c) for j, c in enumerate(built.slot_constraints)]
+        groups += [("limit", (i, month), c) for i, month, c in built.limit_constraints]
+        groups += [("fixed", k, c) for k, c in built.fixed_constraints]
+        literal_base = len(proto.variables)
+        _add_bool_vars(proto, len(groups))
+        for offset, (_, _, constraint) in enumerate(groups):
+            proto.constraints[constraint].enforcement_literal.append(literal_base + offset)
+
+        def infeasible_core(candidates: List[int]) -> Optional[List[int]]:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return None
+            proto.assumptions.clear()
+            proto.assumptions.extend([literal_base + g for g in candidates])
+            solver = cp_model.CpSolver()
+            solver.parameters.num_search_workers = num_workers or 8
+            solver.parameters.max_time_in_seconds = remaining
+            if solver.Solve(model) != cp_model.INFEASIBLE:
+                return None
+            return sorted(lit - literal_base for lit in solver.SufficientAssumptionsForInfeasibility())
+
+        core = infeasible_core(list(range(len(groups))))
+        if core is None:
+            return None
+        for g in list(core):
+            if g not in core:
+                continue
+            smaller = infeasible_core([c for c in core if c != g])
+            if smaller is not None:
+                core = smaller
+            elif time.perf_counter() >= deadline:
+                break
+
+        issues = []
+        slots = np.array([groups[g][1] for g in core if groups[g][0] == "slot"], dtype=np.int64)
+        if len(slots):
+            issues.append(slot_issue(
+                instance, "core_slot_demand",
+                f"A demanda destes {len(slots)} slot(s) não pode ser atendida ao mesmo tempo "
+                f"(choque de horário e demais restrições do núcleo).",
+                slots, int(instance.slot_required[slots].sum())
+            ))
+        for g in core:
+            kind, key, _ = groups[g]
+            if kind == "limit":
+                i, month = key
+                issues.append(InfeasibilityIssue(
+                    kind="core_monthly_limit",
+                    message=f"Limite mensal de {instance.doctor_ids[i]} em {instance.months[month]} "
+                            f"({int(instance.max_shifts[i] - instance.consumed[i, month])} plantões) faz parte do conflito.",
+                    doctor_ids=[instance.doctor_ids[i]],
+                    available=int(instance.max_shifts[i] - instance.consumed[i, month])
+                ))
+            elif kind == "fixed":
+                j = int(instance.pair_slot[key])
+                issues.append(slot_issue(
+                    instance, "core_fixed_assignment",
+                    f"Alocação travada de {instance.doctor_ids[instance.pair_doctor[key]]} em "
+                    f"{instance.slot_ids[j]} faz parte do conflito.",
+                    np.array([j]), doctors=np.array([instance.pair_doctor[key]])
+                ))
+
+        report = InfeasibilityReport(
+            source="core", issues=issues, elapsed_ms=round((time.perf_counter() - started) * 1000, 3)
+        )
+        print(f"🚫 Núcleo inviável: {len(core)} restrição(ões) em {report.elapsed_ms:.1f}ms")
+        return report
+
+    def build_constraints(self, instance: ProblemInstance) -> "_BuiltModel":
+        """
+        Restrições do modelo (sem objetivo), para reaproveitar entre variantes que
+        só mudam os pesos: solve_instance(instance.replace(weight_...=...), base=...).
+        A redução do presolve não depende dos pesos e fica guardada junto.
+        """
+        reduction = presolve(instance) if self.use_presolve else None
+        if reduction is None:
+            return _build_model(instance, objective=False)
+        built = _build_model(reduction.instance, objective=False, forced=reduction.forced)
+        built.reduction = reduction
+        return built
+
+
+class _BuiltModel:
+    """Modelo CP-SAT montado + onde ficaram as restrições que podem explicar uma inviabilidade."""
+
+    __slots__ = (
+        "model", "var_base", "slot_constraints", "limit_constraints", "fixed_constraints", "forced", "reduction"
+    )
+
+    def __init__(self, model: cp_model.CpModel):
+        self.model = model
+        self.var_base = 0
+        self.forced = np.zeros(0, dtype=np.int64)         # Pares fixados em 1 pelo presolve
+        self.reduction: Optional[Reduction] = None        # Presolve que gerou a instância deste modelo
+        self.slot_constraints: List[int] = []                    # H1, uma por slot
+        self.limit_constraints: List[Tuple[int, int, int]] = []  # H5: (médico, mês, restrição)
+        self.fixed_constraints: List[Tuple[int, int]] = []       # (par travado, restrição)
+
+    def clone(self) -> "_BuiltModel":
+        """Cópia independente do modelo (as variáveis mantêm os mesmos índices)."""
+        copy = _BuiltModel(self.model.clone())
+        copy.var_base = self.var_base
+        copy.slot_constraints = list(self.slot_constraints)
+        copy.limit_constraints = list(self.limit_constraints)
+        copy.fixed_constraints = list(self.fixed_constraints)
+        copy.forced = self.forced
+        copy.reduction = self.reduction
+        return copy
+
+
+def _build_model(
+    instance: ProblemInstance,
+    objective: bool = True,
+    base: Optional[_BuiltModel] = None,
+    forced: Optional[np.ndarray] = None
+) -> _BuiltModel:
+    """
+    Monta o modelo a partir da instância compilada (variáveis, H1/H4/H5, travas e objetivo).
+    Os índices das restrições H1/H5/travas ficam no _BuiltModel para a explicação por suposições.
+    Com `base`, as restrições vêm de uma cópia dela e só o objetivo é montado.
+    `forced` (presolve) são pares cuja variável nasce com domínio [1, 1].
+    """
+    built = base.clone() if base is not None else _build_constraints(instance, forced)
+    if objective:
+        _add_objective(built, instance)
+    return built
+
+
+def _build_constraints(instance: ProblemInstance, forced: Optional[np.ndarray] = None) -> _BuiltModel:
+    """Variáveis, H1/H4/H5 e travas: tudo o que não depende dos pesos."""
+    model = cp_model.CpModel()
+    proto = model.Proto()
+    built = _BuiltModel(model)
+
+    # 0. Instância compilada (bitmasks de especialidade, índices de dia, arrays NumPy)
+    # H2 (Indisponibilidade) e H3 (Especialidade) foram resolvidas na compilação:
+    # pares inelegíveis simplesmente não ganham variável, em vez de virarem "var == 0".
+    n_pairs = instance.n_pairs
+    pair_doctor, pair_slot = instance.pair_doctor, instance.pair_slot
+
+    # 1. Variáveis de Decisão: uma BoolVar por par elegível, criadas em lote.
+    # O par k é a variável `var_base + k` do modelo.
+    var_base = built.var_base = len(proto.variables)
+    _add_bool_vars(proto, n_pairs)
+    pair_vars = np.arange(var_base, var_base + n_pairs, dtype=np.int64)
+    # Alocações obrigatórias do presolve: domínio [1, 1] direto na variável
+    if forced is not None and len(forced):
+        built.forced = forced
+        for var in pair_vars[forced].tolist():
+            proto.variables[var].domain[0] = 1  # [0, 1] -> [1, 1]
+
+    # 2. Hard Constraints
+
+    # H1: Preenchimento obrigatório do slot
+    # Slot sem nenhum médico elegível vira "0 == required_count" (inviável, como antes)
+    by_slot = _group(pair_slot, instance.n_slots)
+    for j, members in enumerate(by_slot):
+        required = int(instance.slot_required[j])
+        built.slot_constraints.append(
+            _add_linear(proto, pair_vars[members], np.ones(len(members), dtype=np.int64), required, required)
+        )
+
+    # --- H4: Choque de Horário (Sweep-line em tempo absoluto) ---
+    # Um médico não pode estar em dois slots que colidem no tempo.
+    # Ex: Não pode pegar 'MANHA' (7-13) e 'DIURNO' (7-19) ao mesmo tempo.
+    # Mas PODE pegar 'MANHA' (7-13) e 'TARDE' (13-19).
+    # As cliques máximas de slots sobrepostos são calculadas uma única vez
+    # (independem do médico) e viram um AddAtMostOne por médico.
+    by_slot_order, by_slot_bounds = instance.slot_pairs()
+    emitted = set()
+    for clique in overlap_cliques(instance.slot_start, instance.slot_end):
+        # Pares da clique em ordem de médico; cada médico com 2+ pares ganha uma restrição
+        clique_pairs = np.sort(np.concatenate([
+            by_slot_order[by_slot_bounds[j]:by_slot_bounds[j + 1]] for j in clique.tolist()
+        ]))
+        doctors = pair_doctor[clique_pairs]
+        for members in np.split(clique_pairs, np.flatnonzero(doctors[1:] != doctors[:-1]) + 1):
+            if len(members) < 2:
+                continue
+            key = members.tobytes()
+            if key in emitted:
+                continue
+            emitted.add(key)
+            # O médico escolhe no máximo UM slot da clique (ou nenhum)
+            proto.constraints.add().at_most_one.literals.extend(pair_vars[members].tolist())
+
+    # H5: Limite Máximo Individual (por mês civil)
+    # Horizontes com mais de um mês ganham um limite por mês; plantões já
+    # consumidos fora do modelo (janelas anteriores do horizonte rolante)
+    # descontam do limite daquele mês.
+    n_months = len(instance.months)
+    doctor_month = pair_doctor.astype(np.int64) * n_months + instance.slot_month[pair_slot]
+    for key, members in _group_present(doctor_month):
+        i, month = divmod(key, n_months)
+        # Aplica limite do médico
+        remaining = int(instance.max_shifts[i]) - int(instance.consumed[i, month])
+        built.limit_constraints.append(
+            (i, month, _add_linear(proto, pair_vars[members], np.ones(len(members), dtype=np.int64), None, remaining))
+        )
+
+    # Alocações travadas (fronteira do horizonte rolante): a variável vale 1.
+    # Um par sem variável (médico inelegível ou slot fora do modelo) é inviável.
+    for k in instance.fixed_pairs.tolist():
+        built.fixed_constraints.append((k, _add_linear(proto, pair_vars[[k]], np.ones(1, dtype=np.int64), 1, 1)))
+    if instance.fixed_missing:
+        model.AddBoolOr([])
+    return built
+
+
+def _add_objective(built: _BuiltModel, instance: ProblemInstance) -> None:
+    """Objetivo (S1 custo, S2 preferência, S3 equidade) com os pesos da instância."""
+    model, proto = built.model, built.model.Proto()
+    n_pairs, var_base = instance.n_pairs, built.var_base
+    pair_vars = np.arange(var_base, var_base + n_pairs, dtype=np.int64)
+    pair_doctor = instance.pair_doctor
+
+    # ==============================================================================
+    # 3. SOFT CONSTRAINTS & OBJETIVOS (A mágica acontece aqui)
+    # ==============================================================================
+
+    # S1: Custo (Minimizar)
+    # S2: Preferência (Maximizar)
+    # Coeficiente de cada par calculado em lote sobre os arrays da instância
+    pair_coeffs = instance.pair_coeffs()
+
+    # S3: Equidade (NOVO!)
+    # Queremos penalizar médicos que fogem muito da média ideal.
+    # Média Ideal = Total Slots / Total Médicos (ou a do problema completo, em subproblemas)
+    fairness_vars, fairness_coeffs, fairness_constant = [], [], 0
+    if instance.weight_fairness > 0:
+        avg_target = instance.default_fairness_target()
+        weight = -1000 * int(instance.weight_fairness)
+        # Domínio justo da contagem: pelo menos as obrigatórias do presolve e no máximo,
+        # em cada mês, min(limite restante, slots elegíveis)
+        lower, upper = count_bounds(instance, built.forced)
+
+        by_doctor = _group(pair_doctor, instance.n_doctors)
+        for doctor_id, members, lo, hi in zip(instance.doctor_ids, by_doctor, lower.tolist(), upper.tolist()):
+            if not len(members):
+                # Médico sem nenhum par fica fora do modelo: contagem 0, desvio constante
+                fairness_constant += weight * avg_target
+                continue
+
+            # Cria variável que conta quantos plantões o médico pegou
+            count = model.NewIntVar(lo, hi, f'count_{doctor_id}')
+            _add_linear(
+                proto,
+                np.append(pair_vars[members], count.Index()),
+                np.append(np.ones(len(members), dtype=np.int64), -1),
+                0, 0
+            )
+
+            # Vamos penalizar o desvio absoluto da média
+            # delta = abs(shifts_count - avg_target)
+            delta = model.NewIntVar(0, max(avg_target - lo, hi - avg_target, 0), f'delta_{doctor_id}')
+            
+            # CP-SAT truque para valor absoluto:
+            # delta >= count - avg
+            # delta >= avg - count
+            model.Add(delta >= count - avg_target)
+            model.Add(delta >= avg_target - count)
+            
+            # Penalidade quadrática ou linear. Vamos usar linear forte aqui.
+            # Quanto maior o peso de equidade, mais ele penaliza o desvio.
+            # Multiplicamos por -1000 para ser significativo contra o custo em reais
+            fairness_vars.append(delta)
+            fairness_coeffs.append(weight)
+
+    # Maximizar Score Total
+    # Os termos de equidade entram pela API; os dos pares vão direto nos campos
+    # repetidos do proto (o CP-SAT guarda maximização como minimização com fator -1)
+    model.Maximize(cp_model.LinearExpr.WeightedSum(fairness_vars, fairness_coeffs) + fairness_constant)
+    nonzero = np.nonzero(pair_coeffs)[0]
+    proto.objective.vars.extend(pair_vars[nonzero].tolist())
+    proto.objective.coeffs.extend((-pair_coeffs[nonzero]).tolist())
+
+
+def _hint_report(instance: ProblemInstance, chosen: np.ndarray) -> Optional[HintReport]:
+    """Quanto da escala anterior (warm-start) sobreviveu entre os pares escolhidos."""
+    if not instance.hint_total:
+        return None
+    kept = int(np.isin(chosen, instance.hint_pairs).sum())
+    return HintReport(
+        hinted_assignments=len(instance.hint_pairs),
+        discarded_assignments=instance.hint_total - len(instance.hint_pairs),
+        kept_assignments=kept,
+        survival_rate=round(kept / instance.hint_total, 4)
+    )
+
+
+def _chosen_pairs(solution, var_base: int, n_pairs: int) -> np.ndarray:
+    """Vetor de solução do proto -> índices (crescentes) dos pares com variável = 1."""
+    values = np.fromiter(solution, dtype=np.int64, count=len(solution))
+    return np.flatnonzero(values[var_base:var_base + n_pairs])
+
+
+def _add_bool_vars(proto, count: int) -> None:
+    """Cria `count` variáveis booleanas de uma vez (cópias de um mesmo protótipo)."""
+    if count <= 0:
+        return
+    first = proto.variables.add()
+    first.domain.extend([0, 1])
+    if count > 1:
+        proto.variables.extend([first] * (count - 1))
+
+
+def _add_linear(proto, var_indices: np.ndarray, coeffs: np.ndarray, lower: Optional[int], upper: Optional[int]) -> int:
+    """lower <= sum(coeffs * vars) <= upper, escrito direto no proto (None = sem limite). Retorna o índice da restrição."""
+    index = len(proto.constraints)
+    linear = proto.constraints.add().linear
+    linear.vars.extend(var_indices.tolist())
+    linear.coeffs.extend(coeffs.tolist())
+    linear.domain.extend([
+        cp_model.INT_MIN if lower is None else lower,
+        cp_model.INT_MAX if upper is None else upper,
+    ])
+    return index
+
+
+def _group(keys: np.ndarray, size: int) -> List[np.ndarray]:
+    """Posições de cada chave 0..size-1 (grupo vazio para chaves ausentes), em ordem original."""
+    order = np.argsort(keys, kind="stable")
+    bounds = np.cumsum(np.bincount(keys, minlength=size))[:-1] if size else []
+    return np.split(order, bounds) if size else []
+
+
+def _group_present(keys: np.ndarray):
+    """(chave, posições) só para as chaves que aparecem, em ordem crescente de chave."""
+    if len(keys) == 0:
+        return []
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    return zip(sorted_keys[starts].tolist(), np.split(order, starts[1:]))
@@ -0,0 +1,147 @@
+import time
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.domain.models import PresolveReport
+from app.application.services.problem_instance import ProblemInstance
+
+
+class Reduction:
+    """Resultado de presolve(): instância reduzida + como voltar para a original."""
+
+    __slots__ = ("instance", "pair_map", "forced", "report")
+
+    def __init__(self, instance: ProblemInstance, pair_map: np.ndarray, forced: np.ndarray, report: PresolveReport):
+        self.instance = instance    # Mesmos médicos e slots; só os pares fixados em 0 saem
+        self.pair_map = pair_map    # Par k da instância reduzida -> par na original
+        self.forced = forced        # Pares (da reduzida) fixados em 1, travas incluídas
+        self.report = report
+
+
+def count_bounds(instance: ProblemInstance, forced: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Limites do número de plantões de cada médico no modelo:
+    pelo menos os pares fixados em 1 e no máximo, em cada mês,
+    min(limite restante do mês, slots elegíveis no mês).
+    """
+    n_months = len(instance.months)
+    key = instance.pair_doctor.astype(np.int64) * n_months + instance.slot_month[instance.pair_slot]
+    eligible = np.bincount(key, minlength=instance.n_doctors * n_months)
+    remaining = np.clip(instance.max_shifts[:, None] - instance.consumed, 0, None).ravel()
+    upper = np.minimum(eligible, remaining).reshape(instance.n_doctors, n_months).sum(axis=1)
+    lower = np.zeros(instance.n_doctors, dtype=np.int64)
+    if forced is not None and len(forced):
+        lower = np.bincount(instance.pair_doctor[forced], minlength=instance.n_doctors)
+    return lower, upper
+
+
+def presolve(instance: ProblemInstance) -> Optional[Reduction]:
+    """
+    Redução específica do domínio antes da modelagem, até o ponto fixo:
+
+    - H1: slot com exatamente required_count pares vivos -> todos valem 1;
+      slot cuja demanda já está fixada -> os demais pares valem 0;
+    - H4: par fixado em 1 -> os pares do mesmo médico em slots que colidem valem 0;
+    - H5: médico que esgotou o limite do mês com pares fixados -> os demais
+      pares dele naquele mês valem 0.
+
+    Tudo o que sai daqui é consequência das regras rígidas, então o conjunto de
+    escalas viáveis (e o ótimo) não muda. Os pares fixados em 0 somem da
+    instância; os fixados em 1 viram domínio [1, 1] no modelo.
+    Devolve None se a propagação encontrar uma contradição: o problema é
+    inviável e fica inteiro para o CP-SAT explicar pelo núcleo de suposições.
+    """
+    started = time.perf_counter()
+    if instance.fixed_missing:
+        return None
+
+    n_pairs, n_months = instance.n_pairs, len(instance.months)
+    pair_doctor = instance.pair_doctor.astype(np.int64)
+    pair_slot = instance.pair_slot.astype(np.int64)
+    pair_key = pair_doctor * n_months + instance.slot_month[pair_slot]
+    slot_start, slot_end, required = instance.slot_start, instance.slot_end, instance.slot_required
+    remaining = (instance.max_shifts[:, None] - instance.consumed).ravel()
+    # Pares ordenados por médico: os de cada médico formam um intervalo contíguo
+    doctor_bounds = np.searchsorted(pair_doctor, np.arange(instance.n_doctors + 1))
+
+    alive = np.ones(n_pairs, dtype=bool)
+    forced = np.zeros(n_pairs, dtype=bool)
+    forced[instance.fixed_pairs] = True
+    frontier = forced.copy()
+    rounds = 0
+    while True:
+        rounds += 1
+        # H4: o médico não pode estar em outro slot que colide com um par fixado
+        for k in np.flatnonzero(frontier).tolist():
+            i, j = pair_doctor[k], pair_slot[k]
+            mine = np.arange(doctor_bounds[i], doctor_bounds[i + 1])
+            others = pair_slot[mine]
+            clash = (slot_start[others] < slot_end[j]) & (slot_start[j] < slot_end[others]) & (mine != k)
+            if (clash & forced[mine]).any():
+                print("⚠️  Presolve: choque de horário entre alocações obrigatórias (inviável)")
+                return None
+            alive[mine[clash]] = False
+
+        # H5: limite do mês esgotado pelos pares fixados
+        used = np.bincount(pair_key[forced], minlength=len(remaining))
+        if (used > remaining).any():
+            print("⚠️  Presolve: alocações obrigatórias acima do limite mensal (inviável)")
+            return None
+        alive &= forced | (used < remaining)[pair_key]
+
+        # H1: demanda já fixada fecha o slot; candidatos justos são todos obrigatórios
+        filled = np.bincount(pair_slot[forced], minlength=instance.n_slots)
+        if (filled > required).any():
+            print("⚠️  Presolve: alocações obrigatórias acima da demanda do slot (inviável)")
+            return None
+        alive &= forced | (filled < required)[pair_slot]
+        candidates = np.bincount(pair_slot[alive], minlength=instance.n_slots)
+        if (candidates < required).any():
+            print("⚠️  Presolve: slot ficou sem candidatos suficientes (inviável)")
+            return None
+        frontier = alive & ~forced & (candidates == required)[pair_slot]
+        if not frontier.any():
+            break
+        forced |= frontier
+
+    if alive.all():
+        reduced, pair_map = instance, np.arange(n_pairs, dtype=np.int64)
+    else:
+        reduced, pair_map = instance.subset(np.arange(instance.n_doctors), np.arange(instance.n_slots), pair_mask=alive)
+    forced_idx = np.flatnonzero(forced[pair_map])
+
+    _, upper = count_bounds(reduced)
+    per_doctor = np.bincount(reduced.pair_doctor, minlength=reduced.n_doctors)
+    filled = np.bincount(reduced.pair_slot[forced_idx], minlength=reduced.n_slots)
+    report = PresolveReport(
+        variables_before=n_pairs,
+        variables_after=reduced.n_pairs,
+        forced_assignments=len(forced_idx) - len(instance.fixed_pairs),
+        resolved_slots=int(((filled == reduced.slot_required) & (reduced.slot_required > 0)).sum()),
+        dropped_doctors=int((per_doctor == 0).sum()),
+        tightened_bounds=int((upper < per_doctor).sum()),
+        rounds=rounds,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3)
+    )
+    if report.variables_after < n_pairs or report.forced_assignments or report.dropped_doctors:
+        print(f"✂️  Presolve: {n_pairs} -> {reduced.n_pairs} variáveis | {report.forced_assignments} obrigatória(s) | "
+              f"{report.dropped_doctors} médico(s) fora do modelo | {report.elapsed_ms:.1f}ms")
+    return Reduction(reduced, pair_map, forced_idx, report)
+
+
+def merge_reports(reports: Iterable[Optional[PresolveReport]]) -> Optional[PresolveReport]:
+    """Soma os relatórios dos subproblemas (componentes da decomposição, janelas do horizonte)."""
+    reports = [r for r in reports if r is not None]
+    if not reports:
+        return None
+    return PresolveReport(
+        variables_before=sum(r.variables_before for r in reports),
+        variables_after=sum(r.variables_after for r in reports),
+        forced_assignments=sum(r.forced_assignments for r in reports),
+        resolved_slots=sum(r.resolved_slots for r in reports),
+        dropped_doctors=sum(r.dropped_doctors for r in reports),
+        tightened_bounds=sum(r.tightened_bounds for r in reports),
+        rounds=max(r.rounds for r in reports),
+        elapsed_ms=round(sum(r.elapsed_ms for r in reports), 3)
+    )
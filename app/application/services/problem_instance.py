@@ -0,0 +1,356 @@
+import math
+import sys
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.domain.models import OptimizationRequest, RosterSolution, SpecialtyEnum
+
+# Uma posição de bit por especialidade conhecida (SpecialtyEnum tem bem menos de 64)
+SPECIALTY_BITS: Dict[str, int] = {s.value: 1 << i for i, s in enumerate(SpecialtyEnum)}
+
+
+def specialty_mask(specialties) -> int:
+    """Lista de especialidades -> bitmask. Especialidades desconhecidas não casam com ninguém."""
+    mask = 0
+    for specialty in specialties:
+        mask |= SPECIALTY_BITS.get(getattr(specialty, "value", specialty), 0)
+    return mask
+
+
+def specialty_names(mask: int) -> List[str]:
+    """Bitmask -> especialidades, na ordem do SpecialtyEnum."""
+    return [name for name, bit in SPECIALTY_BITS.items() if mask & bit]
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array = np.ascontiguousarray(array)
+    array.flags.writeable = False
+    return array
+
+
+class ProblemInstance:
+    """
+    Entrada do solver: um OptimizationRequest compilado uma única vez em arrays.
+
+    Médicos são linhas (i) e slots são colunas (j); ids ficam em tuplas de strings
+    internadas. Especialidades viram bitmasks, datas viram índices de dia (a partir
+    de `base_date`) e horários viram minutos absolutos, de modo que plantões que
+    atravessam a meia-noite se comparam direto com os do dia seguinte.
+
+    Só os pares elegíveis (H2 + H3) são guardados, em vetores paralelos
+    (pair_doctor, pair_slot, pair_cost, pair_preferred) ordenados por médico e
+    depois por slot. A única matriz médico x slot é a máscara booleana de
+    elegibilidade, temporária, dentro de from_request(); a busca por (médico,
+    slot) é binária nos pares ordenados (find_pairs), então o que fica guardado
+    acompanha o número de variáveis do modelo, não o produto cartesiano.
+
+    A instância é imutável (arrays somente leitura, sem atributos novos) e
+    serializa só os arrays, então atravessa pools de processos sem custo de
+    reconstrução dos objetos pydantic.
+    """
+
+    __slots__ = (
+        # Identificação
+        "doctor_ids", "slot_ids", "base_date", "period_start", "period_end", "months",
+        # Por médico
+        "doctor_mask", "cost_per_hour", "max_shifts",
+        # Por slot
+        "slot_day", "slot_start", "slot_end", "slot_mask", "slot_required", "slot_month",
+        # Médico x mês: plantões já consumidos fora do modelo (H5)
+        "consumed",
+        # Pares elegíveis
+        "pair_doctor", "pair_slot", "pair_cost", "pair_preferred",
+        # Bônus extra por par no objetivo (estabilidade do reparo local; zero no solve normal)
+        "pair_bonus",
+        # Objetivo
+        "weight_cost", "weight_preference", "weight_fairness", "fairness_target",
+        # Alocações travadas e warm-start (índices de pares)
+        "fixed_pairs", "fixed_missing", "hint_pairs", "hint_total",
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            value = fields[name]
+            if isinstance(value, np.ndarray):
+                value = _frozen(value)
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ProblemInstance é imutável; use replace() ou subset().")
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name in self.__slots__:
+            object.__setattr__(self, name, state[name])
+
+    # --- Construção ---
+
+    @classmethod
+    def from_request(cls, request: OptimizationRequest) -> "ProblemInstance":
+        doctors, slots = request.doctors, request.slots_to_fill
+        n_doctors, n_slots = len(doctors), len(slots)
+
+        doctor_ids = tuple(sys.intern(d.id) for d in doctors)
+        slot_ids = tuple(sys.intern(s.id) for s in slots)
+
+        # --- Slots ---
+        base_date = min((s.date for s in slots), default=request.period_start)
+        slot_day = np.fromiter(((s.date - base_date).days for s in slots), dtype=np.int32, count=n_slots)
+        n_days = int(slot_day.max()) + 1 if n_slots else 0
+        slot_mask = np.fromiter((specialty_mask(s.required_specialties) for s in slots), dtype=np.int64, count=n_slots)
+        slot_required = np.fromiter((s.required_count for s in slots), dtype=np.int64, count=n_slots)
+
+        intervals = np.array([s.time_interval for s in slots], dtype=np.int64).reshape(n_slots, 2)
+        slot_start = slot_day.astype(np.int64) * 1440 + intervals[:, 0] * 60
+        slot_end = slot_day.astype(np.int64) * 1440 + intervals[:, 1] * 60
+
+        month_keys = [s.date.strftime('%Y-%m') for s in slots]
+        months = tuple(dict.fromkeys(month_keys))
+        month_index = {m: k for k, m in enumerate(months)}
+        slot_month = np.fromiter((month_index[m] for m in month_keys), dtype=np.int32, count=n_slots)
+
+        # --- Médicos ---
+        doctor_mask = np.fromiter((specialty_mask(d.specialties) for d in doctors), dtype=np.int64, count=n_doctors)
+        cost_per_hour = np.fromiter((d.attributes.cost_per_hour for d in doctors), dtype=np.float64, count=n_doctors)
+        max_shifts = np.fromiter((d.availability.max_shifts_per_month for d in doctors), dtype=np.int64, count=n_doctors)
+        unavailable = _day_matrix([d.availability.unavailable_dates for d in doctors], base_date, n_days)
+        preferred = _day_matrix([d.availability.preferred_dates for d in doctors], base_date, n_days)
+
+        consumed = np.zeros((n_doctors, len(months)), dtype=np.int64)
+        for i, doctor in enumerate(doctors):
+            for month, used in ((request.consumed_shifts or {}).get(doctor.id) or {}).items():
+                if month in month_index:
+                    consumed[i, month_index[month]] = used
+
+        # --- Elegibilidade (H2 + H3) e pares ---
+        # H3: alguma especialidade em comum; H2: não está indisponível no dia do slot
+        eligible = (doctor_mask[:, None] & slot_mask[None, :]) != 0
+        eligible &= ~unavailable[:, slot_day]
+        pair_doctor, pair_slot = np.nonzero(eligible)
+        slot_hours = (slot_end - slot_start) // 60
+        # Custo inteiro de cada par: int(custo_hora * horas), truncado como na versão em laços
+        pair_cost = np.trunc(cost_per_hour[pair_doctor] * slot_hours[pair_slot]).astype(np.int64)
+        pair_preferred = preferred[pair_doctor, slot_day[pair_slot]]
+
+        doctor_pos = {d: i for i, d in enumerate(doctor_ids)}
+        slot_pos = {s: j for j, s in enumerate(slot_ids)}
+
+        def lookup(assignments) -> Tuple[np.ndarray, int]:
+            """Pares (médico, slot) -> índices de pares elegíveis + quantos não têm variável."""
+            keys = list(dict.fromkeys((a.doctor_id, a.slot_id) for a in assignments or []))
+            known = [(doctor_pos[d], slot_pos[s]) for d, s in keys if d in doctor_pos and s in slot_pos]
+            found = _find_pairs(pair_doctor, pair_slot, n_slots, [i for i, _ in known], [j for _, j in known])
+            found = np.sort(found[found >= 0])
+            return found, len(keys) - len(found)
+
+        fixed_pairs, fixed_missing = lookup(request.fixed_assignments)
+        hint_pairs, hint_discarded = lookup(request.previous_roster)
+
+        return cls(
+            doctor_ids=doctor_ids, slot_ids=slot_ids, base_date=base_date,
+            period_start=request.period_start, period_end=request.period_end, months=months,
+            doctor_mask=doctor_mask, cost_per_hour=cost_per_hour, max_shifts=max_shifts,
+            slot_day=slot_day, slot_start=slot_start, slot_end=slot_end, slot_mask=slot_mask,
+            slot_required=slot_required, slot_month=slot_month,
+            consumed=consumed,
+            pair_doctor=pair_doctor.astype(np.int32), pair_slot=pair_slot.astype(np.int32),
+            pair_cost=pair_cost, pair_preferred=pair_preferred,
+            pair_bonus=np.zeros(len(pair_doctor), dtype=np.int64),
+            weight_cost=request.weight_cost, weight_preference=request.weight_preference,
+            weight_fairness=request.weight_fairness, fairness_target=request.fairness_target,
+            fixed_pairs=fixed_pairs, fixed_missing=fixed_missing,
+            hint_pairs=hint_pairs, hint_total=len(hint_pairs) + hint_discarded,
+        )
+
+    def replace(self, **changes) -> "ProblemInstance":
+        """Cópia com alguns campos trocados (arrays não alterados são compartilhados)."""
+        fields = self.__getstate__()
+        fields.update(changes)
+        return ProblemInstance(**fields)
+
+    def subset(
+        self,
+        doctor_idx: Sequence[int],
+        slot_idx: Sequence[int],
+        pair_mask: Optional[np.ndarray] = None
+    ) -> Tuple["ProblemInstance", np.ndarray]:
+        """
+        Subproblema com os médicos/slots escolhidos (na ordem dada).
+        `pair_mask` (booleano por par) exclui pares adicionais, ex.: quem colide
+        com uma alocação mantida fora do subproblema.
+        Devolve também `pair_map`: par k do subproblema -> par no problema original.
+        Alocações travadas/hints fora do subconjunto são descartadas.
+        """
+        doctor_idx = np.asarray(doctor_idx, dtype=np.int64)
+        slot_idx = np.asarray(slot_idx, dtype=np.int64)
+        new_doctor = np.full(self.n_doctors, -1, dtype=np.int64)
+        new_doctor[doctor_idx] = np.arange(len(doctor_idx))
+        new_slot = np.full(self.n_slots, -1, dtype=np.int64)
+        new_slot[slot_idx] = np.arange(len(slot_idx))
+
+        sub_doctor = new_doctor[self.pair_doctor]
+        sub_slot = new_slot[self.pair_slot]
+        kept = (sub_doctor >= 0) & (sub_slot >= 0)
+        if pair_mask is not None:
+            kept &= pair_mask
+        # Reordena os pares mantidos por (médico, slot) na numeração nova
+        kept_idx = np.nonzero(kept)[0]
+        order = np.lexsort((sub_slot[kept_idx], sub_doctor[kept_idx]))
+        pair_map = kept_idx[order]
+        old_to_new = np.full(self.n_pairs, -1, dtype=np.int64)
+        old_to_new[pair_map] = np.arange(len(pair_map))
+
+        def remap(pairs: np.ndarray) -> np.ndarray:
+            mapped = old_to_new[pairs] if len(pairs) else pairs
+            return np.sort(mapped[mapped >= 0])
+
+        hint_pairs = remap(self.hint_pairs)
+        return self.replace(
+            doctor_ids=tuple(self.doctor_ids[i] for i in doctor_idx.tolist()),
+            slot_ids=tuple(self.slot_ids[j] for j in slot_idx.tolist()),
+            doctor_mask=self.doctor_mask[doctor_idx], cost_per_hour=self.cost_per_hour[doctor_idx],
+            max_shifts=self.max_shifts[doctor_idx], consumed=self.consumed[doctor_idx],
+            slot_day=self.slot_day[slot_idx], slot_start=self.slot_start[slot_idx],
+            slot_end=self.slot_end[slot_idx], slot_mask=self.slot_mask[slot_idx],
+            slot_required=self.slot_required[slot_idx], slot_month=self.slot_month[slot_idx],
+            pair_doctor=sub_doctor[pair_map].astype(np.int32), pair_slot=sub_slot[pair_map].astype(np.int32),
+            pair_cost=self.pair_cost[pair_map], pair_preferred=self.pair_preferred[pair_map],
+            pair_bonus=self.pair_bonus[pair_map],
+            fixed_pairs=remap(self.fixed_pairs), fixed_missing=0,
+            hint_pairs=hint_pairs, hint_total=len(hint_pairs),
+        ), pair_map
+
+    # --- Consultas ---
+
+    @property
+    def n_doctors(self) -> int:
+        return len(self.doctor_ids)
+
+    @property
+    def n_slots(self) -> int:
+        return len(self.slot_ids)
+
+    @property
+    def n_pairs(self) -> int:
+        return len(self.pair_doctor)
+
+    def find_pairs(self, doctor_idx: Sequence[int], slot_idx: Sequence[int]) -> np.ndarray:
+        """(médico, slot) -> índice do par elegível (-1 se inelegível), por busca binária nos pares ordenados."""
+        return _find_pairs(self.pair_doctor, self.pair_slot, self.n_slots, doctor_idx, slot_idx)
+
+    def slot_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pares agrupados por slot: os do slot j são order[bounds[j]:bounds[j + 1]],
+        em ordem de médico. Temporário, para a modelagem.
+        """
+        order = np.argsort(self.pair_slot, kind='stable')
+        bounds = np.searchsorted(self.pair_slot[order], np.arange(self.n_slots + 1))
+        return order, bounds
+
+    def pair_coeffs(self) -> np.ndarray:
+        """Coeficiente de cada par no objetivo (maximização): preferência (S2) menos custo (S1), mais o bônus."""
+        return (
+            self.pair_preferred.astype(np.int64) * 50 * int(self.weight_preference)
+            - self.pair_cost * int(self.weight_cost)
+            + self.pair_bonus
+        )
+
+    def objective_value(self, pairs: np.ndarray) -> float:
+        """Objetivo do modelo completo (S1 + S2 + S3) para uma escala dada em índices de pares."""
+        value = int(self.pair_coeffs()[pairs].sum())
+        if self.weight_fairness > 0:
+            counts = np.bincount(self.pair_doctor[pairs], minlength=self.n_doctors)
+            value -= 1000 * int(self.weight_fairness) * int(np.abs(counts - self.default_fairness_target()).sum())
+        return float(value)
+
+    def default_fairness_target(self) -> int:
+        """Média ideal de plantões por médico (arredondada para baixo)."""
+        if self.fairness_target is not None:
+            return self.fairness_target
+        return math.floor(int(self.slot_required.sum()) / self.n_doctors) if self.n_doctors else 0
+
+    def slot_date(self, j: int) -> date:
+        return self.base_date + timedelta(days=int(self.slot_day[j]))
+
+    def to_solutions(self, pairs: np.ndarray) -> List[RosterSolution]:
+        """Índices de pares -> RosterSolution (na ordem recebida)."""
+        dates: Dict[int, date] = {}
+        solutions = []
+        for i, j in zip(self.pair_doctor[pairs].tolist(), self.pair_slot[pairs].tolist()):
+            day = dates.get(j)
+            if day is None:
+                day = dates[j] = self.slot_date(j)
+            solutions.append(RosterSolution(slot_id=self.slot_ids[j], doctor_id=self.doctor_ids[i], date=day))
+        return solutions
+
+    def pairs_of(self, assignments: Optional[List[RosterSolution]]) -> np.ndarray:
+        """RosterSolution -> índices de pares (ignora os que não existem nesta instância)."""
+        if not assignments:
+            return np.zeros(0, dtype=np.int64)
+        doctor_pos = {d: i for i, d in enumerate(self.doctor_ids)}
+        slot_pos = {s: j for j, s in enumerate(self.slot_ids)}
+        known = [
+            (doctor_pos[a.doctor_id], slot_pos[a.slot_id]) for a in assignments
+            if a.doctor_id in doctor_pos and a.slot_id in slot_pos
+        ]
+        found = self.find_pairs([i for i, _ in known], [j for _, j in known])
+        return np.unique(found[found >= 0])
+
+
+def _find_pairs(pair_doctor: np.ndarray, pair_slot: np.ndarray, n_slots: int, doctor_idx, slot_idx) -> np.ndarray:
+    """Busca binária de (médico, slot) nos pares ordenados por médico e depois por slot (-1 se não existe)."""
+    wanted = np.asarray(doctor_idx, dtype=np.int64) * n_slots + np.asarray(slot_idx, dtype=np.int64)
+    if len(pair_doctor) == 0:
+        return np.full(len(wanted), -1, dtype=np.int64)
+    keys = pair_doctor.astype(np.int64) * n_slots + pair_slot
+    pos = np.searchsorted(keys, wanted)
+    found = keys[np.minimum(pos, len(keys) - 1)] == wanted
+    return np.where(found, pos, -1).astype(np.int64)
+
+
+def _day_matrix(dates_per_doctor, base_date: date, n_days: int) -> np.ndarray:
+    """Datas por médico -> matriz booleana médico x dia (datas fora do período são ignoradas)."""
+    matrix = np.zeros((len(dates_per_doctor), n_days), dtype=bool)
+    rows, cols = [], []
+    for i, dates in enumerate(dates_per_doctor):
+        for d in dates:
+            day = (d - base_date).days
+            if 0 <= day < n_days:
+                rows.append(i)
+                cols.append(day)
+    matrix[rows, cols] = True
+    return matrix
+
+
+def overlap_cliques(starts: np.ndarray, ends: np.ndarray) -> List[np.ndarray]:
+    """
+    Cliques máximas de intervalos mutuamente sobrepostos (sweep-line).
+    Fim == início não conta como colisão (troca de turno); intervalos vazios são ignorados.
+    """
+    idx = np.nonzero(ends > starts)[0]
+    if len(idx) == 0:
+        return []
+    times = np.concatenate([starts[idx], ends[idx]])
+    # Tipo 0 = fim, 1 = início: no mesmo instante os fins vêm primeiro
+    kinds = np.concatenate([np.ones(len(idx), dtype=np.int8), np.zeros(len(idx), dtype=np.int8)])
+    owners = np.concatenate([idx, idx])
+    order = np.lexsort((owners, kinds, times))
+
+    cliques = []
+    active: Dict[int, None] = {}
+    last_was_start = False
+    for kind, owner in zip(kinds[order].tolist(), owners[order].tolist()):
+        if kind == 1:
+            active[owner] = None
+            last_was_start = True
+        else:
+            # Um fim logo após um início fecha uma clique máxima
+            if last_was_start and len(active) > 1:
+                cliques.append(np.fromiter(active, dtype=np.int64, count=len(active)))
+            active.pop(owner, None)
+            last_was_start = False
+    return cliques
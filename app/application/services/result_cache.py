@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, FrozenSet, Optional
+
+from app.core.config import settings
+from app.domain.models import OptimizationRequest, OptimizationResult
+from app.infrastructure.repositories.doctor_repository import register_write_listener
+
+# Status determinísticos o suficiente para reaproveitar. UNKNOWN (estourou o
+# tempo sem solução) não é cacheado: uma nova tentativa pode ter mais sorte.
+CACHEABLE_STATUSES = {"OPTIMAL", "FEASIBLE", "INFEASIBLE"}
+
+
+def request_fingerprint(request: OptimizationRequest) -> str:
+    """
+    Hash canônico do OptimizationRequest completo (médicos do banco + slots + pesos).
+    A ordem de médicos e slots não importa: ordenamos por id antes de serializar.
+    """
+    data = request.model_dump(mode='json')
+    data["doctors"] = sorted(data["doctors"], key=lambda d: d["id"])
+    data["slots_to_fill"] = sorted(data["slots_to_fill"], key=lambda s: s["id"])
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _CacheEntry:
+    __slots__ = ("result", "doctor_ids", "size", "expires_at")
+
+    def __init__(self, result: OptimizationResult, doctor_ids: FrozenSet[str], size: int, expires_at: float):
+        self.result = result
+        self.doctor_ids = doctor_ids
+        self.size = size
+        self.expires_at = expires_at
+
+
+class RosterResultCache:
+    """
+    Cache de resultados de otimização endereçado por conteúdo.
+
+    - LRU com TTL e limite de memória (tamanho estimado pelo JSON do resultado).
+    - Single-flight: pedidos idênticos que chegam enquanto o primeiro está
+      resolvendo aguardam o mesmo solve em vez de disparar outro.
+    - Escritas no DoctorRepository removem as entradas que usaram aquele médico.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._bytes = 0
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get_or_compute(
+        self,
+        request: OptimizationRequest,
+        compute: Callable[[], Awaitable[OptimizationResult]]
+    ) -> OptimizationResult:
+        key = request_fingerprint(request)
+
+        cached = self._get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            # shield: se este cliente desistir, o solve compartilhado continua
+            return await asyncio.shield(in_flight)
+
+        self.misses += 1
+        task = asyncio.ensure_future(compute())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda t: self._on_computed(key, request, t))
+        return await asyncio.shield(task)
+
+    def invalidate_doctor(self, doctor_id: str) -> int:
+        """Remove as entradas cujo request incluía o médico. Retorna quantas saíram."""
+        stale = [key for key, entry in self._entries.items() if doctor_id in entry.doctor_ids]
+        for key in stale:
+            self._remove(key)
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "in_flight": len(self._in_flight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    # --- Internos ---
+
+    def _get(self, key: str) -> Optional[OptimizationResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.result
+
+    def _on_computed(self, key: str, request: OptimizationRequest, task: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if result.status in CACHEABLE_STATUSES:
+            self._put(key, request, result)
+
+    def _put(self, key: str, request: OptimizationRequest, result: OptimizationResult) -> None:
+        size = len(result.model_dump_json())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _CacheEntry(
+            result=result,
+            doctor_ids=frozenset(d.id for d in request.doctors),
+            size=size,
+            expires_at=time.monotonic() + self.ttl_seconds
+        )
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+
+_cache: Optional[RosterResultCache] = None
+
+
+def get_result_cache() -> RosterResultCache:
+    """Cache único do processo da API, configurado via settings."""
+    global _cache
+    if _cache is None:
+        _cache = RosterResultCache(
+            max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+        )
+        register_write_listener(_cache.invalidate_doctor)
+    return _cache
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from typing import List, Optional
+
+import numpy as np
+
+from app.domain.models import (
+    OptimizationRequest,
+    OptimizationResult,
+    RollingHorizonSettings
+)
+from app.application.services.optimizer_service import (
+    InstanceSolution, RosterOptimizerService, _hint_report, merge_engines
+)
+from app.application.services.presolve import merge_reports
+from app.application.services.problem_instance import ProblemInstance
+
+# Plantões terminam no máximo às 07h do dia seguinte (time_interval <= 31h),
+# então só os slots do último dia congelado podem colidir com a próxima janela
+BOUNDARY_DAYS = 1
+
+
+class RollingHorizonService:
+    """
+    Resolve horizontes longos (trimestre, ano) em janelas sobrepostas.
+
+    Cada janela planeja `plan_days` dias, mas só congela os primeiros
+    `commit_days`; a janela seguinte começa logo após o trecho congelado.
+    Entre janelas carregamos:
+    - os plantões já consumidos por médico/mês (limite H5 mensal);
+    - as alocações da fronteira (último dia congelado), travadas no modelo
+      para que o choque de horário (H4) com a janela nova seja respeitado.
+    Cada modelo tem tamanho limitado pela janela, então tempo e memória crescem
+    linearmente com o horizonte.
+    """
+
+    def __init__(self, inner=None):
+        # `inner` resolve cada janela (RosterOptimizerService ou DecomposedOptimizerService)
+        self.inner = inner or RosterOptimizerService()
+
+    def solve_detailed(self, request: OptimizationRequest, num_workers: Optional[int] = None) -> OptimizationResult:
+        instance = ProblemInstance.from_request(request)
+        return self.solve_instance(instance, request.rolling_horizon, num_workers=num_workers).to_result(instance)
+
+    def solve_instance(
+        self,
+        instance: ProblemInstance,
+        horizon: Optional[RollingHorizonSettings] = None,
+        num_workers: Optional[int] = None
+    ) -> InstanceSolution:
+        horizon = horizon or RollingHorizonSettings()
+        if instance.n_slots == 0:
+            return self.inner.solve_instance(instance, num_workers=num_workers)
+
+        slot_day = instance.slot_day
+        last_day = int(slot_day.max())
+        month_of_pair = instance.slot_month[instance.pair_slot]
+
+        committed: List[np.ndarray] = []
+        engines = set()
+        presolve_reports = []
+        last_committed = np.zeros(0, dtype=np.int64)
+        # Plantões congelados por médico/mês (somados ao que já vinha consumido no request)
+        consumed = instance.consumed.copy()
+        wall_time = 0.0
+        windows = 0
+        all_optimal = True
+
+        window_start = 0  # Dias contados a partir do primeiro slot (instance.base_date)
+        while window_start <= last_day:
+            window_end = window_start + horizon.plan_days - 1
+            commit_end = window_start + horizon.commit_days - 1
+            is_last = window_end >= last_day
+
+            window_slots = np.nonzero((slot_day >= window_start) & (slot_day <= window_end))[0]
+
+            # Fronteira: alocações recém-congeladas que ainda podem colidir com esta janela
+            boundary = last_committed[slot_day[instance.pair_slot[last_committed]] >= window_start - BOUNDARY_DAYS]
+            boundary_slots = np.unique(instance.pair_slot[boundary])
+
+            # Plantões consumidos fora do modelo (a fronteira já conta dentro dele)
+            window_consumed = consumed.copy()
+            np.subtract.at(window_consumed, (instance.pair_doctor[boundary], month_of_pair[boundary]), 1)
+
+            window, pair_map = instance.subset(
+                np.arange(instance.n_doctors), np.concatenate([boundary_slots, window_slots])
+            )
+            to_window = np.full(instance.n_pairs, -1, dtype=np.int64)
+            to_window[pair_map] = np.arange(len(pair_map))
+            window = window.replace(fixed_pairs=np.sort(to_window[boundary]), consumed=window_consumed)
+
+            result = self.inner.solve_instance(window, num_workers=num_workers)
+            wall_time += result.wall_time_seconds
+            windows += 1
+
+            if not result.feasible:
+                print(f"❌ Horizonte rolante: janela {instance.base_date + timedelta(days=window_start)} - "
+                      f"{instance.base_date + timedelta(days=window_end)} sem solução ({result.status})")
+                return InstanceSolution(
+                    status=result.status, wall_time_seconds=wall_time, infeasibility=result.infeasibility
+                )
+            all_optimal = all_optimal and result.status == "OPTIMAL"
+            engines.add(result.engine)
+            presolve_reports.append(result.presolve)
+
+            # Congela a parte inicial da janela (ou tudo, na última)
+            chosen = pair_map[result.pairs]
+            chosen_slots = instance.pair_slot[chosen]
+            keep = ~np.isin(chosen_slots, boundary_slots)
+            if not is_last:
+                keep &= slot_day[chosen_slots] <= commit_end
+            last_committed = chosen[keep]
+            committed.append(last_committed)
+            np.add.at(consumed, (instance.pair_doctor[last_committed], month_of_pair[last_committed]), 1)
+
+            if is_last:
+                break
+            window_start = commit_end + 1
+
+        pairs = np.sort(np.concatenate(committed))
+        print(f"✅ Horizonte rolante: {windows} janelas | {len(pairs)} plantões | {wall_time:.2f}s")
+        return InstanceSolution(
+            # Cada janela pode ser ótima, mas o horizonte completo não tem prova de otimalidade
+            status="OPTIMAL" if all_optimal and windows == 1 else "FEASIBLE",
+            pairs=pairs,
+            objective_value=instance.objective_value(pairs),
+            wall_time_seconds=wall_time,
+            hint=_hint_report(instance, pairs),
+            engine=merge_engines(engines),
+            presolve=merge_reports(presolve_reports)
+        )
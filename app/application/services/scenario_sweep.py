@@ -0,0 +1,170 @@
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.domain.models import (
+    ObjectiveBreakdown,
+    OptimizationRequest,
+    ScenarioResult,
+    ScenarioVariant
+)
+from app.application.services.decomposition import component_pool_size, get_component_pool
+from app.application.services.feasibility import check_feasibility
+from app.application.services.local_repair import apply_change
+from app.application.services.optimizer_service import InstanceSolution, RosterOptimizerService
+from app.application.services.problem_instance import ProblemInstance
+
+Weights = Tuple[float, float, float]
+
+
+def _solve_weight_chunk(instance: ProblemInstance, weights: List[Weights], num_workers: int) -> List[InstanceSolution]:
+    """
+    Ponto de entrada no pool de processos: monta as restrições uma única vez e
+    resolve cada conjunto de pesos sobre uma cópia do modelo (só o objetivo muda).
+    """
+    service = RosterOptimizerService()
+    base = service.build_constraints(instance)
+    return [
+        service.solve_instance(
+            instance.replace(weight_cost=cost, weight_preference=preference, weight_fairness=fairness),
+            num_workers=num_workers, base=base
+        )
+        for cost, preference, fairness in weights
+    ]
+
+
+def _solve_what_if(instance: ProblemInstance, num_workers: int) -> InstanceSolution:
+    """Variante what-if: estrutura própria, solve completo (pré-checagem incluída)."""
+    return RosterOptimizerService().solve_instance(instance, num_workers=num_workers)
+
+
+def objective_breakdown(instance: ProblemInstance, pairs: np.ndarray) -> ObjectiveBreakdown:
+    """Custo, preferências atendidas e desvio da média de uma escala, independentes dos pesos."""
+    counts = np.bincount(instance.pair_doctor[pairs], minlength=instance.n_doctors)
+    return ObjectiveBreakdown(
+        total_cost=int(instance.pair_cost[pairs].sum()),
+        preference_hits=int(instance.pair_preferred[pairs].sum()),
+        fairness_deviation=int(np.abs(counts - instance.default_fairness_target()).sum()),
+        assignments=len(pairs)
+    )
+
+
+def mark_pareto(results: List[ScenarioResult]) -> None:
+    """
+    Marca as variantes não dominadas: nenhuma outra tem custo, desvio de equidade
+    menores ou iguais e preferências atendidas maiores ou iguais, sendo estritamente
+    melhor em pelo menos um deles. Variantes sem escala nunca entram na fronteira.
+    """
+    points = [
+        (r, (r.breakdown.total_cost, -r.breakdown.preference_hits, r.breakdown.fairness_deviation))
+        for r in results if r.breakdown is not None
+    ]
+    for result, point in points:
+        result.pareto_optimal = not any(
+            all(a <= b for a, b in zip(other, point)) and other != point
+            for _, other in points
+        )
+
+
+class ScenarioSweepService:
+    """
+    Varredura de pesos / cenários what-if sobre um mesmo conjunto de médicos e slots.
+
+    O request é compilado e pré-checado uma única vez. As variantes que só mudam
+    pesos são divididas em lotes, um por processo do pool: cada processo monta as
+    restrições do CP-SAT uma vez e resolve seus pesos sobre cópias do modelo.
+    Variantes what-if (RosterChange) mudam a estrutura e são resolvidas à parte.
+    Os resultados trazem o objetivo decomposto e a marcação da fronteira de Pareto.
+    """
+
+    def __init__(self, parallel: Optional[bool] = None):
+        # parallel=False resolve tudo em sequência no processo atual
+        self.parallel = parallel if parallel is not None else component_pool_size() > 1
+
+    def sweep(
+        self,
+        request: OptimizationRequest,
+        variants: List[ScenarioVariant],
+        num_workers: Optional[int] = None,
+        include_solutions: bool = True
+    ) -> List[ScenarioResult]:
+        started = time.perf_counter()
+        instance = ProblemInstance.from_request(request)
+
+        weights: List[Weights] = [
+            (
+                request.weight_cost if v.weight_cost is None else v.weight_cost,
+                request.weight_preference if v.weight_preference is None else v.weight_preference,
+                request.weight_fairness if v.weight_fairness is None else v.weight_fairness,
+            )
+            for v in variants
+        ]
+        instances: List[ProblemInstance] = []
+        for v, (cost, preference, fairness) in zip(variants, weights):
+            if v.change is None:
+                instances.append(instance.replace(
+                    weight_cost=cost, weight_preference=preference, weight_fairness=fairness
+                ))
+            else:
+                instances.append(ProblemInstance.from_request(apply_change(request, v.change).model_copy(update={
+                    "weight_cost": cost, "weight_preference": preference, "weight_fairness": fairness
+                })))
+
+        outcomes: List[Optional[InstanceSolution]] = [None] * len(variants)
+        shared = [k for k, v in enumerate(variants) if v.change is None]
+        what_if = [k for k, v in enumerate(variants) if v.change is not None]
+
+        # A viabilidade não depende dos pesos: uma pré-checagem vale para todas as variantes de pesos
+        if shared:
+            precheck = check_feasibility(instance)
+            if precheck.issues:
+                for k in shared:
+                    outcomes[k] = InstanceSolution(status="INFEASIBLE", infeasibility=precheck)
+                shared = []
+
+        total_workers = num_workers or 8
+        n_chunks = min(len(shared), component_pool_size()) if self.parallel else min(len(shared), 1)
+        chunks = [shared[c::n_chunks] for c in range(n_chunks)]
+        n_tasks = len(chunks) + len(what_if)
+        if self.parallel and n_tasks > 1:
+            pool = get_component_pool()
+            per_task = max(1, total_workers // min(n_tasks, component_pool_size()))
+            chunk_futures = [
+                pool.submit(_solve_weight_chunk, instance, [weights[k] for k in chunk], per_task) for chunk in chunks
+            ]
+            what_if_futures = [pool.submit(_solve_what_if, instances[k], per_task) for k in what_if]
+            for chunk, future in zip(chunks, chunk_futures):
+                for k, outcome in zip(chunk, future.result()):
+                    outcomes[k] = outcome
+            for k, future in zip(what_if, what_if_futures):
+                outcomes[k] = future.result()
+        else:
+            for chunk in chunks:
+                for k, outcome in zip(chunk, _solve_weight_chunk(instance, [weights[k] for k in chunk], total_workers)):
+                    outcomes[k] = outcome
+            for k in what_if:
+                outcomes[k] = _solve_what_if(instances[k], total_workers)
+
+        results = []
+        for k, (v, outcome) in enumerate(zip(variants, outcomes)):
+            cost, preference, fairness = weights[k]
+            results.append(ScenarioResult(
+                name=v.name or f"variante_{k + 1}",
+                weight_cost=cost,
+                weight_preference=preference,
+                weight_fairness=fairness,
+                status=outcome.status,
+                engine=outcome.engine,
+                objective_value=outcome.objective_value,
+                wall_time_seconds=outcome.wall_time_seconds,
+                breakdown=objective_breakdown(instances[k], outcome.pairs) if outcome.feasible else None,
+                infeasibility=outcome.infeasibility,
+                solutions=instances[k].to_solutions(outcome.pairs) if include_solutions else []
+            ))
+        mark_pareto(results)
+
+        print(f"📊 Varredura: {len(variants)} variante(s) ({len(variants) - len(what_if)} de pesos, "
+              f"{len(what_if)} what-if) | {sum(r.pareto_optimal for r in results)} na fronteira de Pareto | "
+              f"{time.perf_counter() - started:.2f}s")
+        return results
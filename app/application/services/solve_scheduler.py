@@ -0,0 +1,215 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app.core.config import settings
+
+
+class SolverOverloadedError(RuntimeError):
+    """A fila de solves está cheia (ou o tempo de espera estourou)."""
+
+
+class SolveLease:
+    """
+    Permissão para rodar um solve com `num_workers` threads do CP-SAT.
+    Deve ser devolvida com release() (ou usada como context manager).
+    """
+
+    def __init__(self, scheduler: "SolveScheduler", num_workers: int, wait_seconds: float):
+        self._scheduler = scheduler
+        self.num_workers = num_workers
+        self.wait_seconds = wait_seconds
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._scheduler._release(self)
+
+    def __enter__(self) -> "SolveLease":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class _Waiter:
+    """Pedido na fila. Sabe acordar tanto uma thread quanto uma corrotina."""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.enqueued_at = time.monotonic()
+        self.lease: Optional[SolveLease] = None
+        self._event = threading.Event() if loop is None else None
+        self._loop = loop
+        self.future: Optional[asyncio.Future] = loop.create_future() if loop is not None else None
+
+    def grant(self, lease: SolveLease) -> None:
+        self.lease = lease
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(self.lease)
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        return self._event.wait(timeout)
+
+
+class SolveScheduler:
+    """
+    Controle de admissão dos solves do processo.
+
+    - No máximo `max_concurrent` solves rodam ao mesmo tempo; os demais esperam
+      em fila FIFO de até `max_queue` pedidos (além disso, SolverOverloadedError).
+    - Cada solve admitido recebe um número de workers do CP-SAT proporcional à
+      carga atual, limitado aos núcleos livres de `core_budget`. Como o CP-SAT não
+      muda de threads no meio da busca, garantimos ao menos 1 worker por solve:
+      o excesso sobre o orçamento fica limitado a poucas threads, nunca 8 por solve.
+    """
+
+    def __init__(
+        self,
+        core_budget: int,
+        max_concurrent: int,
+        max_queue: int,
+        max_workers_per_solve: int = 8,
+    ):
+        self.core_budget = max(1, core_budget)
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_workers_per_solve = max(1, max_workers_per_solve)
+
+        self._lock = threading.Lock()
+        self._waiters: Deque[_Waiter] = deque()
+        self._running = 0
+        self._cores_in_use = 0
+
+        # Métricas
+        self._admitted = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    # --- API pública ---
+
+    def acquire(self, timeout: Optional[float] = None) -> SolveLease:
+        """Versão bloqueante (threads, scripts)."""
+        with self._lock:
+            waiter = self._enqueue(_Waiter())
+        if not waiter.wait(timeout):
+            self._abandon(waiter)
+        if waiter.lease is None:
+            self._timed_out()
+        return waiter.lease
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> SolveLease:
+        """Versão para o event loop: espera na fila sem bloquear outras requisições."""
+        with self._lock:
+            waiter = self._enqueue(_Waiter(asyncio.get_running_loop()))
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            if waiter.lease is None:
+                self._timed_out()
+            return waiter.lease
+        except asyncio.CancelledError:
+            # Cliente desistiu: se a vaga já tinha sido concedida, devolve
+            self._abandon(waiter)
+            if waiter.lease is not None:
+                waiter.lease.release()
+            raise
+
+    def stats(self) -> Dict[str, float]:
+        """Métricas de fila/carga para observabilidade."""
+        with self._lock:
+            now = time.monotonic()
+            oldest_wait = now - self._waiters[0].enqueued_at if self._waiters else 0.0
+            return {
+                "core_budget": self.core_budget,
+                "max_concurrent": self.max_concurrent,
+                "running": self._running,
+                "cores_in_use": self._cores_in_use,
+                "queue_depth": len(self._waiters),
+                "oldest_wait_seconds": round(oldest_wait, 3),
+                "admitted_total": self._admitted,
+                "rejected_total": self._rejected,
+                "avg_wait_seconds": round(self._total_wait / self._admitted, 3) if self._admitted else 0.0,
+                "max_wait_seconds": round(self._max_wait, 3),
+            }
+
+    # --- Internos (_enqueue/_dispatch rodam com self._lock já adquirido) ---
+
+    def _enqueue(self, waiter: _Waiter) -> _Waiter:
+        if len(self._waiters) >= self.max_queue and self._running >= self.max_concurrent:
+            self._rejected += 1
+            raise SolverOverloadedError(
+                f"Fila de otimização cheia ({len(self._waiters)} aguardando, {self._running} em execução)."
+            )
+        self._waiters.append(waiter)
+        self._dispatch()
+        return waiter
+
+    def _dispatch(self) -> None:
+        while self._waiters and self._running < self.max_concurrent:
+            waiter = self._waiters.popleft()
+            # Divide o orçamento entre quem roda, quem entra agora e quem vem em seguida:
+            # os pedidos já na fila ou, se não há fila, uma vaga de folga para o próximo
+            slots_left = self.max_concurrent - self._running - 1
+            pending = min(len(self._waiters), slots_left)
+            headroom = pending if pending else min(1, slots_left)
+            contenders = self._running + 1 + headroom
+            fair_share = self.core_budget // max(1, contenders)
+            free_cores = self.core_budget - self._cores_in_use
+            num_workers = max(1, min(self.max_workers_per_solve, fair_share, free_cores))
+
+            wait = time.monotonic() - waiter.enqueued_at
+            self._running += 1
+            self._cores_in_use += num_workers
+            self._admitted += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            waiter.grant(SolveLease(self, num_workers, wait))
+
+    def _release(self, lease: SolveLease) -> None:
+        with self._lock:
+            self._running -= 1
+            self._cores_in_use -= lease.num_workers
+            self._dispatch()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Remove um pedido que desistiu (timeout/cancelamento) se ainda não foi atendido."""
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _timed_out(self) -> None:
+        with self._lock:
+            self._rejected += 1
+        raise SolverOverloadedError("Tempo de espera na fila de otimização esgotado.")
+
+
+_scheduler: Optional[SolveScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_solve_scheduler() -> SolveScheduler:
+    """Scheduler único do processo, configurado via settings."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SolveScheduler(
+                core_budget=settings.SOLVER_CORE_BUDGET or os.cpu_count() or 1,
+                max_concurrent=settings.SOLVER_MAX_CONCURRENT,
+                max_queue=settings.SOLVER_MAX_QUEUE,
+                max_workers_per_solve=settings.SOLVER_MAX_WORKERS_PER_SOLVE,
+            )
+        return _scheduler
@@ -0,0 +1,174 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from app.core.config import settings
+from app.domain.models import (
+    OptimizationRequest, OptimizationResult, RosterProgress, RosterSolution, ScenarioResult, ScenarioVariant
+)
+from app.application.services.optimizer_service import RosterOptimizerService, SolveControl
+from app.application.services.decomposition import DecomposedOptimizerService, shutdown_component_pool
+from app.application.services.local_repair import LocalRepairService
+from app.application.services.rolling_horizon import RollingHorizonService
+from app.application.services.scenario_sweep import ScenarioSweepService
+from app.application.services.solve_scheduler import SolveLease, get_solve_scheduler
+
+# Pool compartilhado pelo processo da API (criado sob demanda)
+_executor: Optional[Executor] = None
+# Threads do streaming quando o pool principal é de processos (criado sob demanda)
+_stream_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _solve_in_worker(request: OptimizationRequest, num_workers: int) -> OptimizationResult:
+    """Ponto de entrada executado no pool (precisa ser top-level para ser picklable)."""
+    service = DecomposedOptimizerService() if settings.SOLVER_DECOMPOSE else RosterOptimizerService()
+    if request.rolling_horizon is not None:
+        service = RollingHorizonService(inner=service)
+    return service.solve_detailed(request, num_workers=num_workers)
+
+
+def _repair_in_worker(
+    request: OptimizationRequest,
+    current: List[RosterSolution],
+    neighborhood_days: int,
+    num_workers: int
+) -> OptimizationResult:
+    """Ponto de entrada do reparo local no pool (top-level para ser picklable)."""
+    return LocalRepairService().repair(request, current, neighborhood_days, num_workers=num_workers)
+
+
+def _sweep_in_worker(
+    request: OptimizationRequest,
+    variants: List[ScenarioVariant],
+    include_solutions: bool,
+    num_workers: int
+) -> List[ScenarioResult]:
+    """Ponto de entrada da varredura de pesos no pool (top-level para ser picklable)."""
+    return ScenarioSweepService().sweep(request, variants, num_workers=num_workers, include_solutions=include_solutions)
+
+
+def get_solver_executor() -> Executor:
+    """Retorna o pool limitado onde os solves rodam, criando-o na primeira chamada."""
+    global _executor
+    if _executor is None:
+        if settings.SOLVER_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.SOLVER_MAX_CONCURRENT)
+        elif settings.SOLVER_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.SOLVER_MAX_CONCURRENT,
+                thread_name_prefix="roster-solver"
+            )
+        else:
+            raise ValueError(f"SOLVER_EXECUTOR inválido: {settings.SOLVER_EXECUTOR!r} (use 'thread' ou 'process')")
+    return _executor
+
+
+async def _run_leased(lease: SolveLease, executor: Executor, fn: Callable, *args):
+    """
+    Submete `fn` ao pool e aguarda o resultado. O lease é devolvido no callback
+    de conclusão do future do pool, não quando quem espera desiste: cancelar a
+    corrotina não interrompe uma thread/processo que já começou, e os núcleos
+    continuam ocupados até o solve terminar (se ainda estava na fila do pool,
+    o future é cancelado e o callback roda na hora).
+    """
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        lease.release()
+        raise
+    future.add_done_callback(lambda _: lease.release())
+    return await asyncio.wrap_future(future)
+
+
+async def run_solve(request: OptimizationRequest) -> OptimizationResult:
+    """
+    Executa o solve (CPU-bound) no pool sem bloquear o event loop.
+    Antes passa pelo SolveScheduler, que limita a concorrência e define quantas
+    threads do CP-SAT este solve pode usar. Levanta SolverOverloadedError se a
+    fila estiver cheia ou a espera estourar SOLVER_QUEUE_TIMEOUT.
+    """
+    lease = await get_solve_scheduler().acquire_async(timeout=settings.SOLVER_QUEUE_TIMEOUT)
+    return await _run_leased(lease, get_solver_executor(), _solve_in_worker, request, lease.num_workers)
+
+
+async def run_repair(
+    request: OptimizationRequest,
+    current: List[RosterSolution],
+    neighborhood_days: int
+) -> OptimizationResult:
+    """Reparo local de uma escala gravada, com o mesmo controle de admissão do run_solve()."""
+    lease = await get_solve_scheduler().acquire_async(timeout=settings.SOLVER_QUEUE_TIMEOUT)
+    return await _run_leased(
+        lease, get_solver_executor(), _repair_in_worker, request, current, neighborhood_days, lease.num_workers
+    )
+
+
+async def run_sweep(
+    request: OptimizationRequest,
+    variants: List[ScenarioVariant],
+    include_solutions: bool = True
+) -> List[ScenarioResult]:
+    """
+    Varredura de pesos/what-if como um único solve admitido pelo SolveScheduler:
+    os núcleos do lease são divididos entre os processos das variantes.
+    """
+    lease = await get_solve_scheduler().acquire_async(timeout=settings.SOLVER_QUEUE_TIMEOUT)
+    return await _run_leased(
+        lease, get_solver_executor(), _sweep_in_worker, request, variants, include_solutions, lease.num_workers
+    )
+
+
+async def run_solve_streaming(
+    request: OptimizationRequest,
+    on_solution: Callable[[RosterProgress], None],
+    control: SolveControl,
+    diff: bool = True
+) -> OptimizationResult:
+    """
+    Variante de run_solve() que repassa cada incumbente para `on_solution`.
+    O callback roda na thread do solver, então o solve sempre usa threads
+    (com SOLVER_EXECUTOR="process" caímos num pool de threads próprio) e o
+    modelo não é decomposto.
+    """
+    lease = await get_solve_scheduler().acquire_async(timeout=settings.SOLVER_QUEUE_TIMEOUT)
+    executor = get_solver_executor()
+    if not isinstance(executor, ThreadPoolExecutor):
+        executor = _get_stream_executor()
+    try:
+        return await _run_leased(
+            lease,
+            executor,
+            lambda: RosterOptimizerService().solve_detailed(
+                request,
+                num_workers=lease.num_workers,
+                on_solution=on_solution,
+                diff=diff,
+                control=control
+            )
+        )
+    except asyncio.CancelledError:
+        # Quem esperava desistiu: interrompe a busca para liberar os núcleos
+        control.stop()
+        raise
+
+
+def _get_stream_executor() -> ThreadPoolExecutor:
+    global _stream_executor
+    if _stream_executor is None:
+        _stream_executor = ThreadPoolExecutor(
+            max_workers=settings.SOLVER_MAX_CONCURRENT,
+            thread_name_prefix="roster-stream"
+        )
+    return _stream_executor
+
+
+def shutdown_solver_executor() -> None:
+    """Encerra o pool (chamado no shutdown da aplicação)."""
+    global _executor, _stream_executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _stream_executor is not None:
+        _stream_executor.shutdown(wait=False, cancel_futures=True)
+        _stream_executor = None
+    shutdown_component_pool()
@@ -0,0 +1,207 @@
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from app.application.services.problem_instance import ProblemInstance, overlap_cliques
+
+# Só vale montar o modelo agregado se ele tiver no máximo esta fração das
+# variáveis do modelo por par (com poucos médicos repetidos não compensa)
+AGGREGATION_MAX_RATIO = 0.5
+
+
+def doctor_bounds(instance: ProblemInstance) -> np.ndarray:
+    """Pares ordenados por médico: os do médico i ficam em [bounds[i], bounds[i + 1])."""
+    return np.searchsorted(instance.pair_doctor, np.arange(instance.n_doctors + 1))
+
+
+def interchangeable_classes(instance: ProblemInstance) -> List[np.ndarray]:
+    """
+    Classes de médicos intercambiáveis: mesmos slots elegíveis, mesmo custo e
+    preferência em cada um, mesmo limite mensal e mesmos plantões consumidos.
+    Trocar dois deles entre si leva qualquer escala a outra escala viável com o
+    mesmo objetivo (a média ideal da equidade é a mesma para todos).
+    Todo médico com pelo menos um par aparece em exatamente uma classe (as de
+    um médico só incluídas); médicos com alocação travada ficam sozinhos.
+    """
+    bounds = doctor_bounds(instance)
+    locked = set(instance.pair_doctor[instance.fixed_pairs].tolist())
+    groups = {}
+    for i in range(instance.n_doctors):
+        lo, hi = int(bounds[i]), int(bounds[i + 1])
+        if lo == hi:
+            continue
+        if i in locked:
+            groups[("locked", i)] = [i]
+            continue
+        key = (
+            int(instance.max_shifts[i]),
+            instance.consumed[i].tobytes(),
+            instance.pair_slot[lo:hi].tobytes(),
+            instance.pair_cost[lo:hi].tobytes(),
+            instance.pair_preferred[lo:hi].tobytes(),
+            instance.pair_bonus[lo:hi].tobytes(),
+        )
+        groups.setdefault(key, []).append(i)
+    return [np.array(members, dtype=np.int64) for members in groups.values()]
+
+
+def aggregation_pays_off(instance: ProblemInstance, classes: List[np.ndarray]) -> bool:
+    """O modelo agregado tem no máximo AGGREGATION_MAX_RATIO das variáveis do modelo por par?"""
+    bounds = doctor_bounds(instance)
+    size = sum(int(bounds[members[0] + 1] - bounds[members[0]]) for members in classes)
+    return size <= AGGREGATION_MAX_RATIO * instance.n_pairs
+
+
+def solve_aggregated(
+    instance: ProblemInstance,
+    classes: List[np.ndarray],
+    forced: Optional[np.ndarray] = None,
+    hint_pairs: Optional[np.ndarray] = None,
+    num_workers: Optional[int] = None,
+    time_limit: float = 5.0,
+    on_solver=None
+) -> Optional[Tuple[str, np.ndarray, Optional[float], float]]:
+    """
+    Resolve o problema com uma variável inteira por (classe, slot) = quantos
+    médicos da classe pegam o slot, em vez de uma booleana por médico:
+
+    - H1: soma das classes no slot == required_count;
+    - H4: em cada clique de slots sobrepostos, no máximo |classe| plantões da classe;
+    - H5: por mês, no máximo |classe| * limite restante;
+    - S3: |plantões da classe - |classe| * média ideal| por classe, que nunca
+      passa da soma dos desvios individuais.
+
+    O modelo agregado é uma relaxação: o objetivo dele é um limite superior do
+    original. A desagregação percorre os slots da classe em ordem de início e
+    entrega cada vaga ao médico livre (H4) com limite no mês (H5) e menos
+    plantões até ali (empate: quem tinha o par no hint, depois o índice).
+    Se ela recuperar o objetivo agregado, a escala é ótima também no original.
+
+    Devolve (status, pares, objetivo real, segundos) ou None se a desagregação
+    esbarrar no limite mensal de algum médico (aí vale o modelo completo).
+    """
+    started = time.perf_counter()
+    bounds = doctor_bounds(instance)
+    coeffs = instance.pair_coeffs()
+    required = instance.slot_required
+    forced_mask = np.zeros(instance.n_pairs, dtype=bool)
+    forced_mask[instance.fixed_pairs] = True
+    if forced is not None:
+        forced_mask[forced] = True
+    hinted = np.zeros(instance.n_pairs, dtype=bool)
+    if hint_pairs is not None:
+        hinted[hint_pairs] = True
+
+    model = cp_model.CpModel()
+    var_of = []          # Por classe: slot -> variável (-1 sem par)
+    class_vars = []      # Por classe: variáveis na ordem dos pares do primeiro médico
+    class_upper = []     # Por classe: limite superior de cada variável
+    objective_vars, objective_coeffs = [], []
+    by_slot = [[] for _ in range(instance.n_slots)]
+    hint = []
+    for c, members in enumerate(classes):
+        k = len(members)
+        lo, hi = int(bounds[members[0]]), int(bounds[members[0] + 1])
+        slots = instance.pair_slot[lo:hi].astype(np.int64)
+        rows = np.stack([np.arange(bounds[i], bounds[i + 1]) for i in members.tolist()])
+        lower = forced_mask[rows].sum(axis=0)
+        upper = np.minimum(k, required[slots])
+        hint_counts = hinted[rows].sum(axis=0)
+        variables = []
+        for j, lb, ub, h in zip(slots.tolist(), lower.tolist(), upper.tolist(), hint_counts.tolist()):
+            var = model.NewIntVar(lb, max(lb, ub), f'n_{c}_{j}')
+            variables.append(var)
+            by_slot[j].append(var)
+            hint.append((var, min(h, ub)))
+        class_vars.append(variables)
+        class_upper.append(np.maximum(lower, upper))
+        mapping = np.full(instance.n_slots, -1, dtype=np.int64)
+        mapping[slots] = np.arange(len(slots))
+        var_of.append(mapping)
+        objective_vars.extend(variables)
+        objective_coeffs.extend(coeffs[lo:hi].tolist())
+
+        # H5: limite mensal da classe
+        months = instance.slot_month[slots]
+        for month in np.unique(months).tolist():
+            remaining = int(instance.max_shifts[members[0]]) - int(instance.consumed[members[0], month])
+            model.Add(cp_model.LinearExpr.Sum([variables[p] for p in np.flatnonzero(months == month).tolist()])
+                      <= k * remaining)
+
+    # H1: preenchimento obrigatório
+    for j in range(instance.n_slots):
+        model.Add(cp_model.LinearExpr.Sum(by_slot[j]) == int(required[j]))
+
+    # H4: em cada instante, no máximo |classe| médicos da classe trabalhando
+    for clique in overlap_cliques(instance.slot_start, instance.slot_end):
+        for c, members in enumerate(classes):
+            positions = var_of[c][clique]
+            positions = positions[positions >= 0]
+            if len(positions) < 2:
+                continue
+            if class_upper[c][positions].sum() <= len(members):
+                continue
+            model.Add(cp_model.LinearExpr.Sum([class_vars[c][p] for p in positions.tolist()]) <= len(members))
+
+    # S3: desvio agregado por classe; médicos sem par contam como constante
+    constant = 0
+    if instance.weight_fairness > 0:
+        target = instance.default_fairness_target()
+        weight = -1000 * int(instance.weight_fairness)
+        for c, members in enumerate(classes):
+            k = len(members)
+            total = cp_model.LinearExpr.Sum(class_vars[c])
+            deviation = model.NewIntVar(0, max(k * target, k * len(class_vars[c])), f'dev_{c}')
+            model.Add(deviation >= total - k * target)
+            model.Add(deviation >= k * target - total)
+            objective_vars.append(deviation)
+            objective_coeffs.append(weight)
+        constant = weight * target * int((np.diff(bounds) == 0).sum())
+    model.Maximize(cp_model.LinearExpr.WeightedSum(objective_vars, objective_coeffs) + constant)
+    for var, value in hint:
+        model.AddHint(var, value)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = num_workers or 8
+    solver.parameters.max_time_in_seconds = time_limit
+    if on_solver is not None:
+        on_solver(solver)
+    status = solver.Solve(model)
+    print(f"🔁 Modelo agregado: {len(classes)} classe(s) para {sum(len(m) for m in classes)} médicos | "
+          f"{len(objective_vars)} variáveis em vez de {instance.n_pairs} | {solver.StatusName(status)}")
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return solver.StatusName(status), np.zeros(0, dtype=np.int64), None, time.perf_counter() - started
+
+    # Desagregação determinística
+    slot_start, slot_end = instance.slot_start, instance.slot_end
+    chosen = []
+    for c, members in enumerate(classes):
+        lo, hi = int(bounds[members[0]]), int(bounds[members[0] + 1])
+        slots = instance.pair_slot[lo:hi].astype(np.int64)
+        counts = [solver.Value(var) for var in class_vars[c]]
+        busy_until = {i: np.iinfo(np.int64).min for i in members.tolist()}
+        remaining = {i: (instance.max_shifts[i] - instance.consumed[i]).tolist() for i in members.tolist()}
+        taken = {i: 0 for i in members.tolist()}
+        for p in np.lexsort((slots, slot_start[slots])).tolist():
+            if not counts[p]:
+                continue
+            j = int(slots[p])
+            month = int(instance.slot_month[j])
+            free = [i for i in members.tolist() if busy_until[i] <= slot_start[j] and remaining[i][month] > 0]
+            if len(free) < counts[p]:
+                print("⚠️  Modelo agregado: desagregação esbarrou no limite mensal, usando o modelo completo")
+                return None
+            free.sort(key=lambda i: (taken[i], not hinted[bounds[i] + p], i))
+            for i in free[:counts[p]]:
+                chosen.append(int(bounds[i]) + p)
+                busy_until[i] = max(busy_until[i], int(slot_end[j]))
+                remaining[i][month] -= 1
+                taken[i] += 1
+
+    pairs = np.sort(np.array(chosen, dtype=np.int64))
+    objective = instance.objective_value(pairs)
+    # Objetivos inteiros por construção: compara arredondado (o double do CP-SAT pode vir com ruído)
+    proven = status == cp_model.OPTIMAL and round(objective) == round(solver.ObjectiveValue())
+    return "OPTIMAL" if proven else "FEASIBLE", pairs, objective, time.perf_counter() - started
@@ -21,6 +21,12 @@ class ShiftTypeEnum(str, Enum):
     TARDE = "tarde"         # 13:00 - 19:00 (6h) - NOVO
     MISTO_24H = "misto_24h" # 07:00 - 07:00 (24h)
 
+class JobStatusEnum(str, Enum):
+    QUEUED = "queued"       # Aguardando um worker
+    RUNNING = "running"     # Reivindicado por um worker (com heartbeat)
+    DONE = "done"           # Solve concluído (resultado pode ser vazio = inviável)
+    FAILED = "failed"       # Erro no solve ou tentativas esgotadas
+
 # --- Entidades Principais ---
 
 class DoctorAttributes(BaseModel):
@@ -85,20 +91,202 @@ class RosterSolution(BaseModel):
     date: date
     is_extra_shift: bool = False
 
+class RollingHorizonSettings(BaseModel):
+    """Janelas do horizonte rolante: planeja `plan_days`, congela os primeiros `commit_days`"""
+    plan_days: int = Field(14, ge=1)
+    commit_days: int = Field(7, ge=1)
+
+    @validator('commit_days')
+    def check_commit(cls, v, values):
+        if 'plan_days' in values and v > values['plan_days']:
+            raise ValueError('commit_days deve ser menor ou igual a plan_days')
+        return v
+
 class OptimizationRequest(BaseModel):
     """Payload enviado para o motor de otimização"""
     period_start: date
     period_end: date
     doctors: List[Doctor]
     slots_to_fill: List[ShiftSlot]
+
+    # Warm-start: escala anterior usada como dica (hint) para o CP-SAT
+    previous_roster: Optional[List[RosterSolution]] = None
     
     # Pesos para a função objetivo (Soft Constraints)
     weight_cost: float = 1.0       # Minimizar custo
     weight_preference: float = 2.0 # Maximizar preferência do médico
     weight_fairness: float = 0.0   # Maximizar distribuição igualitária
+    # Média-alvo da equidade. Só é preenchida em subproblemas, para que usem a média do problema completo
+    fairness_target: Optional[int] = None
+
+    # Estado herdado de fora do modelo (horizonte rolante)
+    fixed_assignments: Optional[List[RosterSolution]] = None       # Pares que DEVEM estar na solução
+    consumed_shifts: Optional[Dict[str, Dict[str, int]]] = None    # médico -> {"AAAA-MM": plantões já usados}
+
+    # Se presente, resolve em janelas sobrepostas em vez de um único modelo
+    rolling_horizon: Optional[RollingHorizonSettings] = None
     
     @validator('period_end')
     def check_dates(cls, v, values):
         if 'period_start' in values and v < values['period_start']:
             raise ValueError('Data final deve ser maior que a inicial')
-        return v
\ No newline at end of file
+        return v
+
+class HintReport(BaseModel):
+    """Quanto da escala anterior (warm-start) sobreviveu na nova solução"""
+    hinted_assignments: int = 0    # Alocações da escala anterior aplicadas como hint
+    discarded_assignments: int = 0 # Alocações anteriores sem variável (médico/slot saiu ou ficou inelegível)
+    kept_assignments: int = 0      # Alocações anteriores mantidas na nova solução
+    survival_rate: float = 0.0     # kept / total de alocações anteriores
+
+class RosterProgress(BaseModel):
+    """Solução intermediária (incumbente) emitida enquanto o solver ainda roda"""
+    sequence: int                  # 1, 2, 3... na ordem em que o solver melhorou
+    objective_value: float
+    best_bound: float              # Limite superior provado até agora (gap = bound - objetivo)
+    wall_time_seconds: float
+    # Escala completa (primeiro evento ou modo sem diff) ...
+    assignments: Optional[List[RosterSolution]] = None
+    # ... ou apenas a diferença em relação ao incumbente anterior
+    added: List[RosterSolution] = []
+    removed: List[RosterSolution] = []
+
+class InfeasibilityIssue(BaseModel):
+    """Um motivo provado de inviabilidade (pré-checagem ou núcleo do CP-SAT)"""
+    kind: str                      # slot_coverage, overlap_demand, monthly_capacity, flow_coverage, fixed_assignment, core_*
+    message: str
+    slot_ids: List[str] = []
+    dates: List[date] = []
+    specialties: List[str] = []
+    doctor_ids: List[str] = []
+    required: Optional[int] = None # Demanda do conjunto de slots
+    available: Optional[int] = None # Limite superior do que os médicos conseguem cobrir
+
+class InfeasibilityReport(BaseModel):
+    """Explicação estruturada de uma escala inviável"""
+    source: str                    # "precheck" (polinomial, antes do solver) ou "core" (suposições do CP-SAT)
+    issues: List[InfeasibilityIssue] = []
+    elapsed_ms: float = 0.0
+
+class DoctorUnavailability(BaseModel):
+    """Médico que ficou indisponível (atestado, falta) em algumas datas"""
+    doctor_id: str
+    dates: List[date]
+
+class RosterChange(BaseModel):
+    """Mudança aplicada a uma escala gravada no reparo local"""
+    unavailable: List[DoctorUnavailability] = []
+    added_slots: List[ShiftSlot] = []
+    removed_slot_ids: List[str] = []
+    demand_changes: Dict[str, int] = {}   # slot_id -> novo required_count
+    # Dias em volta de cada data afetada que também são liberados para o solver
+    neighborhood_days: int = Field(1, ge=0)
+
+class RepairReport(BaseModel):
+    """O que o reparo local mexeu na escala"""
+    neighborhood_days: int         # Vizinhança efetiva (pode ter sido ampliada se a inicial era inviável)
+    freed_slots: int               # Slots reabertos para o solver
+    freed_variables: int           # Variáveis do modelo do reparo
+    total_variables: int           # Variáveis que o problema completo teria
+    kept_assignments: int          # Alocações da escala gravada mantidas
+    churn: int                     # len(added) + len(removed)
+    added: List[RosterSolution] = []
+    removed: List[RosterSolution] = []
+    elapsed_ms: float = 0.0
+
+class PresolveReport(BaseModel):
+    """Quanto a redução antes da modelagem encolheu o problema"""
+    variables_before: int          # Pares elegíveis (H2 + H3)
+    variables_after: int           # Pares que sobraram para o modelo
+    forced_assignments: int        # Pares fixados em 1 (slot com exatamente required_count candidatos)
+    resolved_slots: int            # Slots com toda a demanda já fixada
+    dropped_doctors: int           # Médicos sem nenhum par: ficam fora do modelo
+    tightened_bounds: int          # Médicos cujo limite de plantões ficou abaixo do nº de slots elegíveis
+    rounds: int = 0                # Rodadas de propagação até o ponto fixo
+    elapsed_ms: float = 0.0
+
+class OptimizationResult(BaseModel):
+    """Saída detalhada do motor: escala + metadados do solve"""
+    solutions: List[RosterSolution] = []
+    status: str
+    objective_value: Optional[float] = None
+    wall_time_seconds: float = 0.0
+    hint: Optional[HintReport] = None
+    infeasibility: Optional[InfeasibilityReport] = None
+    engine: str = "cp_sat"         # Motor que produziu a escala: cp_sat, cp_sat_aggregated, min_cost_flow, heuristic (ou combinação deles); none = reparo sem nada a resolver
+    repair: Optional[RepairReport] = None
+    presolve: Optional[PresolveReport] = None
+
+class ScenarioVariant(BaseModel):
+    """Uma variante da varredura: pesos próprios (None = herda da base) e/ou mudança what-if"""
+    name: Optional[str] = None
+    weight_cost: Optional[float] = None
+    weight_preference: Optional[float] = None
+    weight_fairness: Optional[float] = None
+    # What-if (médico indisponível, slot novo...): muda a estrutura, então ganha modelo próprio
+    change: Optional[RosterChange] = None
+
+class ObjectiveBreakdown(BaseModel):
+    """Componentes do objetivo de uma escala, em unidades comparáveis entre variantes"""
+    total_cost: int                # S1: soma de custo_hora * horas (R$, truncado como no modelo)
+    preference_hits: int           # S2: plantões em datas preferidas
+    fairness_deviation: int        # S3: soma de |plantões do médico - média ideal|
+    assignments: int
+
+class ScenarioResult(BaseModel):
+    """Resultado de uma variante da varredura de pesos"""
+    name: str
+    weight_cost: float
+    weight_preference: float
+    weight_fairness: float
+    status: str
+    engine: str = "cp_sat"
+    objective_value: Optional[float] = None
+    wall_time_seconds: float = 0.0
+    breakdown: Optional[ObjectiveBreakdown] = None
+    # Nenhuma outra variante é melhor ou igual em custo, preferência e equidade ao mesmo tempo
+    pareto_optimal: bool = False
+    infeasibility: Optional[InfeasibilityReport] = None
+    solutions: List[RosterSolution] = []
+
+class CompactRoster(BaseModel):
+    """Escala em formato colunar (?format=compact): ids uma vez só e índices por alocação"""
+    doctor_ids: List[str]
+    slot_ids: List[str]
+    slot_dates: List[date]         # Paralela a slot_ids
+    doctor_index: List[int]        # Alocação k = (doctor_ids[doctor_index[k]], slot_ids[slot_index[k]])
+    slot_index: List[int]
+
+    @classmethod
+    def from_solutions(cls, solutions: List[RosterSolution]) -> "CompactRoster":
+        doctors: Dict[str, int] = {}
+        slots: Dict[str, int] = {}
+        slot_dates: List[date] = []
+        doctor_index, slot_index = [], []
+        for a in solutions:
+            doctor_index.append(doctors.setdefault(a.doctor_id, len(doctors)))
+            j = slots.get(a.slot_id)
+            if j is None:
+                j = slots[a.slot_id] = len(slots)
+                slot_dates.append(a.date)
+            slot_index.append(j)
+        return cls(
+            doctor_ids=list(doctors), slot_ids=list(slots), slot_dates=slot_dates,
+            doctor_index=doctor_index, slot_index=slot_index
+        )
+
+class ImportRowError(BaseModel):
+    """Linha rejeitada na importação em lote"""
+    line: int                      # Linha no arquivo (1 = primeira linha, incluindo o cabeçalho do CSV)
+    crm: Optional[str] = None
+    error: str
+
+class DoctorImportReport(BaseModel):
+    """Resumo de uma importação em lote de médicos (CSV/JSONL)"""
+    total_rows: int = 0
+    imported: int = 0
+    duplicates: int = 0            # CRM/id já existente no banco ou repetido no próprio arquivo
+    invalid: int = 0               # Linhas que não passaram na validação do modelo Doctor
+    batches: int = 0
+    elapsed_seconds: float = 0.0
+    errors: List[ImportRowError] = []  # Limitado (ver max_reported_errors); os contadores são completos
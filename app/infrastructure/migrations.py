@@ -0,0 +1,104 @@
+"""
+Migração idempotente do esquema (sem Alembic).
+
+`Base.metadata.create_all` só cria tabelas que ainda não existem: colunas e
+índices novos em tabelas antigas (ex.: o medical_roster.db da versão
+inicial) ficam de fora. upgrade_schema() roda depois do create_all no startup
+(main.py), no scripts/init_db.py e no worker, e só aplica o que falta.
+Escalas e alocações gravadas antes do versionamento também são completadas.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.infrastructure.database import Base
+from app.infrastructure import orm_models  # noqa: F401  (registra as tabelas no metadata)
+
+# Colunas adicionadas a tabelas que já existiam: (tabela, coluna, DDL).
+# ADD COLUMN não aceita NOT NULL sem default, então roster_solutions.roster_id
+# nasce anulável no banco migrado e as linhas antigas são ligadas a uma escala
+# "LEGACY" logo em seguida.
+ADDED_COLUMNS = [
+    ("roster_solutions", "roster_id", "VARCHAR REFERENCES rosters (id)"),
+    ("rosters", "request_fingerprint", "VARCHAR"),
+    ("optimization_jobs", "solver_status", "VARCHAR"),
+    ("optimization_jobs", "infeasibility", "JSON"),
+]
+
+
+def _upgrade(conn: Connection) -> List[str]:
+    applied = []
+    inspector = inspect(conn)
+    tables = set(inspector.get_table_names())
+
+    for table, column, ddl in ADDED_COLUMNS:
+        if table not in tables:
+            continue
+        if column not in {c["name"] for c in inspector.get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+            applied.append(f"{table}.{column}")
+
+    # Índices declarados no ORM que faltam em tabelas antigas (CREATE INDEX IF NOT EXISTS)
+    for table in Base.metadata.sorted_tables:
+        existing = {i["name"] for i in inspect(conn).get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn, checkfirst=True)
+                applied.append(index.name)
+
+    applied.extend(_backfill_legacy_assignments(conn))
+    applied.extend(_backfill_roster_slots(conn))
+    return applied
+
+
+def _backfill_legacy_assignments(conn: Connection) -> List[str]:
+    """Alocações gravadas antes do versionamento viram uma escala 'LEGACY' do período que cobrem."""
+    row = conn.execute(text(
+        "SELECT MIN(date), MAX(date), COUNT(*) FROM roster_solutions WHERE roster_id IS NULL"
+    )).one()
+    if not row[2]:
+        return []
+    period_start, period_end, count = row
+    version = conn.execute(
+        text("SELECT COALESCE(MAX(version), 0) FROM rosters WHERE period_start = :start AND period_end = :end"),
+        {"start": period_start, "end": period_end}
+    ).scalar_one() + 1
+    roster_id = str(uuid.uuid4())
+    conn.execute(
+        text(
+            "INSERT INTO rosters (id, period_start, period_end, version, status, assignment_count, created_at) "
+            "VALUES (:id, :start, :end, :version, 'LEGACY', :count, :created_at)"
+        ),
+        {
+            "id": roster_id, "start": period_start, "end": period_end, "version": version,
+            "count": count, "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        }
+    )
+    conn.execute(text("UPDATE roster_solutions SET roster_id = :id WHERE roster_id IS NULL"), {"id": roster_id})
+    return [f"rosters.{roster_id} ({count} alocação(ões) legadas)"]
+
+
+def _backfill_roster_slots(conn: Connection) -> List[str]:
+    """
+    Escalas gravadas antes de roster_slots: os slots delas são os das alocações,
+    com a demanda que estiver em shift_slots (a única registrada até então).
+    """
+    result = conn.execute(text(
+        "INSERT INTO roster_slots (roster_id, slot_id, required_count) "
+        "SELECT DISTINCT rs.roster_id, rs.slot_id, COALESCE(ss.required_count, 1) "
+        "FROM roster_solutions rs JOIN shift_slots ss ON ss.id = rs.slot_id "
+        "WHERE rs.roster_id IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM roster_slots x WHERE x.roster_id = rs.roster_id)"
+    ))
+    return [f"roster_slots ({result.rowcount} slot(s) de escalas antigas)"] if result.rowcount else []
+
+
+async def upgrade_schema(engine: AsyncEngine) -> List[str]:
+    """Aplica as colunas/índices que faltam e liga alocações antigas a uma escala. Retorna o que mudou."""
+    async with engine.begin() as conn:
+        return await conn.run_sync(_upgrade)
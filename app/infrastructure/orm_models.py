@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, Date, Float, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, Boolean, Date, DateTime, Float, ForeignKey, JSON, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.infrastructure.database import Base
 import uuid
@@ -24,6 +24,41 @@ class DoctorORM(Base):
     # Relacionamentos
     assigned_shifts = relationship("RosterSolutionORM", back_populates="doctor")
 
+# Tabelas normalizadas (projeção indexada dos JSON acima, mantida pelo DoctorRepository).
+# O JSON continua sendo o documento completo do médico; estas tabelas respondem
+# "quem pode cobrir estes slots" no banco, sem decodificar todos os médicos.
+
+class DoctorSpecialtyORM(Base):
+    __tablename__ = "doctor_specialties"
+
+    doctor_id = Column(String, ForeignKey("doctors.id"), primary_key=True)
+    specialty = Column(String, primary_key=True)
+
+    __table_args__ = (
+        # "Médicos com a especialidade X"
+        Index("ix_doctor_specialties_specialty", "specialty", "doctor_id"),
+    )
+
+class DoctorDateORM(Base):
+    __tablename__ = "doctor_dates"
+
+    doctor_id = Column(String, ForeignKey("doctors.id"), primary_key=True)
+    kind = Column(String, primary_key=True)  # "unavailable" | "preferred"
+    date = Column(Date, primary_key=True)
+
+    __table_args__ = (
+        # "Quem está indisponível na data D"
+        Index("ix_doctor_dates_kind_date", "kind", "date"),
+    )
+
+class DataVersionORM(Base):
+    """Contador de versão por conjunto de dados (ex: "doctors"), incrementado a cada escrita.
+    Permite que caches em memória de vários processos saibam quando recarregar."""
+    __tablename__ = "data_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 class ShiftSlotORM(Base):
     __tablename__ = "shift_slots"
 
@@ -37,12 +72,44 @@ class ShiftSlotORM(Base):
     # Relacionamentos
     allocation = relationship("RosterSolutionORM", back_populates="slot")
 
+class RosterORM(Base):
+    """Cabeçalho de uma escala gerada. Cada nova geração para o mesmo período é uma nova versão."""
+    __tablename__ = "rosters"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+    version = Column(Integer, nullable=False)
+    status = Column(String, nullable=False)          # Status do solver (OPTIMAL, FEASIBLE...)
+    objective_value = Column(Float, nullable=True)
+    assignment_count = Column(Integer, nullable=False, default=0)
+    source_job_id = Column(String, ForeignKey("optimization_jobs.id"), nullable=True)
+    # Hash do OptimizationRequest que gerou a escala (evita gravar versões repetidas)
+    request_fingerprint = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    assignments = relationship("RosterSolutionORM", back_populates="roster")
+    slots = relationship("RosterSlotORM")
+
+    __table_args__ = (
+        UniqueConstraint("period_start", "period_end", "version", name="uq_rosters_period_version"),
+    )
+
+class RosterSlotORM(Base):
+    """Slots de uma escala com a demanda daquela versão (shift_slots é compartilhada entre versões)."""
+    __tablename__ = "roster_slots"
+
+    roster_id = Column(String, ForeignKey("rosters.id"), primary_key=True)
+    slot_id = Column(String, ForeignKey("shift_slots.id"), primary_key=True)
+    required_count = Column(Integer, nullable=False)
+
 class RosterSolutionORM(Base):
     __tablename__ = "roster_solutions"
 
     # Chave composta pode ser usada, mas ID surrogate é mais fácil para ORMs
     id = Column(Integer, primary_key=True, autoincrement=True)
-    
+
+    roster_id = Column(String, ForeignKey("rosters.id"), nullable=False, index=True)
     slot_id = Column(String, ForeignKey("shift_slots.id"), nullable=False)
     doctor_id = Column(String, ForeignKey("doctors.id"), nullable=False)
     date = Column(Date, nullable=False)
@@ -50,4 +117,39 @@ class RosterSolutionORM(Base):
     created_at = Column(Date, nullable=True) # Metadado de auditoria
 
     doctor = relationship("DoctorORM", back_populates="assigned_shifts")
-    slot = relationship("ShiftSlotORM", back_populates="allocation")
\ No newline at end of file
+    slot = relationship("ShiftSlotORM", back_populates="allocation")
+    roster = relationship("RosterORM", back_populates="assignments")
+
+    __table_args__ = (
+        # Agenda de um médico por período e "quem está neste plantão"
+        Index("ix_roster_solutions_doctor_date", "doctor_id", "date"),
+        Index("ix_roster_solutions_slot", "slot_id"),
+    )
+
+class OptimizationJobORM(Base):
+    __tablename__ = "optimization_jobs"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    status = Column(String, nullable=False, default="queued") # JobStatusEnum
+
+    # OptimizationRequest completo (médicos já resolvidos no momento do enqueue)
+    request_payload = Column(JSON, nullable=False)
+    # Lista de RosterSolution serializada quando status == "done"
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    # Status do solver e, se inviável, o InfeasibilityReport serializado
+    solver_status = Column(String, nullable=True)
+    infeasibility = Column(JSON, nullable=True)
+
+    # Controle de concorrência entre workers
+    worker_id = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False)
+    claimed_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Fila: workers buscam o job "queued" mais antigo
+        Index("ix_optimization_jobs_status_created", "status", "created_at"),
+    )
@@ -17,10 +17,14 @@ class BaseRepository(Generic[ModelType]):
         await self.session.refresh(db_obj)
         return db_obj
 
-    async def create_many(self, objs_in: List[dict]) -> List[ModelType]:
+    async def create_many(self, objs_in: List[dict], commit: bool = True) -> List[ModelType]:
         db_objs = [self.model(**obj) for obj in objs_in]
         self.session.add_all(db_objs)
-        await self.session.commit()
+        if commit:
+            await self.session.commit()
+        else:
+            # Deixa a transação aberta para o chamador gravar linhas dependentes
+            await self.session.flush()
         return db_objs
 
     async def get(self, id: Any) -> Optional[ModelType]:
@@ -1,8 +1,43 @@
-from typing import List
-from sqlalchemy import select
+import asyncio
+import time
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import select, update, delete, insert, union, func, exists
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
 from app.infrastructure.repositories.base import BaseRepository
-from app.infrastructure.orm_models import DoctorORM
-from app.domain.models import Doctor
+from app.infrastructure.orm_models import DoctorORM, DataVersionORM, DoctorSpecialtyORM, DoctorDateORM
+from app.domain.models import Doctor, ShiftSlot
+
+DOCTORS_DATA_VERSION = "doctors"
+
+# Tipos de data em doctor_dates
+UNAVAILABLE = "unavailable"
+PREFERRED = "preferred"
+
+# Callbacks chamados com o id do médico após cada escrita (ex: cache de resultados)
+_write_listeners: List[Callable[[str], Any]] = []
+
+def register_write_listener(listener: Callable[[str], Any]) -> None:
+    """Registra um callback para ser avisado de escritas na tabela de médicos."""
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+def _notify_write(doctor_id: str) -> None:
+    for listener in _write_listeners:
+        listener(doctor_id)
+
+class _DoctorSnapshot:
+    """Médicos já validados (domínio) + versão dos dados de onde vieram."""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.doctors: List[Doctor] = []
+        self.checked_at = 0.0
+        self.lock = asyncio.Lock()
+
+# Um snapshot por banco (URL do engine), compartilhado por todo o processo
+_snapshots: Dict[str, _DoctorSnapshot] = {}
 
 class DoctorRepository(BaseRepository[DoctorORM]):
     def __init__(self, session):
@@ -10,45 +45,300 @@ class DoctorRepository(BaseRepository[DoctorORM]):
 
     async def create_from_domain(self, doctor: Doctor) -> DoctorORM:
         """Converte Domain Model -> ORM Model"""
-        # Pydantic .model_dump(mode='json') serializa datas e enums para string automaticamente
-        data = doctor.model_dump(mode='json') 
-        
-        # Extraímos campos aninhados para colunas JSON
-        attributes_data = data.pop('attributes')
-        availability_data = data.pop('availability')
-        specialties_data = data.pop('specialties')
-
-        db_doctor = DoctorORM(
-            id=doctor.id,
-            name=doctor.name,
-            crm=doctor.crm,
-            specialties=specialties_data,
-            attributes=attributes_data,
-            availability=availability_data
-        )
-        
+        db_doctor = DoctorORM(**self._to_orm_dict(doctor))
+
         self.session.add(db_doctor)
-        await self.session.commit()
+        try:
+            await self.session.flush()
+            await self._insert_normalized([doctor])
+            await self._bump_data_version()
+            await self.session.commit()
+        except IntegrityError:
+            # CRM (ou id) duplicado: o índice único é a fonte da verdade, inclusive em corridas
+            await self.session.rollback()
+            raise
+        self._snapshot().version = None
+        _notify_write(db_doctor.id)
         return db_doctor
 
+    async def create_many_from_domain(self, doctors: List[Doctor]) -> int:
+        """
+        Insere um lote de médicos em uma única transação (via create_many).
+        Se um CRM/id já existir, o lote inteiro sofre rollback e o IntegrityError sobe.
+        """
+        if not doctors:
+            return 0
+        try:
+            # Médicos, tabelas normalizadas e versão na mesma transação
+            await self.create_many([self._to_orm_dict(d) for d in doctors], commit=False)
+            await self._insert_normalized(doctors)
+            await self._bump_data_version()
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise
+        self._snapshot().version = None
+        for doctor in doctors:
+            _notify_write(doctor.id)
+        return len(doctors)
+
+    async def get_existing_keys(self, ids: List[str], crms: List[str]) -> Tuple[Set[str], Set[str]]:
+        """Quais desses ids e CRMs já estão no banco (consultas pelos índices únicos)."""
+        existing_ids: Set[str] = set()
+        existing_crms: Set[str] = set()
+        if ids:
+            result = await self.session.execute(select(self.model.id).where(self.model.id.in_(ids)))
+            existing_ids = set(result.scalars().all())
+        if crms:
+            result = await self.session.execute(select(self.model.crm).where(self.model.crm.in_(crms)))
+            existing_crms = set(result.scalars().all())
+        return existing_ids, existing_crms
+
+    async def delete(self, id: Any) -> bool:
+        await self.session.execute(delete(DoctorSpecialtyORM).where(DoctorSpecialtyORM.doctor_id == id))
+        await self.session.execute(delete(DoctorDateORM).where(DoctorDateORM.doctor_id == id))
+        result = await self.session.execute(delete(self.model).where(self.model.id == id))
+        deleted = result.rowcount > 0
+        if deleted:
+            await self._bump_data_version()
+        await self.session.commit()
+        if deleted:
+            self._snapshot().version = None
+            _notify_write(id)
+        return deleted
+
+    async def get_data_version(self) -> int:
+        """Versão atual dos dados de médicos no banco (0 se nunca houve escrita)."""
+        stmt = select(DataVersionORM.version).where(DataVersionORM.name == DOCTORS_DATA_VERSION)
+        version = (await self.session.execute(stmt)).scalar_one_or_none()
+        return version or 0
+
+    async def get_active_doctors_snapshot(self) -> List[Doctor]:
+        """
+        Versão em memória de get_all_active_doctors(), compartilhada pelo processo.
+
+        Escritas feitas por este processo invalidam o snapshot na hora. Escritas
+        de outros processos são percebidas comparando a versão no banco, no máximo
+        a cada DOCTOR_SNAPSHOT_CHECK_SECONDS; entre checagens não há ida ao banco.
+        A lista devolvida é compartilhada: não altere os objetos.
+        """
+        snapshot = self._snapshot()
+        if snapshot.version is not None and time.monotonic() - snapshot.checked_at < settings.DOCTOR_SNAPSHOT_CHECK_SECONDS:
+            return snapshot.doctors
+
+        async with snapshot.lock:
+            # Outra corrotina pode ter atualizado enquanto esperávamos o lock
+            if snapshot.version is not None and time.monotonic() - snapshot.checked_at < settings.DOCTOR_SNAPSHOT_CHECK_SECONDS:
+                return snapshot.doctors
+
+            # Lemos a versão ANTES das linhas: se alguém escrever no meio, a versão
+            # guardada fica "velha" e a próxima checagem recarrega (nunca o contrário)
+            version = await self.get_data_version()
+            if version != snapshot.version:
+                snapshot.doctors = await self.get_all_active_doctors()
+                snapshot.version = version
+            snapshot.checked_at = time.monotonic()
+            return snapshot.doctors
+
+    async def _bump_data_version(self) -> None:
+        """Incrementa a versão na mesma transação da escrita."""
+        stmt = (
+            update(DataVersionORM)
+            .where(DataVersionORM.name == DOCTORS_DATA_VERSION)
+            .values(version=DataVersionORM.version + 1)
+        )
+        result = await self.session.execute(stmt)
+        if result.rowcount == 0:
+            self.session.add(DataVersionORM(name=DOCTORS_DATA_VERSION, version=1))
+
+    def _snapshot(self) -> _DoctorSnapshot:
+        key = str(self.session.bind.url)
+        if key not in _snapshots:
+            _snapshots[key] = _DoctorSnapshot()
+        return _snapshots[key]
+
+    async def get_by_crm(self, crm: str) -> Optional[DoctorORM]:
+        """Busca pelo índice único de CRM (uma consulta, independente do tamanho da tabela)."""
+        stmt = select(self.model).where(self.model.crm == crm)
+        result = await self.session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def list_page(
+        self,
+        limit: int = 100,
+        after_id: Optional[str] = None,
+        skip: int = 0,
+        specialty: Optional[str] = None,
+        min_seniority: Optional[int] = None,
+        max_seniority: Optional[int] = None,
+    ) -> List[Doctor]:
+        """
+        Página de médicos filtrada e paginada no banco.
+
+        Paginação por chave (keyset): `after_id` é o último id da página anterior,
+        e a consulta segue pela chave primária em vez de pular linhas com OFFSET.
+        """
+        stmt = select(self.model).order_by(self.model.id).limit(limit)
+        if after_id is not None:
+            stmt = stmt.where(self.model.id > after_id)
+        if skip:
+            stmt = stmt.offset(skip)
+        if specialty is not None:
+            stmt = stmt.where(exists().where(
+                DoctorSpecialtyORM.doctor_id == self.model.id,
+                DoctorSpecialtyORM.specialty == specialty
+            ))
+        if min_seniority is not None:
+            stmt = stmt.where(self.model.attributes["seniority_level"].as_integer() >= min_seniority)
+        if max_seniority is not None:
+            stmt = stmt.where(self.model.attributes["seniority_level"].as_integer() <= max_seniority)
+
+        result = await self.session.execute(stmt)
+        return [self._to_domain(orm) for orm in result.scalars().all()]
+
+    async def get_eligible_doctor_ids(self, slots: List[ShiftSlot]) -> Set[str]:
+        """
+        Ids dos médicos que podem cobrir ao menos um dos slots, calculado no banco.
+
+        Mesma regra do pré-filtro do otimizador (H2 data indisponível, H3 especialidade):
+        para cada especialidade pedida, com o conjunto D de datas dos slots que a aceitam,
+        o médico é elegível se tem a especialidade e não está indisponível em todas as datas de D.
+        """
+        dates_by_specialty: Dict[str, Set[date]] = {}
+        for slot in slots:
+            if slot.required_count <= 0:
+                continue
+            for specialty in slot.required_specialties:
+                dates_by_specialty.setdefault(str(getattr(specialty, "value", specialty)), set()).add(slot.date)
+        if not dates_by_specialty:
+            return set()
+
+        queries = []
+        for specialty, dates in dates_by_specialty.items():
+            unavailable_days = (
+                select(func.count())
+                .select_from(DoctorDateORM)
+                .where(
+                    DoctorDateORM.doctor_id == DoctorSpecialtyORM.doctor_id,
+                    DoctorDateORM.kind == UNAVAILABLE,
+                    DoctorDateORM.date.in_(sorted(dates))
+                )
+                .scalar_subquery()
+            )
+            queries.append(
+                select(DoctorSpecialtyORM.doctor_id)
+                .where(DoctorSpecialtyORM.specialty == specialty, unavailable_days < len(dates))
+            )
+
+        result = await self.session.execute(union(*queries))
+        return set(result.scalars().all())
+
+    async def get_eligible_doctors(self, slots: List[ShiftSlot]) -> List[Doctor]:
+        """
+        Médicos elegíveis para ao menos um slot: o banco decide quem entra (só ids
+        trafegam) e os objetos de domínio vêm do snapshot em memória.
+        """
+        eligible_ids = await self.get_eligible_doctor_ids(slots)
+        if not eligible_ids:
+            return []
+
+        doctors = [d for d in await self.get_active_doctors_snapshot() if d.id in eligible_ids]
+        missing = eligible_ids - {d.id for d in doctors}
+        if missing:
+            # Escrita de outro processo ainda não refletida no snapshot
+            stmt = select(self.model).where(self.model.id.in_(sorted(missing))).order_by(self.model.id)
+            result = await self.session.execute(stmt)
+            doctors.extend(self._to_domain(orm) for orm in result.scalars().all())
+        return doctors
+
+    async def backfill_normalized(self, batch_size: int = 1000) -> int:
+        """
+        Migração: gera doctor_specialties/doctor_dates a partir dos JSON para os médicos
+        que ainda não têm linhas normalizadas. Idempotente. Retorna quantos médicos migrou.
+        """
+        has_rows = exists().where(DoctorSpecialtyORM.doctor_id == self.model.id)
+        stmt = select(self.model.id, self.model.specialties, self.model.availability).where(~has_rows)
+        rows = (await self.session.execute(stmt)).all()
+
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            ids = [row.id for row in chunk]
+            await self.session.execute(delete(DoctorDateORM).where(DoctorDateORM.doctor_id.in_(ids)))
+            specialty_rows, date_rows = self._normalized_rows(
+                (
+                    row.id,
+                    row.specialties or [],
+                    [date.fromisoformat(d) for d in (row.availability or {}).get("unavailable_dates", [])],
+                    [date.fromisoformat(d) for d in (row.availability or {}).get("preferred_dates", [])],
+                )
+                for row in chunk
+            )
+            await self._execute_inserts(specialty_rows, date_rows)
+        await self.session.commit()
+        return len(rows)
+
     async def get_all_active_doctors(self) -> List[Doctor]:
         """Retorna todos os médicos convertidos para o Domain Model"""
         stmt = select(self.model)
         result = await self.session.execute(stmt)
-        orm_doctors = result.scalars().all()
-        
-        domain_doctors = []
-        for orm in orm_doctors:
-            # Reconstrução do objeto de Domínio a partir do ORM
-            # Precisamos mapear de volta os campos JSON para a estrutura plana/aninhada
-            doc_dict = {
-                "id": orm.id,
-                "name": orm.name,
-                "crm": orm.crm,
-                "specialties": orm.specialties,
-                "attributes": orm.attributes,
-                "availability": orm.availability
-            }
-            domain_doctors.append(Doctor(**doc_dict))
-            
-        return domain_doctors
\ No newline at end of file
+        return [self._to_domain(orm) for orm in result.scalars().all()]
+
+    async def _insert_normalized(self, doctors: List[Doctor]) -> None:
+        specialty_rows, date_rows = self._normalized_rows(
+            (
+                d.id,
+                [s.value for s in d.specialties],
+                d.availability.unavailable_dates,
+                d.availability.preferred_dates,
+            )
+            for d in doctors
+        )
+        await self._execute_inserts(specialty_rows, date_rows)
+
+    async def _execute_inserts(self, specialty_rows: List[dict], date_rows: List[dict]) -> None:
+        if specialty_rows:
+            await self.session.execute(insert(DoctorSpecialtyORM), specialty_rows)
+        if date_rows:
+            await self.session.execute(insert(DoctorDateORM), date_rows)
+
+    @staticmethod
+    def _normalized_rows(
+        doctors: Iterable[Tuple[str, List[str], List[date], List[date]]]
+    ) -> Tuple[List[dict], List[dict]]:
+        """(id, especialidades, indisponíveis, preferidas) -> linhas das tabelas normalizadas."""
+        specialty_rows, date_rows = [], []
+        for doctor_id, specialties, unavailable, preferred in doctors:
+            specialty_rows.extend({"doctor_id": doctor_id, "specialty": s} for s in dict.fromkeys(specialties))
+            date_rows.extend({"doctor_id": doctor_id, "kind": UNAVAILABLE, "date": d} for d in dict.fromkeys(unavailable))
+            date_rows.extend({"doctor_id": doctor_id, "kind": PREFERRED, "date": d} for d in dict.fromkeys(preferred))
+        return specialty_rows, date_rows
+
+    @staticmethod
+    def _to_orm_dict(doctor: Doctor) -> dict:
+        """Converte Domain Model -> colunas do ORM"""
+        # Pydantic .model_dump(mode='json') serializa datas e enums para string automaticamente
+        data = doctor.model_dump(mode='json')
+
+        # Campos aninhados vão para colunas JSON
+        return {
+            "id": data["id"],
+            "name": data["name"],
+            "crm": data["crm"],
+            "specialties": data["specialties"],
+            "attributes": data["attributes"],
+            "availability": data["availability"],
+        }
+
+    @staticmethod
+    def _to_domain(orm: DoctorORM) -> Doctor:
+        # Reconstrução do objeto de Domínio a partir do ORM
+        # Precisamos mapear de volta os campos JSON para a estrutura plana/aninhada
+        doc_dict = {
+            "id": orm.id,
+            "name": orm.name,
+            "crm": orm.crm,
+            "specialties": orm.specialties,
+            "attributes": orm.attributes,
+            "availability": orm.availability
+        }
+        return Doctor(**doc_dict)
\ No newline at end of file
@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from sqlalchemy import select, update
+from app.infrastructure.repositories.base import BaseRepository
+from app.infrastructure.orm_models import OptimizationJobORM
+from app.domain.models import OptimizationRequest, RosterSolution, JobStatusEnum, InfeasibilityReport
+
+def _utcnow() -> datetime:
+    # Gravamos datas "naive" em UTC para funcionar igual em SQLite e Postgres
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class JobRepository(BaseRepository[OptimizationJobORM]):
+    """
+    Fila de jobs de otimização persistida no banco (sem broker).
+    Toda transição de estado é um UPDATE condicional (compare-and-set), então
+    vários workers, inclusive em hosts diferentes, podem disputar a mesma fila.
+    """
+
+    def __init__(self, session):
+        super().__init__(session, OptimizationJobORM)
+
+    async def enqueue(self, request: OptimizationRequest) -> OptimizationJobORM:
+        """Registra um novo job 'queued' com o request completo serializado."""
+        return await self.create({
+            "status": JobStatusEnum.QUEUED.value,
+            "request_payload": request.model_dump(mode='json'),
+            "created_at": _utcnow(),
+        })
+
+    async def claim_next(self, worker_id: str, batch: int = 5) -> Optional[OptimizationJobORM]:
+        """
+        Reivindica atomicamente o job 'queued' mais antigo.
+        O UPDATE só vence se o job ainda estiver 'queued'; se outro worker chegou
+        antes (rowcount == 0), tentamos o próximo candidato.
+        """
+        stmt = (
+            select(self.model.id)
+            .where(self.model.status == JobStatusEnum.QUEUED.value)
+            .order_by(self.model.created_at)
+            .limit(batch)
+        )
+        candidate_ids = (await self.session.execute(stmt)).scalars().all()
+
+        for job_id in candidate_ids:
+            now = _utcnow()
+            claim = (
+                update(self.model)
+                .where(self.model.id == job_id, self.model.status == JobStatusEnum.QUEUED.value)
+                .values(
+                    status=JobStatusEnum.RUNNING.value,
+                    worker_id=worker_id,
+                    attempts=self.model.attempts + 1,
+                    claimed_at=now,
+                    heartbeat_at=now,
+                )
+            )
+            result = await self.session.execute(claim)
+            await self.session.commit()
+            if result.rowcount == 1:
+                return await self.get_fresh(job_id)
+        return None
+
+    async def get_fresh(self, job_id: str) -> Optional[OptimizationJobORM]:
+        """Busca o job ignorando o identity map (estado pode ter mudado em outro processo)."""
+        query = select(self.model).where(self.model.id == job_id).execution_options(populate_existing=True)
+        result = await self.session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Renova o heartbeat. Retorna False se o job não pertence mais a este worker."""
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.id == job_id,
+                self.model.worker_id == worker_id,
+                self.model.status == JobStatusEnum.RUNNING.value,
+            )
+            .values(heartbeat_at=_utcnow())
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount == 1
+
+    async def complete(
+        self,
+        job_id: str,
+        worker_id: str,
+        solutions: List[RosterSolution],
+        solver_status: Optional[str] = None,
+        infeasibility: Optional[InfeasibilityReport] = None
+    ) -> bool:
+        """Grava o resultado (e o diagnóstico, se inviável), desde que o job ainda seja deste worker."""
+        return await self._finish(
+            job_id, worker_id,
+            status=JobStatusEnum.DONE.value,
+            result=[s.model_dump(mode='json') for s in solutions],
+            error=None,
+            solver_status=solver_status,
+            infeasibility=infeasibility.model_dump(mode='json') if infeasibility is not None else None,
+        )
+
+    async def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        """Marca o job como falho, desde que ainda seja deste worker."""
+        return await self._finish(
+            job_id, worker_id,
+            status=JobStatusEnum.FAILED.value,
+            result=None,
+            error=error,
+        )
+
+    async def requeue_stale(self, stale_after: timedelta, max_attempts: int = 3) -> int:
+        """
+        Devolve para a fila jobs 'running' cujo worker parou de mandar heartbeat.
+        Jobs que já esgotaram max_attempts são marcados como 'failed'.
+        Retorna quantos jobs foram afetados.
+        """
+        now = _utcnow()
+        deadline = now - stale_after
+        is_stale = (
+            (self.model.status == JobStatusEnum.RUNNING.value)
+            & (self.model.heartbeat_at < deadline)
+        )
+
+        exhausted = await self.session.execute(
+            update(self.model)
+            .where(is_stale, self.model.attempts >= max_attempts)
+            .values(
+                status=JobStatusEnum.FAILED.value,
+                error="Tentativas esgotadas: worker parou de responder.",
+                worker_id=None,
+                finished_at=now,
+            )
+        )
+        requeued = await self.session.execute(
+            update(self.model)
+            .where(is_stale)
+            .values(status=JobStatusEnum.QUEUED.value, worker_id=None, claimed_at=None, heartbeat_at=None)
+        )
+        await self.session.commit()
+        return exhausted.rowcount + requeued.rowcount
+
+    async def _finish(self, job_id: str, worker_id: str, **values) -> bool:
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.id == job_id,
+                self.model.worker_id == worker_id,
+                self.model.status == JobStatusEnum.RUNNING.value,
+            )
+            .values(finished_at=_utcnow(), **values)
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount == 1
@@ -0,0 +1,205 @@
+from datetime import date, datetime, timezone
+from typing import List, Optional
+from sqlalchemy import select, func, insert
+from sqlalchemy.exc import IntegrityError
+from app.infrastructure.repositories.base import BaseRepository
+from app.infrastructure.orm_models import RosterORM, RosterSlotORM, RosterSolutionORM, ShiftSlotORM
+from app.domain.models import OptimizationRequest, OptimizationResult, RosterSolution, ShiftSlot
+
+# Duas gerações simultâneas do mesmo período podem disputar o mesmo número de versão
+MAX_VERSION_RETRIES = 3
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class RosterRepository(BaseRepository[RosterORM]):
+    """
+    Escalas geradas, versionadas por período.
+    Cada save_solution grava um cabeçalho (RosterORM), os slots com a demanda
+    daquela versão (RosterSlotORM) e as alocações em INSERTs em lote, para que a
+    escala possa ser consultada (e reparada) sem resolver de novo.
+    """
+
+    def __init__(self, session):
+        super().__init__(session, RosterORM)
+
+    async def save_solution(
+        self,
+        request: OptimizationRequest,
+        result: OptimizationResult,
+        source_job_id: Optional[str] = None,
+        request_fingerprint: Optional[str] = None
+    ) -> RosterORM:
+        """
+        Grava a escala como a próxima versão do período do request.
+        Com `request_fingerprint`, se a última versão do período veio do mesmo
+        request e tem as mesmas alocações (reload, acerto no cache de resultados),
+        ela é devolvida sem gravar outra.
+        """
+        if request_fingerprint is not None:
+            latest = await self._latest_version(request.period_start, request.period_end)
+            if latest is not None and latest.request_fingerprint == request_fingerprint:
+                stored = {(a.slot_id, a.doctor_id) for a in await self.get_assignments(latest.id)}
+                if stored == {(a.slot_id, a.doctor_id) for a in result.solutions}:
+                    return latest
+
+        for attempt in range(MAX_VERSION_RETRIES):
+            try:
+                return await self._insert_version(request, result, source_job_id, request_fingerprint)
+            except IntegrityError:
+                # Outra gravação levou o mesmo número de versão: tenta o seguinte
+                await self.session.rollback()
+                if attempt == MAX_VERSION_RETRIES - 1:
+                    raise
+
+    async def _insert_version(
+        self,
+        request: OptimizationRequest,
+        result: OptimizationResult,
+        source_job_id: Optional[str],
+        request_fingerprint: Optional[str]
+    ) -> RosterORM:
+        await self._ensure_slots(request)
+
+        stmt = select(func.max(self.model.version)).where(
+            self.model.period_start == request.period_start,
+            self.model.period_end == request.period_end
+        )
+        current = (await self.session.execute(stmt)).scalar_one_or_none() or 0
+
+        roster = RosterORM(
+            period_start=request.period_start,
+            period_end=request.period_end,
+            version=current + 1,
+            status=result.status,
+            objective_value=result.objective_value,
+            assignment_count=len(result.solutions),
+            source_job_id=source_job_id,
+            request_fingerprint=request_fingerprint,
+            created_at=_utcnow(),
+        )
+        self.session.add(roster)
+        await self.session.flush()
+
+        if request.slots_to_fill:
+            await self.session.execute(insert(RosterSlotORM), [
+                {"roster_id": roster.id, "slot_id": s.id, "required_count": s.required_count}
+                for s in request.slots_to_fill
+            ])
+        if result.solutions:
+            today = date.today()
+            await self.session.execute(insert(RosterSolutionORM), [
+                {
+                    "roster_id": roster.id,
+                    "slot_id": a.slot_id,
+                    "doctor_id": a.doctor_id,
+                    "date": a.date,
+                    "is_extra_shift": a.is_extra_shift,
+                    "created_at": today,
+                }
+                for a in result.solutions
+            ])
+        await self.session.commit()
+        return roster
+
+    async def _latest_version(self, period_start: date, period_end: date) -> Optional[RosterORM]:
+        stmt = (
+            select(self.model)
+            .where(self.model.period_start == period_start, self.model.period_end == period_end)
+            .order_by(self.model.version.desc())
+            .limit(1)
+        )
+        return (await self.session.execute(stmt)).scalar_one_or_none()
+
+    async def _ensure_slots(self, request: OptimizationRequest) -> None:
+        """
+        Os slots vêm na requisição: grava os que ainda não existem (chave estrangeira
+        das alocações). A demanda de cada versão fica em roster_slots, então as
+        linhas de shift_slots não mudam quando uma versão nova altera a demanda.
+        """
+        slot_ids = [s.id for s in request.slots_to_fill]
+        if not slot_ids:
+            return
+        existing = set((await self.session.execute(
+            select(ShiftSlotORM.id).where(ShiftSlotORM.id.in_(slot_ids))
+        )).scalars().all())
+        missing = [s for s in request.slots_to_fill if s.id not in existing]
+        if missing:
+            await self.session.execute(insert(ShiftSlotORM), [
+                {
+                    "id": s.id,
+                    "date": s.date,
+                    "shift_type": s.shift_type.value,
+                    "required_specialties": list(s.required_specialties),
+                    "required_count": s.required_count,
+                    "sector_id": s.sector_id,
+                }
+                for s in missing
+            ])
+
+    async def list_versions(
+        self,
+        period_start: Optional[date] = None,
+        period_end: Optional[date] = None,
+        limit: int = 20
+    ) -> List[RosterORM]:
+        """Escalas gravadas, da mais recente para a mais antiga."""
+        stmt = select(self.model).order_by(self.model.created_at.desc(), self.model.version.desc()).limit(limit)
+        if period_start is not None:
+            stmt = stmt.where(self.model.period_start == period_start)
+        if period_end is not None:
+            stmt = stmt.where(self.model.period_end == period_end)
+        result = await self.session.execute(stmt)
+        return result.scalars().all()
+
+    async def get_assignments(
+        self,
+        roster_id: str,
+        doctor_id: Optional[str] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> List[RosterSolution]:
+        """Alocações de uma escala gravada (opcionalmente de um médico/intervalo)."""
+        stmt = (
+            select(RosterSolutionORM)
+            .where(RosterSolutionORM.roster_id == roster_id)
+            .order_by(RosterSolutionORM.date, RosterSolutionORM.slot_id, RosterSolutionORM.doctor_id)
+        )
+        if doctor_id is not None:
+            stmt = stmt.where(RosterSolutionORM.doctor_id == doctor_id)
+        if start is not None:
+            stmt = stmt.where(RosterSolutionORM.date >= start)
+        if end is not None:
+            stmt = stmt.where(RosterSolutionORM.date <= end)
+
+        result = await self.session.execute(stmt)
+        return [
+            RosterSolution(
+                slot_id=row.slot_id,
+                doctor_id=row.doctor_id,
+                date=row.date,
+                is_extra_shift=bool(row.is_extra_shift)
+            )
+            for row in result.scalars().all()
+        ]
+
+    async def get_slots(self, roster_id: str) -> List[ShiftSlot]:
+        """Todos os slots de uma escala gravada (cobertos ou não), com a demanda daquela versão."""
+        stmt = (
+            select(ShiftSlotORM, RosterSlotORM.required_count)
+            .join(RosterSlotORM, RosterSlotORM.slot_id == ShiftSlotORM.id)
+            .where(RosterSlotORM.roster_id == roster_id)
+            .order_by(ShiftSlotORM.date, ShiftSlotORM.id)
+        )
+        result = await self.session.execute(stmt)
+        return [
+            ShiftSlot(
+                id=row.id,
+                date=row.date,
+                shift_type=row.shift_type,
+                required_specialties=list(row.required_specialties),
+                required_count=required_count,
+                sector_id=row.sector_id
+            )
+            for row, required_count in result.all()
+        ]
@@ -51,6 +51,50 @@ def post_roster_optimization(payload):
         st.error(f"Erro de conexão: {e}")
         return None
 
+def stream_roster_optimization(payload, on_progress):
+    """
+    Consome o endpoint SSE /roster/optimize/stream.
+    Chama on_progress(escala_atual, evento) a cada incumbente e retorna a escala final.
+    """
+    current = {}
+    try:
+        with requests.post(f"{API_URL}/roster/optimize/stream", json=payload, stream=True) as response:
+            if response.status_code != 200:
+                st.error(f"Erro na API: {response.text}")
+                return None
+
+            event_name = None
+            for raw_line in response.iter_lines(decode_unicode=True):
+                if not raw_line:
+                    continue
+                if raw_line.startswith("event:"):
+                    event_name = raw_line.split(":", 1)[1].strip()
+                    continue
+                if not raw_line.startswith("data:"):
+                    continue
+                data = json.loads(raw_line.split(":", 1)[1])
+
+                if event_name == "solution":
+                    # Primeiro evento traz a escala completa; os seguintes, só o diff
+                    if data.get("assignments") is not None:
+                        current = {(a["doctor_id"], a["slot_id"]): a for a in data["assignments"]}
+                    for a in data.get("removed", []):
+                        current.pop((a["doctor_id"], a["slot_id"]), None)
+                    for a in data.get("added", []):
+                        current[(a["doctor_id"], a["slot_id"])] = a
+                    on_progress(list(current.values()), data)
+                elif event_name == "done":
+                    if not data["solutions"]:
+                        st.warning("⚠️ Solução Inviável: Restrições muito rígidas ou falta de médicos.")
+                        return None
+                    return data["solutions"]
+                elif event_name == "error":
+                    st.error(f"Erro na API: {data['detail']}")
+                    return None
+    except Exception as e:
+        st.error(f"Erro de conexão: {e}")
+    return None
+
 # --- Interface Principal ---
 
 st.title("🏥 Medical Roster Optimizer")
@@ -82,70 +126,88 @@ with tabs[0]:
 
     with col2:
         if generate_btn:
-            with st.spinner("🤖 O Robô está calculando a melhor combinação matemática..."):
-                # 1. Gerar Slots Automaticamente baseado nos inputs
-                slots_payload = []
-                current = start_date
-                while current <= end_date:
-                    # Slot Diurno
-                    slots_payload.append({
-                        "id": f"{sector_select}_{current}_day",
-                        "date": str(current),
-                        "shift_type": "diurno",
-                        "required_specialties": [req_specialty],
-                        "required_count": 1,
-                        "sector_id": sector_select
-                    })
-                    # Slot Noturno
-                    slots_payload.append({
-                        "id": f"{sector_select}_{current}_night",
-                        "date": str(current),
-                        "shift_type": "noturno",
-                        "required_specialties": [req_specialty],
-                        "required_count": 1,
-                        "sector_id": sector_select
-                    })
-                    current += timedelta(days=1)
+            # 1. Gerar Slots Automaticamente baseado nos inputs
+            slots_payload = []
+            current = start_date
+            while current <= end_date:
+                # Slot Diurno
+                slots_payload.append({
+                    "id": f"{sector_select}_{current}_day",
+                    "date": str(current),
+                    "shift_type": "diurno",
+                    "required_specialties": [req_specialty],
+                    "required_count": 1,
+                    "sector_id": sector_select
+                })
+                # Slot Noturno
+                slots_payload.append({
+                    "id": f"{sector_select}_{current}_night",
+                    "date": str(current),
+                    "shift_type": "noturno",
+                    "required_specialties": [req_specialty],
+                    "required_count": 1,
+                    "sector_id": sector_select
+                })
+                current += timedelta(days=1)
+            
+            # 2. Montar Request
+            request_data = {
+                "period_start": str(start_date),
+                "period_end": str(end_date),
+                "weight_cost": w_cost,
+                "weight_preference": w_pref,
+                "slots_to_fill": slots_payload
+            }
+            
+            # 3. Chamar API (streaming: renderiza cada incumbente enquanto o solver roda)
+            docs = get_doctors()
+            doc_map = {d['id']: d['name'] for d in docs}
+            live_status = st.empty()
+            live_table = st.empty()
+
+            def render_incumbent(assignments, event):
+                gap = abs(event["best_bound"] - event["objective_value"])
+                live_status.info(
+                    f"🤖 Incumbente #{event['sequence']} | Objetivo: {event['objective_value']:.0f} | "
+                    f"Gap: {gap:.0f} | {event['wall_time_seconds']:.2f}s"
+                )
+                df_live = pd.DataFrame(assignments)
+                if not df_live.empty:
+                    df_live['Nome do Médico'] = df_live['doctor_id'].map(doc_map)
+                    live_table.dataframe(
+                        df_live[['date', 'slot_id', 'Nome do Médico']].sort_values('date'),
+                        use_container_width=True
+                    )
+
+            result = stream_roster_optimization(request_data, render_incumbent)
+            live_status.empty()
+            live_table.empty()
+            
+            if result:
+                st.success(f"✅ Escala gerada com sucesso! {len(result)} plantões alocados.")
                 
-                # 2. Montar Request
-                request_data = {
-                    "period_start": str(start_date),
-                    "period_end": str(end_date),
-                    "weight_cost": w_cost,
-                    "weight_preference": w_pref,
-                    "slots_to_fill": slots_payload
-                }
+                # 4. Visualização
+                df = pd.DataFrame(result)
+                
+                # Nomes dos médicos (cruzamento simples)
+                df['Nome do Médico'] = df['doctor_id'].map(doc_map)
                 
-                # 3. Chamar API
-                result = post_roster_optimization(request_data)
+                # Tabela Simples
+                st.subheader("📋 Lista de Plantões")
+                st.dataframe(df[['date', 'slot_id', 'Nome do Médico']].sort_values('date'), use_container_width=True)
                 
-                if result:
-                    st.success(f"✅ Escala gerada com sucesso! {len(result)} plantões alocados.")
-                    
-                    # 4. Visualização
-                    df = pd.DataFrame(result)
-                    
-                    # Buscar nomes dos médicos (cruzamento simples)
-                    docs = get_doctors()
-                    doc_map = {d['id']: d['name'] for d in docs}
-                    df['Nome do Médico'] = df['doctor_id'].map(doc_map)
-                    
-                    # Tabela Simples
-                    st.subheader("📋 Lista de Plantões")
-                    st.dataframe(df[['date', 'slot_id', 'Nome do Médico']].sort_values('date'), use_container_width=True)
-                    
-                    # Pivot Table (Visualização de Calendário Simplificada)
-                    st.subheader("📅 Visualização Matricial")
-                    try:
-                        pivot = df.pivot_table(
-                            index='date', 
-                            columns='slot_id', 
-                            values='Nome do Médico', 
-                            aggfunc=lambda x: ' '.join(x)
-                        )
-                        st.dataframe(pivot)
-                    except:
-                        st.info("A visualização matricial requer mais dados para ser exibida corretamente.")
+                # Pivot Table (Visualização de Calendário Simplificada)
+                st.subheader("📅 Visualização Matricial")
+                try:
+                    pivot = df.pivot_table(
+                        index='date', 
+                        columns='slot_id', 
+                        values='Nome do Médico', 
+                        aggfunc=lambda x: ' '.join(x)
+                    )
+                    st.dataframe(pivot)
+                except:
+                    st.info("A visualização matricial requer mais dados para ser exibida corretamente.")
 
 # === TAB 2: GESTÃO DE MÉDICOS ===
 with tabs[1]:
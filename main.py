@@ -2,7 +2,10 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.api.api import api_router
-from app.infrastructure.database import create_tables, engine
+from app.infrastructure.database import create_tables, engine, AsyncSessionLocal
+from app.infrastructure.migrations import upgrade_schema
+from app.infrastructure.repositories.doctor_repository import DoctorRepository
+from app.application.services.solver_executor import shutdown_solver_executor
 
 # Lifespan events (Novo padrão do FastAPI para inicialização/shutdown)
 @asynccontextmanager
@@ -13,11 +16,23 @@ async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         from app.infrastructure.orm_models import Base # Importa para registrar metadata
         await conn.run_sync(Base.metadata.create_all)
+
+    # Migração: colunas/índices novos em tabelas que já existiam (create_all não altera tabelas)
+    applied = await upgrade_schema(engine)
+    if applied:
+        print(f"🔁 Esquema atualizado: {', '.join(applied)}")
+
+    # Migração: médicos cadastrados antes das tabelas normalizadas (especialidades/datas)
+    async with AsyncSessionLocal() as session:
+        migrated = await DoctorRepository(session).backfill_normalized()
+    if migrated:
+        print(f"🔁 {migrated} médico(s) migrado(s) para as tabelas de elegibilidade.")
     
     yield
     
     # Shutdown
     print("🛑 Sistema desligando...")
+    shutdown_solver_executor()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
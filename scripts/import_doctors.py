@@ -0,0 +1,65 @@
+"""
+Importa médicos em lote a partir de um arquivo CSV ou JSONL.
+
+Uso:
+    python scripts/import_doctors.py medicos.csv
+    python scripts/import_doctors.py medicos.jsonl --batch-size 2000
+
+CSV: cabeçalho com id,name,crm,specialties,seniority_level,is_preceptor,cost_per_hour,
+max_shifts_per_month,unavailable_dates,preferred_dates,blocked_weekdays
+(listas separadas por "|"; id vazio gera um UUID).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Setup de path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.infrastructure.database import AsyncSessionLocal, create_tables, engine
+from app.infrastructure.repositories.doctor_repository import DoctorRepository
+from app.application.services.doctor_import import DoctorBulkImporter, iter_text_lines
+
+CHUNK_SIZE = 1 << 16
+
+async def _read_chunks(path: str):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+async def run_import(args):
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "jsonl")
+    await create_tables()
+    try:
+        async with AsyncSessionLocal() as session:
+            importer = DoctorBulkImporter(DoctorRepository(session), batch_size=args.batch_size)
+            report = await importer.run(iter_text_lines(_read_chunks(args.path)), fmt)
+    finally:
+        await engine.dispose()
+
+    for error in report.errors:
+        print(f"   linha {error.line} (CRM {error.crm or '-'}): {error.error}")
+    if report.invalid + report.duplicates > len(report.errors):
+        print(f"   ... e mais {report.invalid + report.duplicates - len(report.errors)} linha(s) rejeitada(s).")
+    rate = report.imported / report.elapsed_seconds if report.elapsed_seconds else 0.0
+    print(f"✅ {report.imported} médicos importados ({rate:.0f} linhas/s).")
+    return report
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Importação em lote de médicos (CSV/JSONL).")
+    parser.add_argument("path", help="Arquivo .csv ou .jsonl")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Padrão: deduzido da extensão")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Linhas por transação")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_import(parse_args()))
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -5,13 +5,24 @@ import os
 # Setup de path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from app.infrastructure.database import create_tables, engine
+from app.infrastructure.database import create_tables, engine, AsyncSessionLocal
+from app.infrastructure.migrations import upgrade_schema
+from app.infrastructure.repositories.doctor_repository import DoctorRepository
 
 async def init():
     print("🏗️  Criando tabelas no banco de dados...")
     try:
         await create_tables()
-        print("✅ Tabelas criadas com sucesso (Doctors, ShiftSlots, RosterSolutions).")
+        print("✅ Tabelas criadas com sucesso (Doctors, ShiftSlots, Rosters, RosterSolutions, OptimizationJobs).")
+
+        # Colunas/índices novos em tabelas criadas por versões anteriores (idempotente)
+        applied = await upgrade_schema(engine)
+        print(f"✅ Esquema atualizado: {', '.join(applied) or 'nada a migrar'}.")
+
+        # Migra especialidades/datas dos JSON para as tabelas normalizadas (idempotente)
+        async with AsyncSessionLocal() as session:
+            migrated = await DoctorRepository(session).backfill_normalized()
+        print(f"✅ {migrated} médico(s) migrado(s) para DoctorSpecialties/DoctorDates.")
     except Exception as e:
         print(f"❌ Erro ao criar tabelas: {e}")
     finally:
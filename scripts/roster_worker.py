@@ -0,0 +1,120 @@
+"""
+Worker de otimização: consome a tabela optimization_jobs (sem broker).
+
+Uso:
+    python scripts/roster_worker.py                 # loop contínuo
+    python scripts/roster_worker.py --once          # processa no máximo um job e sai
+
+Vários workers (inclusive em hosts diferentes, apontando para o mesmo DATABASE_URL)
+podem rodar ao mesmo tempo: a reivindicação do job é um UPDATE condicional.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import uuid
+from datetime import timedelta
+
+# Setup de path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.infrastructure.database import AsyncSessionLocal, create_tables, engine
+from app.infrastructure.migrations import upgrade_schema
+from app.infrastructure.repositories.job_repository import JobRepository
+from app.infrastructure.repositories.roster_repository import RosterRepository
+from app.domain.models import OptimizationRequest
+from app.application.services.result_cache import request_fingerprint
+from app.application.services.solver_executor import _solve_in_worker
+from app.application.services.solve_scheduler import get_solve_scheduler
+
+async def _heartbeat_loop(job_id: str, worker_id: str, interval: float):
+    """Mantém o job 'vivo' enquanto o solve roda (sessão própria, separada da principal)."""
+    while True:
+        await asyncio.sleep(interval)
+        async with AsyncSessionLocal() as session:
+            alive = await JobRepository(session).heartbeat(job_id, worker_id)
+        if not alive:
+            print(f"⚠️  Job {job_id} não pertence mais a este worker (re-enfileirado?).")
+            return
+
+async def process_one(worker_id: str, stale_after: timedelta, heartbeat_interval: float, max_attempts: int) -> bool:
+    """Re-enfileira jobs órfãos, reivindica um job e resolve. Retorna True se processou algum."""
+    async with AsyncSessionLocal() as session:
+        repo = JobRepository(session)
+
+        requeued = await repo.requeue_stale(stale_after, max_attempts=max_attempts)
+        if requeued:
+            print(f"♻️  {requeued} job(s) órfão(s) devolvido(s) para a fila.")
+
+        job = await repo.claim_next(worker_id)
+        if job is None:
+            return False
+
+        print(f"🔧 [{worker_id}] Job {job.id} reivindicado (tentativa {job.attempts}).")
+        heartbeat = asyncio.create_task(_heartbeat_loop(job.id, worker_id, heartbeat_interval))
+        try:
+            request = OptimizationRequest(**job.request_payload)
+            # CP-SAT é CPU-bound e libera o GIL: roda em thread para o heartbeat seguir batendo.
+            # Mesmo ponto de entrada do /optimize (decomposição e horizonte rolante inclusos).
+            # A espera na fila do scheduler também não pode travar o loop (heartbeat)
+            with await get_solve_scheduler().acquire_async() as lease:
+                result = await asyncio.to_thread(_solve_in_worker, request, lease.num_workers)
+        except Exception as e:
+            await repo.fail(job.id, worker_id, str(e))
+            print(f"❌ Job {job.id} falhou: {e}")
+            return True
+        finally:
+            heartbeat.cancel()
+
+        if not await repo.complete(job.id, worker_id, result.solutions, result.status, result.infeasibility):
+            print(f"⚠️  Job {job.id} foi reivindicado por outro worker; resultado descartado.")
+            return True
+        print(f"✅ Job {job.id} concluído: {result.status} ({len(result.solutions)} plantões alocados).")
+
+        # Como no /optimize, a escala vira uma versão gravada do período (ligada ao job)
+        if result.solutions:
+            try:
+                roster = await RosterRepository(session).save_solution(
+                    request, result, source_job_id=job.id, request_fingerprint=request_fingerprint(request)
+                )
+                print(f"💾 Job {job.id}: escala gravada como versão {roster.version} ({roster.id}).")
+            except Exception as e:
+                print(f"⚠️  Job {job.id}: resultado concluído, mas a escala não foi gravada: {e}")
+        return True
+
+async def run_worker(args):
+    worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    stale_after = timedelta(seconds=args.stale_after)
+
+    # Garante que a tabela de jobs exista e o esquema esteja atualizado (idempotente)
+    await create_tables()
+    await upgrade_schema(engine)
+    print(f"🚀 Worker {worker_id} iniciado. Aguardando jobs...")
+
+    try:
+        while True:
+            processed = await process_one(worker_id, stale_after, args.heartbeat_interval, args.max_attempts)
+            if args.once:
+                break
+            if not processed:
+                await asyncio.sleep(args.poll_interval)
+    finally:
+        await engine.dispose()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Worker da fila de otimização de escalas.")
+    parser.add_argument("--worker-id", default=None, help="Identificador do worker (padrão: host-pid-aleatório)")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Segundos entre consultas à fila vazia")
+    parser.add_argument("--heartbeat-interval", type=float, default=5.0, help="Segundos entre heartbeats do job em execução")
+    parser.add_argument("--stale-after", type=float, default=60.0, help="Segundos sem heartbeat para considerar um job órfão")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Tentativas antes de marcar o job como 'failed'")
+    parser.add_argument("--once", action="store_true", help="Processa no máximo um job e sai")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run_worker(parse_args()))
+    except KeyboardInterrupt:
+        print("🛑 Worker encerrado.")
@@ -0,0 +1,55 @@
+import pytest
+from datetime import date, timedelta
+from app.domain.models import (
+    Doctor, DoctorAttributes, DoctorAvailability,
+    ShiftSlot, SpecialtyEnum, ShiftTypeEnum, OptimizationRequest
+)
+
+# --- Fábricas compartilhadas (cenários começam em DAY; dias contados a partir dele) ---
+
+DAY = date(2023, 10, 1)
+
+@pytest.fixture
+def make_doctor():
+    def factory(
+        doctor_id,
+        specialties=(SpecialtyEnum.CLINICA_GERAL,),
+        cost=100.0,
+        max_shifts=10,
+        unavailable=(),
+        preferred=()
+    ):
+        return Doctor(
+            id=doctor_id, name=doctor_id, crm=doctor_id,
+            specialties=list(specialties),
+            attributes=DoctorAttributes(cost_per_hour=cost),
+            availability=DoctorAvailability(
+                max_shifts_per_month=max_shifts,
+                unavailable_dates=[DAY + timedelta(days=d) for d in unavailable],
+                preferred_dates=[DAY + timedelta(days=d) for d in preferred]
+            )
+        )
+    return factory
+
+@pytest.fixture
+def make_slot():
+    def factory(
+        slot_id,
+        specialty=SpecialtyEnum.CLINICA_GERAL,
+        shift_type=ShiftTypeEnum.DIURNO,
+        day=0,
+        required=1,
+        sector=None
+    ):
+        return ShiftSlot(
+            id=slot_id, date=DAY + timedelta(days=day), shift_type=shift_type,
+            required_specialties=[specialty], required_count=required, sector_id=sector or slot_id
+        )
+    return factory
+
+@pytest.fixture
+def make_request():
+    def factory(doctors, slots, **kwargs):
+        last = max((s.date for s in slots), default=DAY)
+        return OptimizationRequest(period_start=DAY, period_end=last, doctors=doctors, slots_to_fill=slots, **kwargs)
+    return factory
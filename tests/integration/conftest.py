@@ -0,0 +1,25 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
+from app.infrastructure.database import Base
+
+# Os testes de integração rodam o cenário com asyncio.run(); com NullPool cada
+# loop abre e fecha as próprias conexões (nenhuma fica presa ao loop do fixture).
+
+@pytest.fixture
+def engine(tmp_path):
+    """Engine de um SQLite novo e vazio em tmp_path, descartado ao fim do teste."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool)
+    yield engine
+    asyncio.run(engine.dispose())
+
+@pytest.fixture
+def session_factory(engine):
+    """Fábrica de sessões sobre o banco do teste, com as tabelas do ORM já criadas."""
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
@@ -0,0 +1,45 @@
+import asyncio
+from app.infrastructure.repositories.doctor_repository import DoctorRepository
+from app.application.services.doctor_import import DoctorBulkImporter, iter_text_lines
+from app.domain.models import Doctor, DoctorAttributes, DoctorAvailability, SpecialtyEnum
+
+CSV_HEADER = "id,name,crm,specialties,seniority_level,is_preceptor,cost_per_hour,max_shifts_per_month,unavailable_dates,preferred_dates,blocked_weekdays\n"
+
+async def _chunks(data: bytes, size: int = 7):
+    # Pedaços pequenos para cortar linhas (e caracteres UTF-8) no meio
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+def test_csv_import_batches_and_reports_rejected_rows(session_factory):
+    """Teste: CSV em fluxo é gravado em lotes; duplicados e inválidos vão para o relatório."""
+    rows = [f"d{i},Dr. Fulano {i},CRM{i},clinica_geral|pediatria,2,false,150,8,2024-01-02|2024-01-03,,6\n" for i in range(10)]
+    rows.append("d99,Dr. Repetido,CRM3,pediatria,1,false,100,,,,\n")   # CRM repetido no arquivo
+    rows.append("d98,Dr. Antigo,CRM_OLD,pediatria,1,false,100,,,,\n")  # CRM já no banco
+    rows.append("d97,Dr. Inválido,CRM97,pediatria,1,false,0,,,,\n")    # custo <= 0
+    data = (CSV_HEADER + "".join(rows)).encode("utf-8")
+
+    async def scenario():
+        async with session_factory() as session:
+            repo = DoctorRepository(session)
+            await repo.create_from_domain(Doctor(
+                id="old", name="Dr. Antigo", crm="CRM_OLD", specialties=[SpecialtyEnum.PEDIATRIA],
+                attributes=DoctorAttributes(cost_per_hour=100.0), availability=DoctorAvailability()
+            ))
+            version_before = await repo.get_data_version()
+
+            report = await DoctorBulkImporter(repo, batch_size=4).run(iter_text_lines(_chunks(data)), "csv")
+
+            assert report.total_rows == 13
+            assert report.imported == 10
+            assert report.duplicates == 2 and report.invalid == 1
+            assert sorted(e.line for e in report.errors) == [12, 13, 14]
+            assert report.batches == 3
+
+            doctors = {d.id: d for d in await repo.get_all_active_doctors()}
+            assert len(doctors) == 11
+            assert doctors["d0"].name == "Dr. Fulano 0"
+            assert doctors["d0"].specialties == [SpecialtyEnum.CLINICA_GERAL, SpecialtyEnum.PEDIATRIA]
+            assert len(doctors["d0"].availability.unavailable_dates) == 2
+            assert await repo.get_data_version() == version_before + report.batches
+
+    asyncio.run(scenario())
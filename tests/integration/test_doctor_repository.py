@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from sqlalchemy.exc import IntegrityError
+from app.infrastructure.repositories.doctor_repository import DoctorRepository
+from app.domain.models import Doctor, DoctorAttributes, DoctorAvailability, SpecialtyEnum
+
+def _doctor(idx: int, specialty: SpecialtyEnum, seniority: int, crm: str = None) -> Doctor:
+    return Doctor(
+        id=f"doc_{idx:03d}", name=f"Dr. {idx}", crm=crm or f"CRM{idx}",
+        specialties=[specialty],
+        attributes=DoctorAttributes(seniority_level=seniority, cost_per_hour=100.0),
+        availability=DoctorAvailability()
+    )
+
+def test_keyset_pagination_with_filters(session_factory):
+    """Teste: Páginas por chave cobrem todos os médicos filtrados, sem repetição."""
+    async def scenario():
+        async with session_factory() as session:
+            repo = DoctorRepository(session)
+            for i in range(25):
+                specialty = SpecialtyEnum.PEDIATRIA if i % 2 else SpecialtyEnum.CLINICA_GERAL
+                await repo.create_from_domain(_doctor(i, specialty, seniority=1 + i % 5))
+
+            seen, after = [], None
+            while True:
+                page = await repo.list_page(limit=4, after_id=after, specialty="pediatria")
+                seen.extend(d.id for d in page)
+                if len(page) < 4:
+                    break
+                after = page[-1].id
+            assert seen == [f"doc_{i:03d}" for i in range(1, 25, 2)]
+
+            seniors = await repo.list_page(limit=100, min_seniority=4, max_seniority=5)
+            assert {d.attributes.seniority_level for d in seniors} == {4, 5}
+            assert len(seniors) == 10
+
+    asyncio.run(scenario())
+
+def test_duplicate_crm_lookup_and_unique_index(session_factory):
+    """Teste: CRM duplicado é achado pelo índice e barrado pelo banco no insert."""
+    async def scenario():
+        async with session_factory() as session:
+            repo = DoctorRepository(session)
+            await repo.create_from_domain(_doctor(1, SpecialtyEnum.CARDIOLOGIA, 3))
+
+            assert (await repo.get_by_crm("CRM1")).id == "doc_001"
+            assert await repo.get_by_crm("CRM999") is None
+
+            with pytest.raises(IntegrityError):
+                await repo.create_from_domain(_doctor(2, SpecialtyEnum.CARDIOLOGIA, 3, crm="CRM1"))
+            # Sessão continua utilizável após o rollback
+            assert [d.id for d in await repo.get_all_active_doctors()] == ["doc_001"]
+
+    asyncio.run(scenario())
+
+def test_eligible_doctors_filtered_in_sql(session_factory):
+    """Teste: Só médicos com especialidade e alguma data livre para os slots são carregados."""
+    from datetime import date
+    from sqlalchemy import delete
+    from app.infrastructure.orm_models import DoctorSpecialtyORM, DoctorDateORM
+    from app.domain.models import ShiftSlot, ShiftTypeEnum
+
+    def slot(slot_id, day, specialty):
+        return ShiftSlot(
+            id=slot_id, date=date(2024, 3, day), shift_type=ShiftTypeEnum.DIURNO,
+            required_specialties=[specialty], required_count=1, sector_id="UTI"
+        )
+
+    async def scenario():
+        async with session_factory() as session:
+            repo = DoctorRepository(session)
+            await repo.create_from_domain(_doctor(1, SpecialtyEnum.PEDIATRIA, 1))
+            away = _doctor(2, SpecialtyEnum.PEDIATRIA, 1)
+            away.availability.unavailable_dates = [date(2024, 3, 1), date(2024, 3, 2)]
+            await repo.create_from_domain(away)
+            partly_away = _doctor(3, SpecialtyEnum.PEDIATRIA, 1)
+            partly_away.availability.unavailable_dates = [date(2024, 3, 1)]
+            await repo.create_from_domain(partly_away)
+            await repo.create_from_domain(_doctor(4, SpecialtyEnum.CARDIOLOGIA, 1))
+
+            slots = [slot("s1", 1, "pediatria"), slot("s2", 2, "pediatria")]
+            assert await repo.get_eligible_doctor_ids(slots) == {"doc_001", "doc_003"}
+            assert [d.id for d in await repo.get_eligible_doctors(slots)] == ["doc_001", "doc_003"]
+
+            # Migração: apaga a projeção e reconstrói a partir dos JSON
+            await session.execute(delete(DoctorSpecialtyORM))
+            await session.execute(delete(DoctorDateORM))
+            await session.commit()
+            assert await repo.get_eligible_doctor_ids(slots) == set()
+            assert await repo.backfill_normalized() == 4
+            assert await repo.backfill_normalized() == 0
+            assert await repo.get_eligible_doctor_ids(slots) == {"doc_001", "doc_003"}
+
+            assert await repo.delete("doc_003")
+            assert await repo.get_eligible_doctor_ids(slots) == {"doc_001"}
+
+    asyncio.run(scenario())
@@ -0,0 +1,69 @@
+import asyncio
+from app.core.config import settings
+from app.infrastructure.orm_models import DoctorORM
+from app.infrastructure.repositories.doctor_repository import DoctorRepository
+from app.domain.models import Doctor, DoctorAttributes, DoctorAvailability, SpecialtyEnum
+
+def _doctor(idx: int) -> Doctor:
+    return Doctor(
+        id=f"doc_{idx}", name=f"Dr. {idx}", crm=f"CRM{idx}",
+        specialties=[SpecialtyEnum.CLINICA_GERAL],
+        attributes=DoctorAttributes(cost_per_hour=100.0),
+        availability=DoctorAvailability()
+    )
+
+def test_snapshot_reused_and_refreshed_on_version_bump(session_factory, monkeypatch):
+    """Teste: Snapshot é reaproveitado e recarrega após escrita local ou de outro processo."""
+    monkeypatch.setattr(settings, "DOCTOR_SNAPSHOT_CHECK_SECONDS", 0.0)
+
+    async def scenario():
+        async with session_factory() as session:
+            repo = DoctorRepository(session)
+            await repo.create_from_domain(_doctor(1))
+            assert await repo.get_data_version() == 1
+
+            first = await repo.get_active_doctors_snapshot()
+            again = await repo.get_active_doctors_snapshot()
+            assert [d.id for d in first] == ["doc_1"]
+            assert again is first  # versão igual: nenhuma recarga
+
+            # Escrita local: invalida e incrementa a versão
+            await repo.create_from_domain(_doctor(2))
+            assert {d.id for d in await repo.get_active_doctors_snapshot()} == {"doc_1", "doc_2"}
+
+            assert await repo.delete("doc_1")
+            assert await repo.get_data_version() == 3
+            assert [d.id for d in await repo.get_active_doctors_snapshot()] == ["doc_2"]
+
+        # "Outro processo": escreve direto no banco e só incrementa a versão
+        async with session_factory() as other:
+            other.add(DoctorORM(
+                id="doc_3", name="Dr. 3", crm="CRM3", specialties=["clinica_geral"],
+                attributes=_doctor(3).attributes.model_dump(mode='json'),
+                availability=_doctor(3).availability.model_dump(mode='json')
+            ))
+            await DoctorRepository(other)._bump_data_version()
+            await other.commit()
+
+        async with session_factory() as session:
+            snapshot = await DoctorRepository(session).get_active_doctors_snapshot()
+            assert {d.id for d in snapshot} == {"doc_2", "doc_3"}
+
+    asyncio.run(scenario())
+
+def test_snapshot_skips_db_within_check_interval(session_factory, monkeypatch):
+    """Teste: Dentro do intervalo de checagem, o snapshot não consulta o banco."""
+    monkeypatch.setattr(settings, "DOCTOR_SNAPSHOT_CHECK_SECONDS", 3600.0)
+
+    async def scenario():
+        async with session_factory() as session:
+            repo = DoctorRepository(session)
+            await repo.create_from_domain(_doctor(1))
+            first = await repo.get_active_doctors_snapshot()
+
+            async def fail(*args, **kwargs):
+                raise AssertionError("snapshot não deveria consultar o banco")
+            monkeypatch.setattr(repo, "get_data_version", fail)
+            assert await repo.get_active_doctors_snapshot() is first
+
+    asyncio.run(scenario())
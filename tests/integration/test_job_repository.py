@@ -0,0 +1,85 @@
+import asyncio
+from datetime import date, timedelta
+from app.infrastructure.repositories.job_repository import JobRepository
+from app.domain.models import (
+    Doctor, DoctorAttributes, DoctorAvailability,
+    ShiftSlot, SpecialtyEnum, ShiftTypeEnum, OptimizationRequest,
+    RosterSolution, JobStatusEnum, InfeasibilityIssue, InfeasibilityReport
+)
+
+def _request() -> OptimizationRequest:
+    doctor = Doctor(
+        id="doc_1", name="Dr. House", crm="111",
+        specialties=[SpecialtyEnum.CLINICA_GERAL],
+        attributes=DoctorAttributes(cost_per_hour=100.0),
+        availability=DoctorAvailability()
+    )
+    slot = ShiftSlot(
+        id="slot_1", date=date(2023, 10, 1), shift_type=ShiftTypeEnum.DIURNO,
+        required_specialties=[SpecialtyEnum.CLINICA_GERAL], required_count=1, sector_id="UTI"
+    )
+    return OptimizationRequest(
+        period_start=slot.date, period_end=slot.date, doctors=[doctor], slots_to_fill=[slot]
+    )
+
+def test_claim_is_exclusive_and_result_is_guarded(session_factory):
+    """Teste: Só um worker reivindica o job; só o dono grava o resultado."""
+    async def scenario():
+        async with session_factory() as s1, session_factory() as s2:
+            job = await JobRepository(s1).enqueue(_request())
+
+            claimed_a = await JobRepository(s1).claim_next("worker-a")
+            claimed_b = await JobRepository(s2).claim_next("worker-b")
+            assert claimed_a.id == job.id and claimed_a.status == JobStatusEnum.RUNNING.value
+            assert claimed_b is None
+
+            solution = RosterSolution(slot_id="slot_1", doctor_id="doc_1", date=date(2023, 10, 1))
+            assert not await JobRepository(s2).complete(job.id, "worker-b", [solution])
+            assert await JobRepository(s1).complete(job.id, "worker-a", [solution])
+
+            done = await JobRepository(s2).get_fresh(job.id)
+            assert done.status == JobStatusEnum.DONE.value
+            assert done.result == [solution.model_dump(mode='json')]
+
+    asyncio.run(scenario())
+
+def test_stale_jobs_are_requeued_then_failed(session_factory):
+    """Teste: Job sem heartbeat volta para a fila e falha após esgotar tentativas."""
+    async def scenario():
+        async with session_factory() as session:
+            repo = JobRepository(session)
+            job = await repo.enqueue(_request())
+
+            await repo.claim_next("worker-dead")
+            assert await repo.requeue_stale(timedelta(seconds=-1), max_attempts=2) == 1
+            assert (await repo.get_fresh(job.id)).status == JobStatusEnum.QUEUED.value
+
+            # Worker antigo não pode mais gravar resultado
+            assert not await repo.complete(job.id, "worker-dead", [])
+
+            await repo.claim_next("worker-dead-again")
+            await repo.requeue_stale(timedelta(seconds=-1), max_attempts=2)
+            failed = await repo.get_fresh(job.id)
+            assert failed.status == JobStatusEnum.FAILED.value
+            assert failed.attempts == 2
+
+    asyncio.run(scenario())
+
+def test_infeasible_job_keeps_solver_status_and_report(session_factory):
+    """Teste: Job inviável guarda o status do solver e o diagnóstico para /jobs/{id}/result."""
+    async def scenario():
+        async with session_factory() as session:
+            repo = JobRepository(session)
+            job = await repo.enqueue(_request())
+            await repo.claim_next("worker-a")
+
+            report = InfeasibilityReport(source="precheck", issues=[
+                InfeasibilityIssue(kind="slot_coverage", message="Slot slot_1 sem médicos elegíveis")
+            ])
+            assert await repo.complete(job.id, "worker-a", [], solver_status="INFEASIBLE", infeasibility=report)
+
+            done = await repo.get_fresh(job.id)
+            assert (done.status, done.solver_status, done.result) == (JobStatusEnum.DONE.value, "INFEASIBLE", [])
+            assert InfeasibilityReport(**done.infeasibility) == report
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import date
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
+from app.infrastructure.database import Base
+from app.infrastructure.migrations import upgrade_schema
+from app.infrastructure.repositories.roster_repository import RosterRepository
+from app.domain.models import (
+    ShiftSlot, SpecialtyEnum, ShiftTypeEnum, OptimizationRequest, OptimizationResult, RosterSolution
+)
+
+# Esquema da versão inicial (o medical_roster.db versionado no repositório)
+OLD_SCHEMA = [
+    """CREATE TABLE doctors (
+        id VARCHAR NOT NULL, name VARCHAR NOT NULL, crm VARCHAR NOT NULL,
+        specialties JSON NOT NULL, attributes JSON NOT NULL, availability JSON NOT NULL,
+        PRIMARY KEY (id), UNIQUE (crm)
+    )""",
+    """CREATE TABLE shift_slots (
+        id VARCHAR NOT NULL, date DATE NOT NULL, shift_type VARCHAR NOT NULL,
+        required_specialties JSON NOT NULL, required_count INTEGER, sector_id VARCHAR NOT NULL,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE roster_solutions (
+        id INTEGER NOT NULL, slot_id VARCHAR NOT NULL, doctor_id VARCHAR NOT NULL,
+        date DATE NOT NULL, is_extra_shift BOOLEAN, created_at DATE,
+        PRIMARY KEY (id),
+        FOREIGN KEY(slot_id) REFERENCES shift_slots (id),
+        FOREIGN KEY(doctor_id) REFERENCES doctors (id)
+    )""",
+    "INSERT INTO shift_slots VALUES ('old_slot', '2023-09-01', 'diurno', '[\"clinica_geral\"]', 1, 'ER')",
+    "INSERT INTO roster_solutions VALUES (1, 'old_slot', 'doc_a', '2023-09-01', 0, '2023-09-01')",
+]
+
+def test_old_database_is_upgraded_in_place(engine):
+    """Teste: Banco da versão inicial ganha as colunas/índices novos, mantém as alocações e volta a gravar escalas."""
+    async def scenario():
+        async with engine.begin() as conn:
+            for statement in OLD_SCHEMA:
+                await conn.execute(text(statement))
+            # O startup roda create_all (tabelas novas) e depois a migração
+            await conn.run_sync(Base.metadata.create_all)
+
+        applied = await upgrade_schema(engine)
+        assert "roster_solutions.roster_id" in applied
+        assert "ix_roster_solutions_doctor_date" in applied
+        assert await upgrade_schema(engine) == []  # Idempotente
+
+        async with engine.connect() as conn:
+            indexes = await conn.run_sync(lambda c: {i["name"] for i in inspect(c).get_indexes("roster_solutions")})
+        assert {"ix_roster_solutions_roster_id", "ix_roster_solutions_slot"} <= indexes
+
+        Session = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        async with Session() as session:
+            repo = RosterRepository(session)
+            legacy = (await repo.list_versions())[0]
+            assert (legacy.status, legacy.assignment_count, legacy.period_start) == ("LEGACY", 1, date(2023, 9, 1))
+            assert [a.slot_id for a in await repo.get_assignments(legacy.id)] == ["old_slot"]
+            assert [(s.id, s.required_count) for s in await repo.get_slots(legacy.id)] == [("old_slot", 1)]
+
+            slot = ShiftSlot(
+                id="slot_1", date=date(2023, 10, 1), shift_type=ShiftTypeEnum.DIURNO,
+                required_specialties=[SpecialtyEnum.CLINICA_GERAL], required_count=1, sector_id="UTI"
+            )
+            request = OptimizationRequest(
+                period_start=slot.date, period_end=slot.date, doctors=[], slots_to_fill=[slot]
+            )
+            result = OptimizationResult(status="OPTIMAL", solutions=[
+                RosterSolution(slot_id="slot_1", doctor_id="doc_a", date=slot.date)
+            ])
+            stored = await repo.save_solution(request, result, request_fingerprint="abc")
+            assert stored.version == 1
+            assert [a.doctor_id for a in await repo.get_assignments(stored.id)] == ["doc_a"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import date
+from app.infrastructure.repositories.job_repository import JobRepository
+from app.infrastructure.repositories.roster_repository import RosterRepository
+from app.domain.models import (
+    ShiftSlot, SpecialtyEnum, ShiftTypeEnum, OptimizationRequest,
+    OptimizationResult, RosterSolution
+)
+
+def _request() -> OptimizationRequest:
+    slots = [
+        ShiftSlot(
+            id=f"slot_{d}", date=date(2023, 10, d), shift_type=ShiftTypeEnum.DIURNO,
+            required_specialties=[SpecialtyEnum.CLINICA_GERAL], required_count=1, sector_id="UTI"
+        )
+        for d in (1, 2, 3)
+    ]
+    return OptimizationRequest(
+        period_start=date(2023, 10, 1), period_end=date(2023, 10, 3), doctors=[], slots_to_fill=slots
+    )
+
+def _result(doctor_by_day) -> OptimizationResult:
+    return OptimizationResult(
+        status="OPTIMAL",
+        objective_value=42.0,
+        solutions=[
+            RosterSolution(slot_id=f"slot_{d}", doctor_id=doctor, date=date(2023, 10, d))
+            for d, doctor in doctor_by_day.items()
+        ]
+    )
+
+def test_rosters_are_versioned_and_readable(session_factory):
+    """Teste: Cada gravação do mesmo período vira uma nova versão consultável."""
+    async def scenario():
+
+        async with session_factory() as session:
+            repo = RosterRepository(session)
+            first = await repo.save_solution(_request(), _result({1: "doc_a", 2: "doc_b", 3: "doc_a"}))
+            second = await repo.save_solution(_request(), _result({1: "doc_b", 2: "doc_b", 3: "doc_a"}))
+
+            assert (first.version, second.version) == (1, 2)
+            assert second.assignment_count == 3 and second.status == "OPTIMAL"
+
+            versions = await repo.list_versions(period_start=date(2023, 10, 1))
+            assert [r.version for r in versions] == [2, 1]
+
+            stored = await repo.get_assignments(first.id)
+            assert [(a.slot_id, a.doctor_id) for a in stored] == [
+                ("slot_1", "doc_a"), ("slot_2", "doc_b"), ("slot_3", "doc_a")
+            ]
+            doc_a = await repo.get_assignments(first.id, doctor_id="doc_a", start=date(2023, 10, 2))
+            assert [a.slot_id for a in doc_a] == ["slot_3"]
+
+    asyncio.run(scenario())
+
+def test_roster_slots_keep_the_demand_of_each_version(session_factory):
+    """Teste: Cada versão guarda todos os seus slots (inclusive os descobertos) com a demanda daquela versão."""
+    async def scenario():
+
+        async with session_factory() as session:
+            repo = RosterRepository(session)
+            # slot_3 fica sem alocação nesta versão
+            first = await repo.save_solution(_request(), _result({1: "doc_a", 2: "doc_b"}))
+
+            slots = await repo.get_slots(first.id)
+            assert [(s.id, s.required_count) for s in slots] == [("slot_1", 1), ("slot_2", 1), ("slot_3", 1)]
+            assert slots[0].shift_type == ShiftTypeEnum.DIURNO
+
+            repaired = _request()
+            repaired.slots_to_fill[1] = repaired.slots_to_fill[1].model_copy(update={"required_count": 2})
+            result = _result({1: "doc_a", 2: "doc_b", 3: "doc_a"})
+            result.solutions.append(RosterSolution(slot_id="slot_2", doctor_id="doc_c", date=date(2023, 10, 2)))
+            second = await repo.save_solution(repaired, result)
+
+            assert [(s.id, s.required_count) for s in await repo.get_slots(second.id)] == [
+                ("slot_1", 1), ("slot_2", 2), ("slot_3", 1)
+            ]
+            # A versão anterior continua com a demanda dela
+            assert [(s.id, s.required_count) for s in await repo.get_slots(first.id)] == [
+                ("slot_1", 1), ("slot_2", 1), ("slot_3", 1)
+            ]
+
+    asyncio.run(scenario())
+
+def test_repeated_request_does_not_create_a_new_version(session_factory):
+    """Teste: O mesmo request com a mesma escala devolve a última versão; escala diferente grava outra."""
+    async def scenario():
+
+        async with session_factory() as session:
+            repo = RosterRepository(session)
+            job = await JobRepository(session).enqueue(_request())
+            first = await repo.save_solution(
+                _request(), _result({1: "doc_a", 2: "doc_b"}), source_job_id=job.id, request_fingerprint="abc"
+            )
+            again = await repo.save_solution(_request(), _result({2: "doc_b", 1: "doc_a"}), request_fingerprint="abc")
+            changed = await repo.save_solution(_request(), _result({1: "doc_b", 2: "doc_b"}), request_fingerprint="abc")
+
+            assert again.id == first.id and first.source_job_id == job.id
+            assert (first.version, changed.version) == (1, 2)
+            assert [r.version for r in await repo.list_versions()] == [2, 1]
+
+    asyncio.run(scenario())
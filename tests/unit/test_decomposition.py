@@ -0,0 +1,99 @@
+from app.domain.models import SpecialtyEnum, ShiftTypeEnum
+from app.application.services.optimizer_service import RosterOptimizerService
+from app.application.services.problem_instance import ProblemInstance
+from app.application.services.decomposition import (
+    DecomposedOptimizerService, component_indices, split_instance, shutdown_component_pool
+)
+
+def test_disjoint_specialties_split_into_components(make_doctor, make_slot, make_request):
+    """Teste: Setores sem médicos em comum viram subproblemas independentes."""
+    request = make_request(
+        doctors=[
+            make_doctor("gp_1", [SpecialtyEnum.CLINICA_GERAL]),
+            make_doctor("ped_1", [SpecialtyEnum.PEDIATRIA]),
+            make_doctor("cardio_1", [SpecialtyEnum.CARDIOLOGIA]),  # Sem slot elegível
+        ],
+        slots=[
+            make_slot("er", SpecialtyEnum.CLINICA_GERAL, sector="ER"),
+            make_slot("ped", SpecialtyEnum.PEDIATRIA, sector="PED"),
+        ],
+        weight_fairness=1.0
+    )
+
+    instance = ProblemInstance.from_request(request)
+    parts = split_instance(instance)
+
+    assert sorted((list(sub.doctor_ids), list(sub.slot_ids)) for sub, _ in parts) == [
+        (["gp_1"], ["er"]),
+        (["ped_1"], ["ped"]),
+    ]
+    # Cada par da subinstância aponta para o mesmo (médico, slot) na original
+    for sub, pair_map in parts:
+        assert [sub.doctor_ids[i] for i in sub.pair_doctor] == [instance.doctor_ids[i] for i in instance.pair_doctor[pair_map]]
+        assert [sub.slot_ids[j] for j in sub.pair_slot] == [instance.slot_ids[j] for j in instance.pair_slot[pair_map]]
+    # Equidade usa a média do problema completo (2 slots / 3 médicos)
+    assert {sub.fairness_target for sub, _ in parts} == {0}
+
+
+def test_doctor_eligible_in_two_sectors_keeps_them_together(make_doctor, make_slot, make_request):
+    """Teste: Um médico compartilhado (H4/H5) mantém os setores no mesmo componente."""
+    request = make_request(
+        doctors=[
+            make_doctor("gp_1", [SpecialtyEnum.CLINICA_GERAL]),
+            make_doctor("both", [SpecialtyEnum.CLINICA_GERAL, SpecialtyEnum.PEDIATRIA], cost=10.0),
+            make_doctor("ped_1", [SpecialtyEnum.PEDIATRIA]),
+        ],
+        slots=[
+            make_slot("er", SpecialtyEnum.CLINICA_GERAL, sector="ER"),
+            make_slot("ped", SpecialtyEnum.PEDIATRIA, sector="PED"),
+        ]
+    )
+
+    components = component_indices(ProblemInstance.from_request(request))
+    assert [(d.tolist(), j.tolist()) for d, j in components] == [([0, 1, 2], [0, 1])]
+
+    # O médico barato não pode pegar os dois slots simultâneos (H4 atravessa os setores)
+    result = DecomposedOptimizerService(parallel=False).solve_detailed(request)
+    assert result.status == "OPTIMAL"
+    assert len(result.solutions) == 2
+    assert sum(1 for a in result.solutions if a.doctor_id == "both") == 1
+
+
+def test_decomposed_solve_matches_monolithic_objective(make_doctor, make_slot, make_request):
+    """Teste: Resolver por componentes em paralelo chega ao mesmo ótimo do modelo único."""
+    doctors = [make_doctor(f"gp_{i}", [SpecialtyEnum.CLINICA_GERAL], cost=50.0 + i) for i in range(3)]
+    doctors += [make_doctor(f"ped_{i}", [SpecialtyEnum.PEDIATRIA], cost=70.0 + i) for i in range(3)]
+    slots = [make_slot(f"er_{k}", SpecialtyEnum.CLINICA_GERAL, sector="ER") for k in range(2)]
+    slots += [make_slot(f"ped_{k}", SpecialtyEnum.PEDIATRIA, sector="PED") for k in range(2)]
+    request = make_request(doctors, slots)
+
+    monolithic = RosterOptimizerService().solve_detailed(request)
+    try:
+        decomposed = DecomposedOptimizerService(parallel=True).solve_detailed(request, num_workers=2)
+    finally:
+        shutdown_component_pool()
+
+    assert decomposed.status == monolithic.status == "OPTIMAL"
+    assert decomposed.objective_value == monolithic.objective_value
+    assert len(decomposed.solutions) == 4
+
+
+def test_decomposed_objective_counts_doctors_outside_components(make_doctor, make_slot, make_request):
+    """Teste: Com equidade, o desvio do médico sem slot elegível entra no objetivo como no modelo único."""
+    doctors = [
+        make_doctor("gp_1", [SpecialtyEnum.CLINICA_GERAL]),
+        make_doctor("ped_1", [SpecialtyEnum.PEDIATRIA]),
+        make_doctor("ortho_1", [SpecialtyEnum.ORTOPEDIA]),  # Sem slot elegível: desvio de 1 da média
+    ]
+    slots = [
+        make_slot("er_morning", SpecialtyEnum.CLINICA_GERAL, ShiftTypeEnum.MANHA, sector="ER"),
+        make_slot("er_afternoon", SpecialtyEnum.CLINICA_GERAL, ShiftTypeEnum.TARDE, sector="ER"),
+        make_slot("ped", SpecialtyEnum.PEDIATRIA, sector="PED"),
+    ]
+    request = make_request(doctors, slots, weight_fairness=1.0)
+
+    monolithic = RosterOptimizerService().solve_detailed(request)
+    decomposed = DecomposedOptimizerService(parallel=False).solve_detailed(request)
+
+    assert decomposed.status == monolithic.status == "OPTIMAL"
+    assert decomposed.objective_value == monolithic.objective_value
@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+from app.domain.models import SpecialtyEnum, ShiftTypeEnum
+from app.application.services.feasibility import check_feasibility
+from app.application.services.optimizer_service import RosterOptimizerService
+from app.application.services.problem_instance import ProblemInstance
+
+DAY = date(2023, 10, 1)
+
+def test_precheck_reports_uncovered_slot_without_calling_solver(make_doctor, make_slot, make_request):
+    """Teste: Slot sem médicos elegíveis suficientes volta INFEASIBLE com o motivo, antes do CP-SAT."""
+    request = make_request(
+        doctors=[make_doctor("gp_1", [SpecialtyEnum.CLINICA_GERAL])],
+        slots=[make_slot("er", SpecialtyEnum.CLINICA_GERAL), make_slot("ped", SpecialtyEnum.PEDIATRIA, day=1, required=2)]
+    )
+
+    result = RosterOptimizerService().solve_detailed(request)
+
+    assert result.status == "INFEASIBLE"
+    assert result.infeasibility.source == "precheck"
+    issue = result.infeasibility.issues[0]
+    assert issue.kind == "slot_coverage"
+    assert issue.slot_ids == ["ped"]
+    assert issue.specialties == ["pediatria"]
+    assert issue.dates == [DAY + timedelta(days=1)]
+    assert (issue.required, issue.available) == (2, 0)
+
+
+def test_max_flow_finds_hall_violator_behind_monthly_totals(make_doctor, make_slot, make_request):
+    """Teste: A soma mensal fecha, mas só um cardiologista (limite 2) para 3 plantões de cardiologia."""
+    request = make_request(
+        doctors=[
+            make_doctor("cardio", [SpecialtyEnum.CARDIOLOGIA, SpecialtyEnum.CLINICA_GERAL], max_shifts=2),
+            make_doctor("gp_1", [SpecialtyEnum.CLINICA_GERAL]),
+            make_doctor("gp_2", [SpecialtyEnum.CLINICA_GERAL]),
+        ],
+        slots=[make_slot(f"card_{d}", SpecialtyEnum.CARDIOLOGIA, day=d) for d in range(3)]
+        + [make_slot("er", SpecialtyEnum.CLINICA_GERAL, day=3)]
+    )
+
+    report = check_feasibility(ProblemInstance.from_request(request))
+
+    assert [i.kind for i in report.issues] == ["flow_coverage"]
+    issue = report.issues[0]
+    assert issue.slot_ids == ["card_0", "card_1", "card_2"]
+    assert issue.doctor_ids == ["cardio"]
+    assert (issue.required, issue.available) == (3, 2)
+
+
+def test_assumption_core_explains_overlap_conflict(make_doctor, make_slot, make_request):
+    """Teste: Inviável só por choque de horário (passa na pré-checagem): o núcleo aponta os slots em conflito."""
+    request = make_request(
+        doctors=[
+            make_doctor("a", [SpecialtyEnum.CLINICA_GERAL, SpecialtyEnum.PEDIATRIA]),
+            make_doctor("b", [SpecialtyEnum.CLINICA_GERAL, SpecialtyEnum.CARDIOLOGIA]),
+        ],
+        slots=[
+            make_slot("manha", SpecialtyEnum.PEDIATRIA, ShiftTypeEnum.MANHA),
+            make_slot("tarde", SpecialtyEnum.CARDIOLOGIA, ShiftTypeEnum.TARDE),
+            make_slot("diurno", SpecialtyEnum.CLINICA_GERAL, ShiftTypeEnum.DIURNO),
+            make_slot("amanha", SpecialtyEnum.CLINICA_GERAL, day=1),
+        ]
+    )
+    assert check_feasibility(ProblemInstance.from_request(request)).issues == []
+
+    result = RosterOptimizerService().solve_detailed(request)
+
+    assert result.status == "INFEASIBLE"
+    assert result.infeasibility.source == "core"
+    assert [i.kind for i in result.infeasibility.issues] == ["core_slot_demand"]
+    # O slot do dia seguinte não participa do conflito
+    assert sorted(result.infeasibility.issues[0].slot_ids) == ["diurno", "manha", "tarde"]
+
+
+def test_feasible_request_has_no_issues(make_doctor, make_slot, make_request):
+    """Teste: Instância viável passa limpa pela pré-checagem e não ganha relatório."""
+    request = make_request(
+        doctors=[make_doctor("gp_1", [SpecialtyEnum.CLINICA_GERAL]), make_doctor("gp_2", [SpecialtyEnum.CLINICA_GERAL])],
+        slots=[make_slot("er", SpecialtyEnum.CLINICA_GERAL, required=2)]
+    )
+
+    assert check_feasibility(ProblemInstance.from_request(request)).issues == []
+    result = RosterOptimizerService().solve_detailed(request)
+    assert result.status == "OPTIMAL" and result.infeasibility is None
@@ -0,0 +1,82 @@
+import numpy as np
+from ortools.sat.python import cp_model
+from app.domain.models import SpecialtyEnum, ShiftTypeEnum
+from app.application.services.greedy_heuristic import greedy_roster
+from app.application.services.optimizer_service import RosterOptimizerService
+from app.application.services.problem_instance import ProblemInstance
+
+def test_greedy_fills_hardest_slots_first(make_doctor, make_slot, make_request):
+    """Teste: O slot com um único elegível é preenchido antes, mesmo que o médico seja o mais barato do outro."""
+    doctors = [
+        make_doctor("versatile", [SpecialtyEnum.CLINICA_GERAL, SpecialtyEnum.PEDIATRIA], cost=10.0),
+        make_doctor("gp", [SpecialtyEnum.CLINICA_GERAL], cost=200.0),
+    ]
+    # Mesmo horário: "versatile" só pode ficar em um; em ordem de entrada pegaria o de clínica geral
+    slots = [make_slot("gp_slot", SpecialtyEnum.CLINICA_GERAL), make_slot("peds_slot", SpecialtyEnum.PEDIATRIA)]
+    instance = ProblemInstance.from_request(make_request(doctors, slots))
+
+    pairs, complete = greedy_roster(instance)
+
+    assert complete
+    assert {(a.doctor_id, a.slot_id) for a in instance.to_solutions(pairs)} == {
+        ("versatile", "peds_slot"), ("gp", "gp_slot")
+    }
+
+
+def test_greedy_respects_overlap_and_monthly_limit(make_doctor, make_slot, make_request):
+    """Teste: Sem médicos suficientes, a heurística deixa vaga aberta em vez de quebrar H4/H5."""
+    doctors = [make_doctor("solo", [SpecialtyEnum.CLINICA_GERAL], max_shifts=2)]
+    slots = [
+        make_slot("day_0", SpecialtyEnum.CLINICA_GERAL),
+        make_slot("morning_0", SpecialtyEnum.CLINICA_GERAL, shift_type=ShiftTypeEnum.MANHA),
+        make_slot("day_1", SpecialtyEnum.CLINICA_GERAL, day=1),
+        make_slot("day_2", SpecialtyEnum.CLINICA_GERAL, day=2),
+    ]
+    instance = ProblemInstance.from_request(make_request(doctors, slots))
+
+    pairs, complete = greedy_roster(instance)
+
+    assert not complete
+    assert len(pairs) == 2
+    assert not {"day_0", "morning_0"} <= {instance.slot_ids[j] for j in instance.pair_slot[pairs]}
+
+
+def test_heuristic_roster_returned_when_cp_sat_finds_nothing(monkeypatch, make_doctor, make_slot, make_request):
+    """Teste: Se o CP-SAT não acha solução no tempo limite, a escala gulosa sai como FEASIBLE/heuristic."""
+    doctors = [make_doctor(f"doc_{i}", [SpecialtyEnum.CLINICA_GERAL], cost=100.0 + i, max_shifts=3) for i in range(6)]
+    slots = [make_slot(f"slot_{d}", SpecialtyEnum.CLINICA_GERAL, day=d, required=2) for d in range(7)]
+    request = make_request(doctors, slots, weight_fairness=1.0)
+
+    # Simula um solve que estoura o tempo sem nenhum incumbente
+    original_solve = cp_model.CpSolver.Solve
+    def out_of_time(self, model, callback=None):
+        self.parameters.max_time_in_seconds = 0.0
+        return original_solve(self, model, callback)
+    monkeypatch.setattr(cp_model.CpSolver, "Solve", out_of_time)
+
+    assert RosterOptimizerService(use_greedy=False).solve_detailed(request).solutions == []
+
+    result = RosterOptimizerService().solve_detailed(request)
+    instance = ProblemInstance.from_request(request)
+
+    assert (result.status, result.engine) == ("FEASIBLE", "heuristic")
+    assert len(result.solutions) == 14
+    assert result.objective_value == instance.objective_value(instance.pairs_of(result.solutions))
+    per_doctor = np.unique([a.doctor_id for a in result.solutions], return_counts=True)[1]
+    assert per_doctor.max() <= 3
+
+
+def test_proven_optimum_kept_when_greedy_ties(monkeypatch, make_doctor, make_slot, make_request):
+    """Teste: Empate com a heurística (objetivo do CP-SAT com ruído de float) mantém o ótimo provado."""
+    doctors = [make_doctor("cheap", [SpecialtyEnum.CLINICA_GERAL], cost=50.0), make_doctor("pricey", [SpecialtyEnum.CLINICA_GERAL])]
+    request = make_request(doctors, [make_slot("slot_0", SpecialtyEnum.CLINICA_GERAL)])
+
+    # O double devolvido pelo CP-SAT fica um fio abaixo do objetivo inteiro da escala gulosa
+    original_objective = cp_model.CpSolver.ObjectiveValue
+    monkeypatch.setattr(cp_model.CpSolver, "ObjectiveValue", lambda self: original_objective(self) - 1e-9)
+
+    result = RosterOptimizerService(use_flow=False, use_aggregation=False).solve_detailed(request)
+
+    assert (result.status, result.engine) == ("OPTIMAL", "cp_sat")
+    assert result.objective_value == -600.0
+    assert [(a.doctor_id, a.slot_id) for a in result.solutions] == [("cheap", "slot_0")]
@@ -0,0 +1,83 @@
+import pytest
+from datetime import date, timedelta
+from app.domain.models import DoctorUnavailability, RosterChange, RosterSolution
+from app.application.services.local_repair import LocalRepairService, apply_change
+
+DAY = date(2023, 10, 1)
+
+@pytest.fixture
+def er_slot(make_slot):
+    def factory(day, required=1):
+        return make_slot(f"slot_{day}", day=day, required=required, sector="ER")
+    return factory
+
+@pytest.fixture
+def daily_request(make_request, er_slot):
+    def factory(doctors, days):
+        return make_request(doctors, [er_slot(d) for d in range(days)])
+    return factory
+
+def roster(doctor_by_day):
+    return [
+        RosterSolution(slot_id=f"slot_{d}", doctor_id=doctor, date=DAY + timedelta(days=d))
+        for d, doctor in doctor_by_day.items()
+    ]
+
+def keys(solutions):
+    return {(a.doctor_id, a.slot_id) for a in solutions}
+
+
+def test_repair_only_touches_the_affected_neighborhood(make_doctor, daily_request):
+    """Teste: Médico doente em um dia; só aquele plantão troca, mesmo que o resto pudesse ficar mais barato."""
+    request = daily_request([make_doctor("a", cost=100.0), make_doctor("b", cost=150.0), make_doctor("c", cost=50.0)], 7)
+    # Escala publicada com "a" em tudo; "c" (mais barato) entrou depois e não deve embaralhar a escala
+    current = roster({d: "a" for d in range(7)})
+    change = RosterChange(unavailable=[DoctorUnavailability(doctor_id="a", dates=[DAY + timedelta(days=3)])])
+
+    result = LocalRepairService().repair(apply_change(request, change), current, change.neighborhood_days)
+
+    assert result.status == "FEASIBLE"
+    assert keys(result.solutions) == keys(current) - {("a", "slot_3")} | {("c", "slot_3")}
+    report = result.repair
+    assert (report.churn, report.kept_assignments) == (2, 6)
+    assert report.freed_slots == 3 and report.freed_variables < report.total_variables
+    assert keys(report.removed) == {("a", "slot_3")} and keys(report.added) == {("c", "slot_3")}
+
+
+def test_repair_handles_new_slots_and_demand_changes(make_doctor, daily_request, er_slot):
+    """Teste: Slot novo e aumento de demanda só acrescentam alocações (nenhuma remoção)."""
+    request = daily_request([make_doctor("a", cost=100.0), make_doctor("b", cost=150.0)], 4)
+    current = roster({0: "a", 1: "b", 2: "a", 3: "b"})
+    change = RosterChange(added_slots=[er_slot(4)], demand_changes={"slot_1": 2})
+
+    result = LocalRepairService().repair(apply_change(request, change), current, change.neighborhood_days)
+
+    assert keys(current) <= keys(result.solutions)
+    assert keys(result.repair.added) == {("a", "slot_1"), ("a", "slot_4")}
+    assert result.repair.removed == []
+
+
+def test_repair_widens_neighborhood_when_locally_infeasible(make_doctor, daily_request):
+    """Teste: Se a vizinhança não fecha (limite mensal), ela é ampliada até haver solução."""
+    request = daily_request([make_doctor("a", cost=100.0, max_shifts=3), make_doctor("b", cost=100.0, max_shifts=3)], 6)
+    current = roster({0: "a", 1: "a", 2: "a", 3: "b", 4: "b", 5: "b"})
+    change = RosterChange(
+        unavailable=[DoctorUnavailability(doctor_id="a", dates=[DAY + timedelta(days=1)])], neighborhood_days=0
+    )
+
+    result = LocalRepairService().repair(apply_change(request, change), current, change.neighborhood_days)
+
+    # ±0 e ±1 dia deixam "b" sem limite livre; com ±2 "b" solta o dia 3 e cobre o dia 1
+    assert result.status == "FEASIBLE"
+    assert result.repair.neighborhood_days == 2
+    assert ("b", "slot_1") in keys(result.solutions) and ("a", "slot_3") in keys(result.solutions)
+    assert result.repair.churn == 4
+
+
+def test_apply_change_rejects_unknown_slots(make_doctor, daily_request, er_slot):
+    """Teste: Mudança citando slot inexistente é recusada antes do solver."""
+    request = daily_request([make_doctor("a", cost=100.0)], 2)
+    with pytest.raises(ValueError):
+        apply_change(request, RosterChange(removed_slot_ids=["slot_9"]))
+    with pytest.raises(ValueError):
+        apply_change(request, RosterChange(added_slots=[er_slot(0)]))
@@ -2,9 +2,10 @@ import pytest
 from datetime import date, timedelta
 from app.domain.models import (
     Doctor, DoctorAttributes, DoctorAvailability, 
-    ShiftSlot, SpecialtyEnum, ShiftTypeEnum, OptimizationRequest
+    ShiftSlot, SpecialtyEnum, ShiftTypeEnum, OptimizationRequest, RosterSolution, CompactRoster
 )
-from app.application.services.optimizer_service import RosterOptimizerService
+from app.application.services.optimizer_service import RosterOptimizerService, SolveControl
+from app.application.services.problem_instance import ProblemInstance, overlap_cliques
 
 # --- Fixtures (Dados de Teste Reutilizáveis) ---
 
@@ -122,4 +123,180 @@ def test_double_booking_prevention(basic_doctors):
     # Como não definimos prioridade hard de preencher todos, ele preencherá o que der (1)
     # Obs: Se fosse hard constraint preencher todos, retornaria Infeasible (len=0).
     # Na nossa implementação atual, tentamos maximizar, então ele preenche 1.
-    assert len(result) <= 1
\ No newline at end of file
+    assert len(result) <= 1
+
+def test_eligibility_prepass_skips_ineligible_pairs(single_slot):
+    """Teste: Pares inelegíveis (H2/H3) não devem gerar variáveis de decisão."""
+    gp = Doctor(
+        id="doc_gp", name="Dr. GP", crm="444",
+        specialties=[SpecialtyEnum.CLINICA_GERAL],
+        attributes=DoctorAttributes(cost_per_hour=100.0),
+        availability=DoctorAvailability()
+    )
+    gp_off = Doctor(
+        id="doc_gp_off", name="Dr. GP Folga", crm="555",
+        specialties=[SpecialtyEnum.CLINICA_GERAL],
+        attributes=DoctorAttributes(cost_per_hour=100.0),
+        availability=DoctorAvailability(unavailable_dates=[single_slot.date])
+    )
+    cardio = Doctor(
+        id="doc_cardio", name="Dr. Cardio", crm="666",
+        specialties=[SpecialtyEnum.CARDIOLOGIA],
+        attributes=DoctorAttributes(cost_per_hour=100.0),
+        availability=DoctorAvailability()
+    )
+    request = OptimizationRequest(
+        period_start=single_slot.date, period_end=single_slot.date,
+        doctors=[gp, gp_off, cardio], slots_to_fill=[single_slot]
+    )
+
+    instance = ProblemInstance.from_request(request)
+    pairs = zip(instance.pair_doctor.tolist(), instance.pair_slot.tolist())
+    assert [(instance.doctor_ids[i], instance.slot_ids[j]) for i, j in pairs] == [("doc_gp", "slot_1")]
+
+    result = RosterOptimizerService().solve(request)
+    assert [(r.doctor_id, r.slot_id) for r in result] == [("doc_gp", "slot_1")]
+
+
+def test_overlap_cliques_sweep_line():
+    """Teste: A sweep-line agrupa slots mutuamente sobrepostos em cliques máximas."""
+    day_1 = date(2023, 10, 1)
+    day_2 = day_1 + timedelta(days=1)
+
+    def make_slot(slot_id, slot_date, shift_type):
+        return ShiftSlot(
+            id=slot_id, date=slot_date, shift_type=shift_type,
+            required_specialties=[SpecialtyEnum.CLINICA_GERAL], required_count=1, sector_id="ER"
+        )
+
+    slots = [
+        make_slot("d1_manha", day_1, ShiftTypeEnum.MANHA),
+        make_slot("d1_tarde", day_1, ShiftTypeEnum.TARDE),
+        make_slot("d1_diurno", day_1, ShiftTypeEnum.DIURNO),
+        make_slot("d1_24h", day_1, ShiftTypeEnum.MISTO_24H),
+        make_slot("d1_noturno", day_1, ShiftTypeEnum.NOTURNO),
+        make_slot("d2_manha", day_2, ShiftTypeEnum.MANHA),
+    ]
+
+    instance = ProblemInstance.from_request(OptimizationRequest(
+        period_start=day_1, period_end=day_2, doctors=[], slots_to_fill=slots
+    ))
+    cliques = overlap_cliques(instance.slot_start, instance.slot_end)
+    as_sets = sorted(sorted(instance.slot_ids[j] for j in clique.tolist()) for clique in cliques)
+
+    assert as_sets == [
+        ["d1_24h", "d1_diurno", "d1_manha"],
+        ["d1_24h", "d1_diurno", "d1_tarde"],
+        ["d1_24h", "d1_noturno"],
+    ]
+
+
+def test_warm_start_reports_hint_survival(single_slot):
+    """Teste: A escala anterior vira hint e o relatório mostra o que sobreviveu."""
+    cheap = Doctor(
+        id="doc_cheap", name="Dr. Barato", crm="777",
+        specialties=[SpecialtyEnum.CLINICA_GERAL],
+        attributes=DoctorAttributes(cost_per_hour=50.0),
+        availability=DoctorAvailability()
+    )
+    expensive = Doctor(
+        id="doc_exp", name="Dr. Caro", crm="888",
+        specialties=[SpecialtyEnum.CLINICA_GERAL],
+        attributes=DoctorAttributes(cost_per_hour=500.0),
+        availability=DoctorAvailability()
+    )
+    previous = [
+        RosterSolution(slot_id="slot_1", doctor_id="doc_cheap", date=single_slot.date),
+        RosterSolution(slot_id="slot_old", doctor_id="doc_gone", date=single_slot.date),
+    ]
+    request = OptimizationRequest(
+        period_start=single_slot.date, period_end=single_slot.date,
+        doctors=[cheap, expensive], slots_to_fill=[single_slot],
+        previous_roster=previous
+    )
+
+    result = RosterOptimizerService().solve_detailed(request)
+
+    assert result.status == "OPTIMAL"
+    assert [(r.doctor_id, r.slot_id) for r in result.solutions] == [("doc_cheap", "slot_1")]
+    assert result.hint.hinted_assignments == 1
+    assert result.hint.discarded_assignments == 1
+    assert result.hint.kept_assignments == 1
+    assert result.hint.survival_rate == 0.5
+
+
+def test_progress_callback_streams_incumbents():
+    """Teste: Cada incumbente é repassado; aplicar os diffs reproduz a escala final."""
+    doctors = [
+        Doctor(
+            id=f"doc_{i}", name=f"Dr. {i}", crm=f"90{i}",
+            specialties=[SpecialtyEnum.CLINICA_GERAL],
+            attributes=DoctorAttributes(cost_per_hour=50.0 + 10 * i),
+            availability=DoctorAvailability()
+        )
+        for i in range(4)
+    ]
+    slots = [
+        ShiftSlot(
+            id=f"slot_{d}", date=date(2023, 10, 1) + timedelta(days=d), shift_type=ShiftTypeEnum.DIURNO,
+            required_specialties=[SpecialtyEnum.CLINICA_GERAL], required_count=2, sector_id="ER"
+        )
+        for d in range(3)
+    ]
+    request = OptimizationRequest(
+        period_start=slots[0].date, period_end=slots[-1].date,
+        doctors=doctors, slots_to_fill=slots
+    )
+
+    events = []
+    result = RosterOptimizerService().solve_detailed(request, on_solution=events.append)
+
+    assert events and [e.sequence for e in events] == list(range(1, len(events) + 1))
+    assert events[0].assignments is not None
+
+    current = {(a.doctor_id, a.slot_id) for a in events[0].assignments}
+    for event in events[1:]:
+        current -= {(a.doctor_id, a.slot_id) for a in event.removed}
+        current |= {(a.doctor_id, a.slot_id) for a in event.added}
+    assert current == {(a.doctor_id, a.slot_id) for a in result.solutions}
+    assert events[-1].objective_value == result.objective_value
+
+
+def test_solve_control_stops_before_search(single_slot):
+    """Teste: Um solve já cancelado não entra na busca."""
+    doctor = Doctor(
+        id="doc_gp", name="Dr. GP", crm="999",
+        specialties=[SpecialtyEnum.CLINICA_GERAL],
+        attributes=DoctorAttributes(cost_per_hour=100.0),
+        availability=DoctorAvailability()
+    )
+    request = OptimizationRequest(
+        period_start=single_slot.date, period_end=single_slot.date,
+        doctors=[doctor], slots_to_fill=[single_slot]
+    )
+    control = SolveControl()
+    control.stop()
+
+    result = RosterOptimizerService().solve_detailed(request, control=control)
+    assert result.solutions == []
+
+
+def test_compact_roster_round_trip():
+    """Teste: O formato colunar (?format=compact) reconstrói exatamente as alocações."""
+    solutions = [
+        RosterSolution(slot_id="s1", doctor_id="doc_a", date=date(2023, 10, 1)),
+        RosterSolution(slot_id="s1", doctor_id="doc_b", date=date(2023, 10, 1)),
+        RosterSolution(slot_id="s2", doctor_id="doc_a", date=date(2023, 10, 2)),
+    ]
+
+    compact = CompactRoster.from_solutions(solutions)
+
+    assert compact.doctor_ids == ["doc_a", "doc_b"]
+    assert compact.slot_ids == ["s1", "s2"]
+    rebuilt = [
+        RosterSolution(
+            slot_id=compact.slot_ids[j], doctor_id=compact.doctor_ids[i], date=compact.slot_dates[j]
+        )
+        for i, j in zip(compact.doctor_index, compact.slot_index)
+    ]
+    assert rebuilt == solutions
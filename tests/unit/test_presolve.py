@@ -0,0 +1,70 @@
+from app.domain.models import SpecialtyEnum, ShiftTypeEnum
+from app.application.services.optimizer_service import RosterOptimizerService
+from app.application.services.presolve import presolve
+from app.application.services.problem_instance import ProblemInstance
+
+def keys(instance, pairs):
+    return {(a.doctor_id, a.slot_id) for a in instance.to_solutions(pairs)}
+
+
+def test_forced_assignments_propagate_through_overlap_and_monthly_limit(make_doctor, make_slot, make_request):
+    """Teste: Pediatra único fica obrigatório nos slots de pediatria e perde o choque de horário e o que passa do limite."""
+    doctors = [
+        make_doctor("peds", [SpecialtyEnum.PEDIATRIA, SpecialtyEnum.CLINICA_GERAL], max_shifts=2),
+        make_doctor("gp", [SpecialtyEnum.CLINICA_GERAL]),
+    ]
+    slots = [
+        make_slot("peds_0", SpecialtyEnum.PEDIATRIA),
+        make_slot("peds_1", SpecialtyEnum.PEDIATRIA, day=1),
+        make_slot("gp_morning_0", SpecialtyEnum.CLINICA_GERAL, shift_type=ShiftTypeEnum.MANHA),  # Colide com peds_0
+        make_slot("gp_2", SpecialtyEnum.CLINICA_GERAL, day=2),                                   # Passaria do limite
+    ]
+    instance = ProblemInstance.from_request(make_request(doctors, slots))
+
+    reduction = presolve(instance)
+
+    # Sem os pares de "peds", os slots de clínica geral ficam só com "gp": obrigatórios também
+    assert keys(reduction.instance, reduction.forced) == {
+        ("peds", "peds_0"), ("peds", "peds_1"), ("gp", "gp_morning_0"), ("gp", "gp_2")
+    }
+    assert keys(instance, reduction.pair_map) == keys(reduction.instance, reduction.forced)
+    assert reduction.report.variables_before == 6
+    assert reduction.report.variables_after == 4
+    assert reduction.report.forced_assignments == 4
+    assert reduction.report.resolved_slots == 4
+
+    result = RosterOptimizerService(use_flow=False).solve_detailed(make_request(doctors, slots))
+    assert result.status == "OPTIMAL"
+    assert {(a.doctor_id, a.slot_id) for a in result.solutions} == keys(instance, reduction.pair_map)
+    assert result.presolve.variables_after == 4
+
+
+def test_doctor_without_pairs_leaves_model_but_keeps_fairness_penalty(make_doctor, make_slot, make_request):
+    """Teste: Médico sem slot elegível sai do modelo e o objetivo continua igual ao do modelo completo."""
+    doctors = [
+        make_doctor("gp_a", [SpecialtyEnum.CLINICA_GERAL], cost=100.0),
+        make_doctor("gp_b", [SpecialtyEnum.CLINICA_GERAL], cost=150.0),
+        make_doctor("away", [SpecialtyEnum.CLINICA_GERAL], unavailable=range(3)),
+    ]
+    slots = [make_slot(f"gp_{d}", SpecialtyEnum.CLINICA_GERAL, day=d) for d in range(3)]
+    request = make_request(doctors, slots, weight_fairness=1.0)
+
+    reduced = RosterOptimizerService(use_flow=False, use_greedy=False).solve_detailed(request)
+    full = RosterOptimizerService(use_flow=False, use_greedy=False, use_presolve=False).solve_detailed(request)
+
+    assert reduced.status == full.status == "OPTIMAL"
+    assert reduced.objective_value == full.objective_value
+    assert reduced.presolve.dropped_doctors == 1
+    assert full.presolve is None
+
+
+def test_contradiction_leaves_instance_to_the_solver(make_doctor, make_slot, make_request):
+    """Teste: Alocações obrigatórias que colidem entre si não são reduzidas (o problema é inviável)."""
+    doctors = [make_doctor("solo", [SpecialtyEnum.CLINICA_GERAL])]
+    slots = [
+        make_slot("day_0", SpecialtyEnum.CLINICA_GERAL),
+        make_slot("morning_0", SpecialtyEnum.CLINICA_GERAL, shift_type=ShiftTypeEnum.MANHA),
+    ]
+    instance = ProblemInstance.from_request(make_request(doctors, slots))
+
+    assert presolve(instance) is None
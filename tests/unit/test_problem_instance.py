@@ -0,0 +1,107 @@
+import pickle
+import random
+
+import numpy as np
+import pytest
+from datetime import date, timedelta
+from app.domain.models import (
+    Doctor, DoctorAttributes, DoctorAvailability,
+    ShiftSlot, SpecialtyEnum, ShiftTypeEnum, OptimizationRequest
+)
+from app.application.services.problem_instance import ProblemInstance
+
+def _random_request(seed: int, n_doctors: int = 15, n_slots: int = 40) -> OptimizationRequest:
+    rnd = random.Random(seed)
+    start = date(2023, 10, 1)
+    specialties = list(SpecialtyEnum)
+    doctors = [
+        Doctor(
+            id=f"doc_{i}", name=f"Dr. {i}", crm=f"CRM{i}",
+            specialties=rnd.sample(specialties, rnd.randint(1, 3)),
+            attributes=DoctorAttributes(cost_per_hour=rnd.uniform(50, 300)),
+            availability=DoctorAvailability(
+                unavailable_dates=[start + timedelta(days=rnd.randrange(10)) for _ in range(3)],
+                preferred_dates=[start + timedelta(days=rnd.randrange(10))]
+            )
+        )
+        for i in range(n_doctors)
+    ]
+    slots = [
+        ShiftSlot(
+            id=f"slot_{j}", date=start + timedelta(days=j % 10), shift_type=list(ShiftTypeEnum)[j % 5],
+            required_specialties=[rnd.choice(specialties).value], required_count=1, sector_id="UTI"
+        )
+        for j in range(n_slots)
+    ]
+    return OptimizationRequest(
+        period_start=start, period_end=start + timedelta(days=9), doctors=doctors, slots_to_fill=slots
+    )
+
+def test_compiled_matrices_match_per_pair_rules():
+    """Teste: Bitmasks/matrizes NumPy reproduzem as regras par a par (H2, H3, custo, preferência)."""
+    for seed in range(5):
+        request = _random_request(seed)
+        instance = ProblemInstance.from_request(request)
+
+        expected = [
+            (i, j)
+            for i, doctor in enumerate(request.doctors)
+            for j, slot in enumerate(request.slots_to_fill)
+            if slot.date not in doctor.availability.unavailable_dates
+            and set(doctor.specialties).intersection(slot.required_specialties)
+        ]
+        assert list(zip(instance.pair_doctor.tolist(), instance.pair_slot.tolist())) == expected
+
+        costs = instance.pair_cost.tolist()
+        preferred = instance.pair_preferred.tolist()
+        for k, (i, j) in enumerate(expected):
+            doctor, slot = request.doctors[i], request.slots_to_fill[j]
+            assert costs[k] == int(doctor.attributes.cost_per_hour * slot.hours_duration)
+            assert preferred[k] == (slot.date in doctor.availability.preferred_dates)
+
+        grid = [(i, j) for i in range(instance.n_doctors) for j in range(instance.n_slots)]
+        found = instance.find_pairs([i for i, _ in grid], [j for _, j in grid])
+        assert (found >= 0).sum() == instance.n_pairs
+        assert [found[i * instance.n_slots + j] for i, j in expected] == list(range(len(expected)))
+
+
+def test_instance_is_immutable_and_pickles_arrays_only():
+    """Teste: A instância não aceita escrita e sobrevive ao pickle (pool de processos) sem perder nada."""
+    instance = ProblemInstance.from_request(_random_request(0))
+
+    with pytest.raises(AttributeError):
+        instance.weight_cost = 5.0
+    with pytest.raises(ValueError):
+        instance.pair_cost[0] = 0
+
+    clone = pickle.loads(pickle.dumps(instance))
+    assert clone.doctor_ids == instance.doctor_ids
+    assert np.array_equal(clone.pair_doctor, instance.pair_doctor)
+    assert np.array_equal(clone.slot_start, instance.slot_start)
+    # Minutos absolutos: o plantão noturno (19h-07h) termina no dia seguinte
+    night = [j for j, s in enumerate(_random_request(0).slots_to_fill) if s.shift_type == ShiftTypeEnum.NOTURNO][0]
+    assert clone.slot_end[night] - clone.slot_start[night] == 12 * 60
+    assert clone.slot_end[night] == (clone.slot_day[night] + 1) * 1440 + 7 * 60
+
+
+def test_subset_maps_pairs_back_to_parent():
+    """Teste: Subinstância mantém só os pares dos médicos/slots escolhidos e aponta para os pares originais."""
+    instance = ProblemInstance.from_request(_random_request(1))
+    doctor_idx, slot_idx = np.array([2, 5, 7]), np.array([30, 1, 4, 12])
+
+    sub, pair_map = instance.subset(doctor_idx, slot_idx)
+
+    assert sub.doctor_ids == tuple(instance.doctor_ids[i] for i in doctor_idx)
+    assert sub.slot_ids == tuple(instance.slot_ids[j] for j in slot_idx)
+    expected = {
+        (i, j) for i, j in zip(instance.pair_doctor.tolist(), instance.pair_slot.tolist())
+        if i in doctor_idx and j in slot_idx
+    }
+    assert len(pair_map) == sub.n_pairs == len(expected)
+    for k, parent in enumerate(pair_map.tolist()):
+        assert instance.pair_doctor[parent] == doctor_idx[sub.pair_doctor[k]]
+        assert instance.pair_slot[parent] == slot_idx[sub.pair_slot[k]]
+        assert sub.pair_cost[k] == instance.pair_cost[parent]
+    # Ordem médico-depois-slot na numeração nova
+    keys = list(zip(sub.pair_doctor.tolist(), sub.pair_slot.tolist()))
+    assert keys == sorted(keys)
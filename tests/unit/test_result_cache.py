@@ -0,0 +1,82 @@
+import asyncio
+from datetime import date
+from app.domain.models import (
+    Doctor, DoctorAttributes, DoctorAvailability,
+    ShiftSlot, SpecialtyEnum, ShiftTypeEnum, OptimizationRequest, OptimizationResult
+)
+from app.application.services.result_cache import RosterResultCache, request_fingerprint
+
+def make_request(doctor_ids, weight_cost=1.0):
+    doctors = [
+        Doctor(
+            id=doctor_id, name=doctor_id, crm=doctor_id,
+            specialties=[SpecialtyEnum.CLINICA_GERAL],
+            attributes=DoctorAttributes(cost_per_hour=100.0),
+            availability=DoctorAvailability()
+        )
+        for doctor_id in doctor_ids
+    ]
+    slot = ShiftSlot(
+        id="slot_1", date=date(2023, 10, 1), shift_type=ShiftTypeEnum.DIURNO,
+        required_specialties=[SpecialtyEnum.CLINICA_GERAL], required_count=1, sector_id="UTI"
+    )
+    return OptimizationRequest(
+        period_start=slot.date, period_end=slot.date,
+        doctors=doctors, slots_to_fill=[slot], weight_cost=weight_cost
+    )
+
+
+def test_fingerprint_ignores_doctor_order_but_not_weights():
+    """Teste: A chave é canônica (ordem do banco não importa), mas muda com os pesos."""
+    assert request_fingerprint(make_request(["a", "b"])) == request_fingerprint(make_request(["b", "a"]))
+    assert request_fingerprint(make_request(["a", "b"])) != request_fingerprint(make_request(["a", "b"], 2.0))
+
+
+def test_identical_requests_share_one_solve_and_invalidate_by_doctor():
+    """Teste: Single-flight + hit posterior; escrita no médico derruba a entrada."""
+    cache = RosterResultCache(max_entries=10, max_bytes=1_000_000, ttl_seconds=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return OptimizationResult(status="OPTIMAL", objective_value=1.0)
+
+    async def scenario():
+        request = make_request(["a", "b"])
+        first, second = await asyncio.gather(
+            cache.get_or_compute(request, compute),
+            cache.get_or_compute(request, compute),
+        )
+        assert first is second
+        await cache.get_or_compute(request, compute)
+
+        assert cache.invalidate_doctor("z") == 0
+        assert cache.invalidate_doctor("a") == 1
+        await cache.get_or_compute(request, compute)
+
+    asyncio.run(scenario())
+    assert len(calls) == 2
+    assert cache.stats()["coalesced"] == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_lru_eviction_and_uncacheable_status():
+    """Teste: LRU respeita o limite de entradas; UNKNOWN não é cacheado."""
+    cache = RosterResultCache(max_entries=1, max_bytes=1_000_000, ttl_seconds=60)
+
+    async def solved():
+        return OptimizationResult(status="OPTIMAL")
+
+    async def timed_out():
+        return OptimizationResult(status="UNKNOWN")
+
+    async def scenario():
+        await cache.get_or_compute(make_request(["a"]), solved)
+        await cache.get_or_compute(make_request(["b"]), solved)
+        await cache.get_or_compute(make_request(["c"]), timed_out)
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["evictions"] == 1
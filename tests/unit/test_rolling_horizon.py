@@ -0,0 +1,59 @@
+import pytest
+from collections import Counter
+from app.domain.models import RollingHorizonSettings, RosterSolution
+from app.application.services.optimizer_service import RosterOptimizerService
+from app.application.services.problem_instance import ProblemInstance
+from app.application.services.rolling_horizon import RollingHorizonService
+
+@pytest.fixture
+def daily_slots(make_slot):
+    def factory(days):
+        return [make_slot(f"slot_{d}", day=d, sector="ER") for d in range(days)]
+    return factory
+
+
+def test_max_shifts_applies_per_calendar_month(make_doctor, make_request, daily_slots):
+    """Teste: Em horizontes de mais de um mês, o limite H5 vale por mês civil."""
+    doctors = [make_doctor("doc_a", cost=100.0, max_shifts=16), make_doctor("doc_b", cost=120.0, max_shifts=16)]
+    slots = daily_slots(61)  # Outubro (31) + Novembro (30)
+    request = make_request(doctors, slots)
+
+    result = RosterOptimizerService().solve_detailed(request)
+
+    assert result.status == "OPTIMAL"
+    per_month = Counter((a.doctor_id, a.date.month) for a in result.solutions)
+    assert max(per_month.values()) == 16
+    assert len(result.solutions) == 61
+
+
+def test_rolling_horizon_carries_consumed_shifts_between_windows(make_doctor, make_request, daily_slots):
+    """Teste: O horizonte rolante respeita o limite mensal somando o que já foi congelado."""
+    doctors = [make_doctor("cheap", cost=50.0, max_shifts=3), make_doctor("pricey", cost=200.0, max_shifts=31)]
+    slots = daily_slots(20)
+    request = make_request(doctors, slots, rolling_horizon=RollingHorizonSettings(plan_days=4, commit_days=2))
+
+    result = RollingHorizonService().solve_detailed(request)
+
+    assert result.status == "FEASIBLE"
+    assert sorted(a.slot_id for a in result.solutions) == sorted(s.id for s in slots)
+    counts = Counter(a.doctor_id for a in result.solutions)
+    assert counts == {"cheap": 3, "pricey": 17}
+
+
+def test_rolling_horizon_reports_objective_and_hint(make_doctor, make_request, daily_slots):
+    """Teste: O horizonte rolante devolve o objetivo da escala inteira e o relatório de warm-start completo."""
+    doctors = [make_doctor("cheap", cost=50.0, max_shifts=3), make_doctor("pricey", cost=200.0, max_shifts=31)]
+    slots = daily_slots(10)
+    previous = [
+        RosterSolution(slot_id=slots[0].id, doctor_id="cheap", date=slots[0].date),
+        RosterSolution(slot_id=slots[1].id, doctor_id="retired", date=slots[1].date),  # Médico que saiu
+    ]
+    request = make_request(
+        doctors, slots, previous_roster=previous, rolling_horizon=RollingHorizonSettings(plan_days=4, commit_days=2)
+    )
+
+    result = RollingHorizonService().solve_detailed(request)
+
+    instance = ProblemInstance.from_request(request)
+    assert result.objective_value == instance.objective_value(instance.pairs_of(result.solutions))
+    assert (result.hint.hinted_assignments, result.hint.discarded_assignments) == (1, 1)
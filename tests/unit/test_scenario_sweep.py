@@ -0,0 +1,82 @@
+import pytest
+from datetime import date, timedelta
+from app.domain.models import (
+    DoctorUnavailability, ObjectiveBreakdown, RosterChange, ScenarioResult, ScenarioVariant
+)
+from app.application.services.decomposition import shutdown_component_pool
+from app.application.services.optimizer_service import RosterOptimizerService
+from app.application.services.scenario_sweep import ScenarioSweepService, mark_pareto
+
+DAY = date(2023, 10, 1)
+
+@pytest.fixture
+def sweep_request(make_doctor, make_slot, make_request):
+    # "cheap" é barato mas não prefere nada; "keen" é caro e prefere todos os dias
+    doctors = [make_doctor("cheap", cost=50.0), make_doctor("keen", cost=60.0, preferred=range(4))]
+    slots = [make_slot(f"slot_{d}", day=d, sector="ER") for d in range(4)]
+    return make_request(doctors, slots)
+
+VARIANTS = [
+    ScenarioVariant(name="custo", weight_preference=0.0),
+    ScenarioVariant(name="preferencia", weight_preference=10.0),
+    ScenarioVariant(name="equidade", weight_preference=0.0, weight_fairness=1.0),
+]
+
+
+def test_sweep_matches_individual_solves_and_breaks_down_objective(sweep_request):
+    """Teste: Cada variante chega ao mesmo ótimo de um solve isolado, com o objetivo decomposto."""
+    request = sweep_request
+    results = ScenarioSweepService(parallel=False).sweep(request, VARIANTS)
+
+    for variant, result in zip(VARIANTS, results):
+        alone = RosterOptimizerService().solve_detailed(request.model_copy(update={
+            k: v for k, v in variant.model_dump().items() if k.startswith("weight_") and v is not None
+        }))
+        assert result.status == alone.status == "OPTIMAL"
+        assert result.objective_value == alone.objective_value
+
+    by_name = {r.name: r for r in results}
+    # Só custo: "cheap" pega tudo (12h * 50 * 4); preferência: "keen" pega tudo; equidade: 2 a 2
+    assert by_name["custo"].breakdown == ObjectiveBreakdown(
+        total_cost=2400, preference_hits=0, fairness_deviation=4, assignments=4
+    )
+    assert by_name["preferencia"].breakdown.preference_hits == 4
+    assert by_name["equidade"].breakdown.fairness_deviation == 0
+    assert all(r.pareto_optimal for r in results)
+    assert len(by_name["custo"].solutions) == 4
+
+
+def test_parallel_sweep_and_what_if_variant(sweep_request):
+    """Teste: Em processos, os resultados são os mesmos; o what-if usa a estrutura alterada."""
+    request = sweep_request
+    sick = ScenarioVariant(name="cheap_doente", weight_preference=0.0, change=RosterChange(
+        unavailable=[DoctorUnavailability(doctor_id="cheap", dates=[DAY, DAY + timedelta(days=1)])]
+    ))
+    sequential = ScenarioSweepService(parallel=False).sweep(request, VARIANTS + [sick])
+    try:
+        parallel = ScenarioSweepService(parallel=True).sweep(request, VARIANTS + [sick], num_workers=2)
+    finally:
+        shutdown_component_pool()
+
+    assert [r.objective_value for r in parallel] == [r.objective_value for r in sequential]
+    what_if = parallel[-1]
+    assert {a.doctor_id for a in what_if.solutions if a.slot_id in ("slot_0", "slot_1")} == {"keen"}
+    # Sem o médico barato nos dias 0 e 1 a escala fica mais cara
+    assert what_if.breakdown.total_cost > parallel[0].breakdown.total_cost
+
+
+def test_pareto_marks_dominated_variants():
+    """Teste: Variante pior ou igual em tudo (e pior em algo) sai da fronteira; empates ficam."""
+    def result(name, cost, hits, deviation):
+        return ScenarioResult(
+            name=name, weight_cost=1, weight_preference=1, weight_fairness=0, status="OPTIMAL",
+            breakdown=ObjectiveBreakdown(total_cost=cost, preference_hits=hits, fairness_deviation=deviation, assignments=1)
+        )
+    results = [
+        result("a", 100, 2, 0), result("b", 120, 2, 0), result("c", 90, 1, 3),
+        result("d", 100, 2, 0), ScenarioResult(name="e", weight_cost=1, weight_preference=1, weight_fairness=0, status="INFEASIBLE")
+    ]
+
+    mark_pareto(results)
+
+    assert [r.name for r in results if r.pareto_optimal] == ["a", "c", "d"]
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from app.application.services.solve_scheduler import SolveScheduler, SolverOverloadedError
+
+
+def test_core_budget_is_split_between_concurrent_solves():
+    """Teste: Solves simultâneos dividem o orçamento de núcleos em vez de somar 8 cada."""
+    scheduler = SolveScheduler(core_budget=8, max_concurrent=4, max_queue=0, max_workers_per_solve=8)
+
+    leases = [scheduler.acquire() for _ in range(4)]
+    assert [lease.num_workers for lease in leases] == [4, 2, 2, 1]
+    assert scheduler.stats()["running"] == 4
+
+    with pytest.raises(SolverOverloadedError):
+        scheduler.acquire(timeout=0.01)
+    assert scheduler.stats()["rejected_total"] == 1
+
+    for lease in leases:
+        lease.release()
+    assert scheduler.stats()["cores_in_use"] == 0
+
+
+def test_async_waiters_are_admitted_in_order_when_slots_free_up():
+    """Teste: Pedidos na fila aguardam sem bloquear o loop e entram quando há vaga."""
+    scheduler = SolveScheduler(core_budget=4, max_concurrent=1, max_queue=2)
+
+    async def scenario():
+        running = await scheduler.acquire_async()
+        waiting = asyncio.ensure_future(scheduler.acquire_async(timeout=1.0))
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queue_depth"] == 1
+        assert not waiting.done()
+
+        running.release()
+        lease = await waiting
+        assert lease.num_workers == 4  # max_concurrent=1: recebe todo o orçamento
+        assert lease.wait_seconds > 0
+        lease.release()
+
+    asyncio.run(scenario())
+    stats = scheduler.stats()
+    assert stats["admitted_total"] == 2
+    assert stats["queue_depth"] == 0
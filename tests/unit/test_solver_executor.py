@@ -0,0 +1,65 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from app.domain.models import (
+    Doctor, DoctorAttributes, DoctorAvailability,
+    ShiftSlot, SpecialtyEnum, ShiftTypeEnum, OptimizationRequest
+)
+from app.application.services.solve_scheduler import SolveScheduler
+from app.application.services.solver_executor import _run_leased, run_solve, shutdown_solver_executor
+
+
+def test_run_solve_concurrent_requests_off_loop():
+    """Teste: Vários solves simultâneos no pool devolvem resultados independentes."""
+    doctor = Doctor(
+        id="doc_1", name="Dr. House", crm="111",
+        specialties=[SpecialtyEnum.CLINICA_GERAL],
+        attributes=DoctorAttributes(cost_per_hour=100.0),
+        availability=DoctorAvailability()
+    )
+
+    def make_request(slot_id):
+        slot = ShiftSlot(
+            id=slot_id, date=date(2023, 10, 1), shift_type=ShiftTypeEnum.DIURNO,
+            required_specialties=[SpecialtyEnum.CLINICA_GERAL], required_count=1, sector_id="UTI"
+        )
+        return OptimizationRequest(
+            period_start=slot.date, period_end=slot.date,
+            doctors=[doctor], slots_to_fill=[slot]
+        )
+
+    async def scenario():
+        return await asyncio.gather(*(run_solve(make_request(f"slot_{i}")) for i in range(4)))
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        shutdown_solver_executor()
+
+    assert [[r.slot_id for r in result.solutions] for result in results] == [[f"slot_{i}"] for i in range(4)]
+
+
+def test_cancelled_caller_keeps_cores_until_the_solve_finishes():
+    """Teste: Cancelar quem espera não devolve o lease enquanto o solve ainda roda no pool."""
+    scheduler = SolveScheduler(core_budget=4, max_concurrent=1, max_queue=0)
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_solve():
+        started.set()
+        finish.wait(5)
+        return "done"
+
+    async def scenario(executor):
+        lease = await scheduler.acquire_async()
+        task = asyncio.ensure_future(_run_leased(lease, executor, slow_solve))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert scheduler.stats()["running"] == 1
+
+        finish.set()
+        await asyncio.to_thread(executor.shutdown)
+        assert scheduler.stats()["running"] == 0
+
+    asyncio.run(scenario(ThreadPoolExecutor(max_workers=1)))
@@ -0,0 +1,67 @@
+import numpy as np
+from ortools.sat.python import cp_model
+from app.domain.models import SpecialtyEnum, ShiftTypeEnum
+from app.application.services.optimizer_service import RosterOptimizerService
+from app.application.services.problem_instance import ProblemInstance
+from app.application.services.symmetry import interchangeable_classes
+
+def test_interchangeable_classes_group_identical_profiles(make_doctor, make_slot, make_request):
+    """Teste: Mesmo perfil cai na mesma classe; custo ou indisponibilidade diferentes separam."""
+    doctors = [
+        make_doctor("gp_a", [SpecialtyEnum.CLINICA_GERAL]),
+        make_doctor("gp_b", [SpecialtyEnum.CLINICA_GERAL]),
+        make_doctor("gp_expensive", [SpecialtyEnum.CLINICA_GERAL], cost=300.0),
+        make_doctor("gp_away", [SpecialtyEnum.CLINICA_GERAL], unavailable=[1]),
+        make_doctor("gp_c", [SpecialtyEnum.CLINICA_GERAL]),
+    ]
+    slots = [make_slot(f"gp_{d}", SpecialtyEnum.CLINICA_GERAL, day=d) for d in range(2)]
+    instance = ProblemInstance.from_request(make_request(doctors, slots))
+
+    classes = [[instance.doctor_ids[i] for i in members] for members in interchangeable_classes(instance)]
+
+    assert sorted(classes) == [["gp_a", "gp_b", "gp_c"], ["gp_away"], ["gp_expensive"]]
+
+
+def test_homogeneous_pool_is_solved_on_class_counts(make_doctor, make_slot, make_request):
+    """Teste: Pool homogêneo resolve pelo modelo agregado com o mesmo ótimo do modelo completo, sem quebrar H4/H5."""
+    doctors = [make_doctor(f"gp_{k}", [SpecialtyEnum.CLINICA_GERAL], max_shifts=4) for k in range(12)]
+    doctors += [make_doctor(f"peds_{k}", [SpecialtyEnum.PEDIATRIA], cost=120.0, max_shifts=4) for k in range(6)]
+    slots = []
+    for d in range(7):
+        slots.append(make_slot(f"gp_morning_{d}", SpecialtyEnum.CLINICA_GERAL, ShiftTypeEnum.MANHA, day=d, required=2))
+        slots.append(make_slot(f"gp_day_{d}", SpecialtyEnum.CLINICA_GERAL, ShiftTypeEnum.DIURNO, day=d, required=2))
+        slots.append(make_slot(f"gp_night_{d}", SpecialtyEnum.CLINICA_GERAL, ShiftTypeEnum.NOTURNO, day=d))
+        slots.append(make_slot(f"peds_day_{d}", SpecialtyEnum.PEDIATRIA, ShiftTypeEnum.DIURNO, day=d, required=2))
+    request = make_request(doctors, slots, weight_fairness=1.0)
+
+    aggregated = RosterOptimizerService(use_flow=False).solve_detailed(request)
+    full = RosterOptimizerService(use_flow=False, use_aggregation=False).solve_detailed(request)
+
+    assert aggregated.engine == "cp_sat_aggregated"
+    assert full.engine in ("cp_sat", "heuristic")
+    assert aggregated.status == "OPTIMAL"
+    assert aggregated.objective_value >= full.objective_value
+
+    instance = ProblemInstance.from_request(request)
+    pairs = instance.pairs_of(aggregated.solutions)
+    assert len(pairs) == len(aggregated.solutions)
+    assert (np.bincount(instance.pair_slot[pairs], minlength=instance.n_slots) == instance.slot_required).all()
+    assert (np.bincount(instance.pair_doctor[pairs], minlength=instance.n_doctors) <= 4).all()
+    for i in range(instance.n_doctors):
+        mine = instance.pair_slot[pairs][instance.pair_doctor[pairs] == i]
+        order = np.argsort(instance.slot_start[mine])
+        # Em ordem de início, cada plantão começa depois que o anterior terminou
+        assert (instance.slot_start[mine[order]][1:] >= instance.slot_end[mine[order]][:-1]).all()
+
+
+def test_aggregated_optimum_survives_float_noise(monkeypatch, make_doctor, make_slot, make_request):
+    """Teste: Ruído de float no objetivo do CP-SAT não rebaixa o ótimo agregado para FEASIBLE."""
+    doctors = [make_doctor(f"gp_{k}", [SpecialtyEnum.CLINICA_GERAL], max_shifts=4) for k in range(8)]
+    slots = [make_slot(f"gp_{d}", SpecialtyEnum.CLINICA_GERAL, day=d, required=2) for d in range(7)]
+    original_objective = cp_model.CpSolver.ObjectiveValue
+    monkeypatch.setattr(cp_model.CpSolver, "ObjectiveValue", lambda self: original_objective(self) - 1e-9)
+
+    result = RosterOptimizerService(use_flow=False).solve_detailed(make_request(doctors, slots, weight_fairness=1.0))
+
+    assert (result.status, result.engine) == ("OPTIMAL", "cp_sat_aggregated")
+    assert result.objective_value == round(result.objective_value)